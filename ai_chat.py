@@ -1,17 +1,17 @@
-from transformers import pipeline
-import arabic_reshaper
-from bidi.algorithm import get_display
-import torch
 from ai_learning import AILearningSystem
+from model_service import get_classifier
+from command_router import CommandRouter
+from chat_session import ChatSession
+from metrics import timed, registry
 import re
 
 class AIChatSystem:
-    def __init__(self):
-        # تهيئة نظام التعلم
-        self.learning_system = AILearningSystem()
+    def __init__(self, classifier=None, history_capacity=200, history_dir=None, learning_system=None):
+        # نموذج معالجة اللغة العربية مشترك مع نظام التعلم ويُحمّل عند أول استخدام
+        self.nlp = classifier or get_classifier()
         
-        # تهيئة نموذج معالجة اللغة العربية
-        self.nlp = pipeline("text-classification", model="CAMeL-Lab/bert-base-arabic-camelbert-mix")
+        # تهيئة نظام التعلم
+        self.learning_system = learning_system or AILearningSystem(classifier=self.nlp)
         
         # قائمة الأوامر المتاحة
         self.commands = {
@@ -28,80 +28,82 @@ class AIChatSystem:
             'استراتيجية': 'strategy'
         }
         
-        # حالة الذكاء الاصطناعي
-        self.current_state = {
-            'aggressive': 0.5,
-            'cooperative': 0.5,
-            'resourceful': 0.5,
-            'learning': 0.5
-        }
+        # توجيه الأوامر بالكلمات المفتاحية أولاً ثم النموذج عند الحاجة
+        self.router = CommandRouter(self.commands, self.nlp)
+        registry.register_collector('chat_router', self.router.stats)
         
-        # سجل المحادثة
-        self.chat_history = []
+        # الجلسة المحلية: حالة الذكاء الاصطناعي وسجل المحادثة بسعة ثابتة
+        # (الرسائل الأقدم تُؤرشف على القرص إن حُدد مجلد)
+        self.session = ChatSession('local', history_capacity, history_dir)
+
+    @property
+    def current_state(self):
+        return self.session.current_state
+
+    @property
+    def chat_history(self):
+        return self.session.chat_history
 
     def process_arabic_text(self, text):
         """معالجة النص العربي للعرض الصحيح"""
+        import arabic_reshaper
+        from bidi.algorithm import get_display
         reshaped_text = arabic_reshaper.reshape(text)
         return get_display(reshaped_text)
 
-    def analyze_command(self, text):
-        """تحليل الأمر المدخل وتحديد الإجراء المناسب"""
-        # تحليل النص باستخدام نموذج اللغة العربية
-        result = self.nlp(text)[0]
-        
-        # استخراج الكلمات الرئيسية
-        words = text.split()
-        command = None
-        
-        for word in words:
-            if word in self.commands:
-                command = self.commands[word]
-                break
+    @timed('chat_analyze_command_seconds', 'زمن تحديد الأمر من النص')
+    def analyze_command(self, text, need_confidence=False, session=None):
+        """تحليل الأمر المدخل: (الأمر، الثقة، باقي النص بعد كلمة الأمر)"""
+        # مطابقة الكلمات المفتاحية، والنموذج يعمل فقط إذا لم تتطابق أو طُلبت الثقة
+        command, confidence, argument = self.router.route(text, need_confidence)
         
         # تحديث حالة الذكاء الاصطناعي بناءً على الأمر
         if command:
-            self.update_ai_state(command)
+            self.update_ai_state(command, (session or self.session).current_state)
         
-        return command, result['score'], text
+        return command, confidence, argument
 
-    def update_ai_state(self, command):
+    def update_ai_state(self, command, state=None):
         """تحديث حالة الذكاء الاصطناعي بناءً على الأوامر"""
+        state = self.current_state if state is None else state
         if command in ['attack']:
-            self.current_state['aggressive'] = min(1.0, self.current_state['aggressive'] + 0.1)
+            state['aggressive'] = min(1.0, state['aggressive'] + 0.1)
         elif command in ['defend', 'cooperate']:
-            self.current_state['cooperative'] = min(1.0, self.current_state['cooperative'] + 0.1)
+            state['cooperative'] = min(1.0, state['cooperative'] + 0.1)
         elif command in ['gather', 'fish']:
-            self.current_state['resourceful'] = min(1.0, self.current_state['resourceful'] + 0.1)
+            state['resourceful'] = min(1.0, state['resourceful'] + 0.1)
         elif command in ['learn', 'search']:
-            self.current_state['learning'] = min(1.0, self.current_state['learning'] + 0.1)
+            state['learning'] = min(1.0, state['learning'] + 0.1)
 
-    def get_response(self, text):
-        """معالجة أمر المستخدم وإرجاع الرد المناسب"""
-        command, confidence, full_text = self.analyze_command(text)
+    def get_response(self, text, session=None):
+        """معالجة أمر المستخدم وإرجاع الرد المناسب جاهزاً للعرض"""
+        response, command, confidence = self.reply(text, session)
+        return self.process_arabic_text(response)
+
+    @timed('chat_reply_seconds', 'زمن الرد على رسالة كاملة')
+    def reply(self, text, session=None):
+        """الرد على رسالة ضمن جلسة معينة (الجلسة المحلية افتراضياً): (الرد، الأمر، الثقة)"""
+        session = session or self.session
+        command, confidence, argument = self.analyze_command(text, session=session)
         
         if command == 'learn':
-            # استخراج موضوع التعلم
-            topic = text.replace('تعلم', '').strip()
+            # موضوع التعلم هو باقي الرسالة بعد كلمة الأمر (مع سابقتها مثل "و")
+            topic = argument
             self.learning_system.learn_from_internet(topic, 'user_requested')
             response = f"بدأت التعلم عن: {topic}"
         
         elif command == 'search':
             # البحث في قاعدة المعرفة
-            query = text.replace('ابحث', '').strip()
-            knowledge = self.learning_system.get_knowledge()
-            relevant = []
-            for category, items in knowledge.items():
-                for item in items:
-                    if query.lower() in item['text'].lower():
-                        relevant.append(item['text'][:200])
+            query = argument
+            relevant = self.learning_system.search_knowledge(query)
             if relevant:
-                response = f"وجدت المعلومات التالية: {relevant[0]}..."
+                response = f"وجدت المعلومات التالية: {relevant[0]['text'][:200]}..."
             else:
                 response = "لم أجد معلومات متعلقة بهذا الموضوع"
         
         elif command == 'strategy':
             # توليد استراتيجية
-            situation = text.replace('استراتيجية', '').strip()
+            situation = argument
             strategy = self.learning_system.generate_strategy(situation)
             response = strategy
         
@@ -111,14 +113,10 @@ class AIChatSystem:
             response = "عذراً، لم أفهم الأمر. يمكنك استخدام: هجوم، دفاع، جمع، بناء، تعاون، استكشاف، صيد، مساعدة، تعلم، ابحث، استراتيجية"
         
         # إضافة المحادثة إلى السجل
-        self.chat_history.append({
-            'user': text,
-            'ai': response,
-            'command': command,
-            'confidence': confidence
-        })
+        session.chat_history.append(text, response, command, confidence)
+        registry.counter('chat_commands_total', 'الرسائل حسب الأمر', command=command or 'none').inc()
         
-        return self.process_arabic_text(response)
+        return response, command, confidence
 
     def generate_response(self, command, confidence):
         """إنشاء رد مناسب بناءً على الأمر"""
@@ -1,9 +1,16 @@
 from ursina import *
 import random
+import math
 import numpy as np
+from metrics import registry, timed
+from q_engine import (QLearningEngine, STATES, ACTIONS, STATE_IDS, ACTION_IDS,
+                      ATTACK_RANGE, CHASE_RANGE, FLEE_RANGE)
 
 class AIEnemy(Entity):
-    def __init__(self):
+    # المحرك الافتراضي إذا لم يُمرر محرك آخر: صف جدول Q مستقل لكل عدو
+    default_engine = None
+
+    def __init__(self, engine=None, grid=None):
         super().__init__(
             model='cube',
             scale=1,
@@ -14,69 +21,87 @@ class AIEnemy(Entity):
         self.speed = 2
         self.state = 'patrol'
         self.target = None
+        # الشبكة المكانية التي تتتبع موقع العدو (اختيارية)
+        self.grid = grid
         self.respawn()
         
         # نظام التعلم
         self.experience = []
-        self.learning_rate = 0.1
         
         # الحالات والإجراءات
-        self.states = ['patrol', 'chase', 'attack', 'flee']
-        self.actions = ['move_forward', 'move_back', 'turn_left', 'turn_right', 'attack']
+        self.states = STATES
+        self.actions = ACTIONS
         
-        # مصفوفة Q-learning
-        self.q_table = {}
-        self.initialize_q_table()
+        # جدول Q داخل محرك مجمّع يعالج كل الأعداء معاً
+        if engine is None:
+            if AIEnemy.default_engine is None:
+                AIEnemy.default_engine = QLearningEngine()
+            engine = AIEnemy.default_engine
+        self.engine = engine
+        self.agent_id = engine.register()
+
+    @property
+    def learning_rate(self):
+        return self.engine.learning_rate
 
-    def initialize_q_table(self):
-        """تهيئة جدول Q-learning"""
-        for state in self.states:
-            self.q_table[state] = {}
-            for action in self.actions:
-                self.q_table[state][action] = random.random()
+    @property
+    def q_table(self):
+        """جدول Q لهذا العدو كقاموس (للعرض والتصحيح)"""
+        table = self.engine.table(self.agent_id)
+        return {state: dict(zip(self.actions, table[i])) for i, state in enumerate(self.states)}
 
     def choose_action(self, state):
         """اختيار إجراء بناءً على الحالة الحالية"""
-        if random.random() < 0.1:  # استكشاف
-            return random.choice(self.actions)
-        else:  # استغلال
-            return max(self.q_table[state].items(), key=lambda x: x[1])[0]
+        action = self.engine.choose_actions([self.agent_id], [STATE_IDS[state]])[0]
+        return self.actions[action]
 
     def update_q_table(self, state, action, reward, next_state):
         """تحديث جدول Q-learning"""
-        old_value = self.q_table[state][action]
-        next_max = max(self.q_table[next_state].values())
-        new_value = (1 - self.learning_rate) * old_value + self.learning_rate * (reward + 0.9 * next_max)
-        self.q_table[state][action] = new_value
+        self.engine.update([self.agent_id], [STATE_IDS[state]], [ACTION_IDS[action]],
+                           [reward], [STATE_IDS[next_state]])
 
-    def get_state(self, player):
+    def get_state(self, player, dist=None):
         """تحديد الحالة بناءً على المسافة من اللاعب"""
-        dist = distance(self, player)
-        if dist < 2:
+        if dist is None:
+            dist = distance(self, player)
+        if dist < ATTACK_RANGE:
             return 'attack'
-        elif dist < 5:
+        elif dist < CHASE_RANGE:
             return 'chase'
-        elif dist < 10 and self.health < 50:
+        elif dist < FLEE_RANGE and self.health < 50:
             return 'flee'
         else:
             return 'patrol'
 
-    def execute_action(self, action, player):
-        """تنفيذ الإجراء المختار"""
+    def execute_action(self, action, player, dist=None, dt=None):
+        """تنفيذ الإجراء المختار (dt: طول نبضة الذكاء الاصطناعي، أو زمن الإطار)"""
+        if dt is None:
+            dt = time.dt
         if action == 'move_forward':
-            self.position += self.forward * time.dt * self.speed
+            self.position += self.forward * dt * self.speed
+            self.sync_grid()
         elif action == 'move_back':
-            self.position -= self.forward * time.dt * self.speed
+            self.position -= self.forward * dt * self.speed
+            self.sync_grid()
         elif action == 'turn_left':
-            self.rotation_y -= time.dt * 100
+            self.rotation_y -= dt * 100
         elif action == 'turn_right':
-            self.rotation_y += time.dt * 100
-        elif action == 'attack' and distance(self, player) < 2:
-            return -10 if self.health < 50 else 10
+            self.rotation_y += dt * 100
+        elif action == 'attack':
+            if dist is None:
+                dist = distance(self, player)
+            if dist < ATTACK_RANGE:
+                return -10 if self.health < 50 else 10
         return 0
 
-    def update(self, player):
-        """تحديث حالة العدو"""
+    def sync_grid(self):
+        """تحديث موقع العدو في الشبكة المكانية"""
+        if self.grid is not None:
+            self.grid.move(self, self.x, self.z)
+
+    def tick(self, player, dt=None):
+        """تحديث عدو واحد (اللعبة تحدّث الأعداء مجمّعين عبر update_enemies)"""
+        # ليست update() حتى لا تستدعيها Ursina لكل عدو في كل إطار
         if self.health <= 0:
             self.respawn()
             return
@@ -86,7 +111,7 @@ class AIEnemy(Entity):
         action = self.choose_action(current_state)
         
         # تنفيذ الإجراء وحساب المكافأة
-        reward = self.execute_action(action, player)
+        reward = self.execute_action(action, player, dt=dt)
         
         # تحديث الحالة الجديدة
         next_state = self.get_state(player)
@@ -104,3 +129,92 @@ class AIEnemy(Entity):
         z = random.uniform(-40, 40)
         self.position = (x, 1, z)
         self.health = 100
+        self.sync_grid()
+        # لا استيفاء بين الموقع القديم والجديد
+        self.tick_from = self.tick_to = Vec3(self.position)
+        self.yaw_from = self.yaw_to = self.rotation_y
+        self.moving = False
+
+
+def player_distances(enemies, player, grid=None):
+    """المسافة إلى اللاعب لكل عدو
+
+    مع الشبكة المكانية تُحسب المسافة فقط للأعداء داخل FLEE_RANGE، والباقون
+    في حالة الدورية مهما كانت مسافتهم فتُعتبر مسافتهم لانهائية.
+    """
+    if grid is None:
+        return [distance(enemy, player) for enemy in enemies]
+    near = {id(enemy) for enemy, _ in grid.query_radius(player.x, player.z, FLEE_RANGE)}
+    return [distance(enemy, player) if id(enemy) in near else math.inf for enemy in enemies]
+
+
+def lerp_yaw(start, end, t):
+    """استيفاء زاوية بأقصر اتجاه"""
+    return start + (((end - start) + 180) % 360 - 180) * t
+
+
+def begin_tick(enemies):
+    """إرجاع الأعداء إلى آخر حالة منطقية قبل نبضة الذكاء الاصطناعي"""
+    for enemy in enemies:
+        if enemy.moving:
+            enemy.position = enemy.tick_to
+            enemy.rotation_y = enemy.yaw_to
+
+
+def end_tick(enemies):
+    """حفظ الحالة المنطقية الجديدة كهدف للاستيفاء حتى النبضة التالية"""
+    for enemy in enemies:
+        enemy.tick_from, enemy.tick_to = enemy.tick_to, Vec3(enemy.position)
+        enemy.yaw_from, enemy.yaw_to = enemy.yaw_to, enemy.rotation_y
+        enemy.moving = enemy.tick_from != enemy.tick_to or enemy.yaw_from != enemy.yaw_to
+
+
+def interpolate_enemies(enemies, alpha):
+    """عرض الأعداء بين آخر نبضتين (متأخرين نبضة واحدة) لحركة ناعمة بأي معدل إطارات"""
+    for enemy in enemies:
+        if enemy.moving:
+            enemy.position = lerp(enemy.tick_from, enemy.tick_to, alpha)
+            enemy.rotation_y = lerp_yaw(enemy.yaw_from, enemy.yaw_to, alpha)
+
+
+# التعلم يمر في update_enemies كاستدعاء واحد للمحرك لكل مجموعة، فهنا يُقاس
+Q_UPDATE_TIME = registry.histogram('enemy_update_q_seconds', 'زمن تحديث جداول Q لدفعة أعداء')
+
+
+@timed('enemy_tick_seconds', 'زمن تحديث دفعة أعداء في نبضة')
+def update_enemies(enemies, player, grid=None, dt=None):
+    """تحديث كل الأعداء مع استدعاء واحد للمحرك لاختيار الإجراءات وآخر للتعلم"""
+    active = []
+    for enemy in enemies:
+        if enemy.health <= 0:
+            enemy.respawn()
+        else:
+            active.append(enemy)
+    if not active:
+        return
+    
+    # الأعداء قد يستخدمون محركات مختلفة: نجمعهم حسب المحرك
+    groups = {}
+    for enemy in active:
+        groups.setdefault(id(enemy.engine), []).append(enemy)
+    
+    for group in groups.values():
+        engine = group[0].engine
+        agents = np.array([enemy.agent_id for enemy in group])
+        dists = player_distances(group, player, grid)
+        states = np.array([STATE_IDS[enemy.get_state(player, dist)]
+                           for enemy, dist in zip(group, dists)])
+        actions = engine.choose_actions(agents, states)
+        rewards = np.array([enemy.execute_action(ACTIONS[action], player, dist, dt)
+                            for enemy, action, dist in zip(group, actions, dists)],
+                           dtype=np.float64)
+        next_dists = player_distances(group, player, grid)
+        next_states = np.array([STATE_IDS[enemy.get_state(player, dist)]
+                                for enemy, dist in zip(group, next_dists)])
+        with Q_UPDATE_TIME.time():
+            engine.update(agents, states, actions, rewards, next_states)
+        
+        # تحديث الاتجاه نحو اللاعب
+        for enemy, state in zip(group, states):
+            if STATES[state] in ['chase', 'attack']:
+                enemy.look_at(player)
@@ -1,53 +1,95 @@
-import requests
-from bs4 import BeautifulSoup
-from googlesearch import search
-import wikipedia
-import json
-import os
-import openai
-from threading import Thread
+from threading import Thread, Event, Lock
 import time
-import torch
-import numpy as np
-from transformers import pipeline
+from model_service import get_classifier
+from arabic_text import content_hash
+from knowledge_index import KnowledgeIndex
+from embedding_index import EmbeddingIndex
+from knowledge_store import KnowledgeStore
+from web_fetcher import WebFetcher
+from metrics import timed, record_error, registry
 
 class AILearningSystem:
-    def __init__(self):
+    # أقل تميز مقبول لعنصر عن متوسط تشابه الموقف مع كل المعرفة، كنسبة من المسافة الباقية
+    # إلى التطابق التام؛ متجهات BERT متقاربة (0.7-0.9 لنصوص غير مرتبطة) فالحد المطلق بلا معنى
+    MIN_RELATIVE_SIMILARITY = 0.2
+
+    def __init__(self, classifier=None, store=None, fetcher=None, start_learning=True, embedder=None):
         self.knowledge_base = {}
         self.learning_history = []
         self.search_threads = []
         self.is_learning = False
+        self.learning_thread = None
+        # يوقظ حلقة التعلم من الانتظار بين المواضيع عند الإيقاف
+        self._stop_event = Event()
+        
+        # بصمات النصوص المتعلمة لتجاهل المحتوى المكرر قبل تشغيل النموذج
+        self.content_hashes = set()
+        self.items_by_hash = {}
+        self.duplicates_skipped = 0
+        
+        # التخزين الإلحاقي لقاعدة المعرفة
+        self.store = store or KnowledgeStore('knowledge_base')
+        
+        # طبقة الجلب المتوازي من الويب (قابلة للاستبدال في الاختبارات)
+        self.fetcher = fetcher or WebFetcher()
+        
+        # فهرس البحث في قاعدة المعرفة
+        self.knowledge_index = KnowledgeIndex()
+        
+        # نموذج معالجة اللغة المشترك (يُحمّل مرة واحدة لكل عملية)
+        self.arabic_classifier = classifier or get_classifier()
+        
+        # فهرس دلالي بمتجهات نفس النموذج، تُحسب مرة واحدة عند التعلم؛ يُنشأ عند أول استخدام
+        # لأن معرفة دعم الخلفية للمتجهات تتطلب تحميل النموذج
+        self.embedder = embedder or getattr(self.arabic_classifier, 'embed', None)
+        self.embedding_index = None
+        self._check_embeddings = embedder is None
+        self._embedding_lock = Lock()
         
-        # تهيئة نماذج معالجة اللغة
-        self.arabic_classifier = pipeline("text-classification", 
-                                       model="CAMeL-Lab/bert-base-arabic-camelbert-mix")
+        # إحصائيات الذاكرة المؤقتة تظهر مع باقي المقاييس
+        registry.register_collector('learning', self.cache_stats)
         
         # تحميل قاعدة المعرفة إذا كانت موجودة
         self.load_knowledge_base()
         
         # بدء عملية التعلم المستمر
-        self.start_continuous_learning()
+        if start_learning:
+            self.start_continuous_learning()
 
     def load_knowledge_base(self):
         """تحميل قاعدة المعرفة من الملف"""
         try:
-            if os.path.exists('knowledge_base.json'):
-                with open('knowledge_base.json', 'r', encoding='utf-8') as f:
-                    self.knowledge_base = json.load(f)
+            self.knowledge_base = {}
+            self.content_hashes = set()
+            self.items_by_hash = {}
+            for item in self.store.load():
+                self.knowledge_base.setdefault(item.get('category'), []).append(item)
+                digest = item.get('hash') or content_hash(item['text'])
+                self.content_hashes.add(digest)
+                self.items_by_hash[digest] = item
+            self.knowledge_index.build(self.knowledge_base)
         except Exception as e:
             print(f"خطأ في تحميل قاعدة المعرفة: {e}")
+            record_error('load_knowledge')
 
+    @timed('knowledge_save_seconds', 'زمن حفظ لقطة قاعدة المعرفة')
     def save_knowledge_base(self):
-        """حفظ قاعدة المعرفة إلى ملف"""
+        """حفظ لقطة كاملة لقاعدة المعرفة وضغط السجل"""
         try:
-            with open('knowledge_base.json', 'w', encoding='utf-8') as f:
-                json.dump(self.knowledge_base, f, ensure_ascii=False, indent=2)
+            self.store.compact(self.knowledge_base)
         except Exception as e:
             print(f"خطأ في حفظ قاعدة المعرفة: {e}")
+            record_error('save_knowledge')
 
     def search_wikipedia(self, query, lang='ar'):
         """البحث في ويكيبيديا"""
+        key = self.fetcher.cache.key('wiki', lang, query)
+        return self.fetcher.cache.get_or_compute(key, lambda: self._fetch_wikipedia(query, lang))
+
+    def _fetch_wikipedia(self, query, lang):
         try:
+            # استيراد متأخر لأن المكتبة تحمّل requests و bs4
+            import wikipedia
             wikipedia.set_lang(lang)
             results = wikipedia.search(query)
             if results:
@@ -59,77 +101,173 @@ class AILearningSystem:
                 }
         except Exception as e:
             print(f"خطأ في البحث في ويكيبيديا: {e}")
+            record_error('wikipedia')
         return None
 
     def search_web(self, query):
         """البحث في الويب"""
         try:
-            search_results = []
-            for url in search(query, num_results=5):
-                try:
-                    response = requests.get(url, timeout=5)
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    text = soup.get_text()[:1000]
-                    search_results.append({
-                        'url': url,
-                        'content': text
-                    })
-                except:
-                    continue
-            return search_results
+            # جلب الصفحات بالتوازي عبر جلسة مشتركة
+            urls = self.fetcher.search(query, num_results=5)
+            return self.fetcher.fetch_pages(urls)
         except Exception as e:
             print(f"خطأ في البحث على الويب: {e}")
+            record_error('web_search')
         return []
 
+    @timed('learning_analyze_seconds', 'زمن تحليل النصوص والتعلم منها', mode='single')
     def analyze_and_learn(self, text, category):
         """تحليل النص والتعلم منه"""
         try:
+            if not self.filter_new([text]):
+                return True
             # تحليل النص باستخدام نموذج اللغة العربية
             analysis = self.arabic_classifier(text)
-            
-            # استخراج المعلومات المهمة
-            important_info = {
-                'text': text,
-                'category': category,
-                'confidence': analysis[0]['score'],
-                'timestamp': time.time()
-            }
-            
-            # إضافة إلى قاعدة المعرفة
-            if category not in self.knowledge_base:
-                self.knowledge_base[category] = []
-            self.knowledge_base[category].append(important_info)
-            
-            # حفظ قاعدة المعرفة
-            self.save_knowledge_base()
-            
+            self.index_embeddings([self.add_knowledge(text, category, analysis[0]['score'])])
             return True
         except Exception as e:
             print(f"خطأ في التحليل والتعلم: {e}")
+            record_error('analyze')
             return False
 
+    @timed('learning_analyze_seconds', 'زمن تحليل النصوص والتعلم منها', mode='batch')
+    def analyze_and_learn_batch(self, texts, category):
+        """تحليل عدة نصوص في دفعة واحدة للنموذج ثم التعلم منها"""
+        try:
+            texts = self.filter_new(texts)
+            if not texts:
+                return True
+            analysis = self.arabic_classifier(list(texts))
+            items = [self.add_knowledge(text, category, result['score'])
+                     for text, result in zip(texts, analysis)]
+            self.index_embeddings(items)
+            return True
+        except Exception as e:
+            print(f"خطأ في التحليل والتعلم: {e}")
+            record_error('analyze')
+            return False
+
+    def filter_new(self, texts):
+        """حذف النصوص المعروفة مسبقاً (أو المكررة داخل الدفعة) حسب بصمة المحتوى"""
+        new_texts = []
+        seen = set()
+        for text in texts:
+            digest = content_hash(text)
+            if digest in self.content_hashes or digest in seen:
+                self.duplicates_skipped += 1
+                continue
+            seen.add(digest)
+            new_texts.append(text)
+        return new_texts
+
+    def add_knowledge(self, text, category, confidence):
+        """إضافة معلومة مصنفة إلى قاعدة المعرفة"""
+        # استخراج المعلومات المهمة
+        important_info = {
+            'text': text,
+            'category': category,
+            'confidence': confidence,
+            'timestamp': time.time(),
+            'hash': content_hash(text)
+        }
+        self.content_hashes.add(important_info['hash'])
+        self.items_by_hash[important_info['hash']] = important_info
+        
+        # إضافة إلى قاعدة المعرفة
+        if category not in self.knowledge_base:
+            self.knowledge_base[category] = []
+        self.knowledge_base[category].append(important_info)
+        self.knowledge_index.add(important_info, category)
+        
+        # إلحاق العنصر بالسجل بدل إعادة كتابة الملف كاملاً
+        try:
+            self.store.append(important_info)
+            if self.store.needs_compaction:
+                self.save_knowledge_base()
+        except Exception as e:
+            print(f"خطأ في حفظ قاعدة المعرفة: {e}")
+            record_error('save_knowledge')
+        return important_info
+
+    def embeddings(self):
+        """الفهرس الدلالي، أو None إذا لم يكن هناك مصدر متجهات أو كانت الخلفية لا تدعمها"""
+        if self.embedding_index is not None or self.embedder is None:
+            return self.embedding_index
+        with self._embedding_lock:
+            if self.embedding_index is None and self.embedder is not None:
+                if self._check_embeddings and not getattr(self.arabic_classifier, 'supports_embeddings', True):
+                    print("الفهرس الدلالي معطل: خلفية النموذج لا تدعم المتجهات")
+                    self.embedder = None
+                    return None
+                self.embedding_index = EmbeddingIndex(f'{self.store.name}.embeddings',
+                                                      model=getattr(self.arabic_classifier, 'model_name', None))
+                registry.register_collector('embeddings', self.embedding_index.stats)
+        return self.embedding_index
+
+    def embed(self, texts):
+        """متجهات النصوص من نفس مصدر الفهرس الدلالي"""
+        if self.embeddings() is None:
+            raise RuntimeError("المتجهات الدلالية غير متاحة: خلفية النموذج لا تدعمها")
+        return self.embedder(list(texts))
+
+    def index_embeddings(self, items):
+        """حساب متجهات العناصر الجديدة في دفعة واحدة وإضافتها إلى الفهرس الدلالي"""
+        index = self.embeddings()
+        if index is None:
+            return 0
+        items = [item for item in items if item['hash'] not in index]
+        if not items:
+            return 0
+        try:
+            vectors = self.embedder([item['text'] for item in items])
+            return index.add_many([item['hash'] for item in items], vectors)
+        except Exception as e:
+            print(f"خطأ في حساب متجهات المعرفة: {e}")
+            record_error('embedding')
+            return 0
+
+    def backfill_embeddings(self, batch_size=64, should_continue=None):
+        """حساب متجهات المعرفة المحفوظة قبل وجود الفهرس ثم تجهيز قوائم IVF إن لزم"""
+        index = self.embeddings()
+        if index is None:
+            return 0
+        missing = [item for digest, item in list(self.items_by_hash.items())
+                   if digest not in index]
+        added = 0
+        for start in range(0, len(missing), batch_size):
+            if should_continue is not None and not should_continue():
+                return added
+            added += self.index_embeddings(missing[start:start + batch_size])
+        # بناء القوائم هنا بدل أول بحث في خيط المحادثة
+        if len(index) >= index.ivf_threshold:
+            index.build_ivf()
+        return added
+
+    @timed('learning_internet_seconds', 'زمن دورة التعلم من الإنترنت')
     def learn_from_internet(self, query, category):
         """التعلم من الإنترنت"""
         try:
-            # البحث في ويكيبيديا
-            wiki_result = self.search_wikipedia(query)
-            if wiki_result:
-                self.analyze_and_learn(wiki_result['content'], category)
-            
-            # البحث في الويب
+            # البحث في ويكيبيديا والويب في نفس الوقت
+            wiki_future = self.fetcher.submit(self.search_wikipedia, query)
             web_results = self.search_web(query)
-            for result in web_results:
-                self.analyze_and_learn(result['content'], category)
+            wiki_result = wiki_future.result()
+            
+            # تصنيف كل النتائج في دفعة واحدة
+            texts = [result['content'] for result in web_results]
+            if wiki_result:
+                texts.insert(0, wiki_result['content'])
+            self.analyze_and_learn_batch(texts, category)
             
             return True
         except Exception as e:
             print(f"خطأ في التعلم من الإنترنت: {e}")
+            record_error('learn_from_internet')
             return False
 
     def start_continuous_learning(self):
         """بدء عملية التعلم المستمر في الخلفية"""
         def learning_loop():
-            self.is_learning = True
+            self.backfill_embeddings(should_continue=lambda: self.is_learning)
             while self.is_learning:
                 try:
                     # قائمة المواضيع للتعلم
@@ -146,19 +284,28 @@ class AILearningSystem:
                         if not self.is_learning:
                             break
                         self.learn_from_internet(topic, topic)
-                        time.sleep(300)  # انتظار 5 دقائق بين كل موضوع
+                        self._stop_event.wait(300)  # انتظار 5 دقائق بين كل موضوع
                         
                 except Exception as e:
                     print(f"خطأ في حلقة التعلم: {e}")
-                    time.sleep(60)
+                    record_error('learning_loop')
+                    self._stop_event.wait(60)
         
         # بدء عملية التعلم في خيط منفصل
-        learning_thread = Thread(target=learning_loop, daemon=True)
-        learning_thread.start()
+        self.is_learning = True
+        self._stop_event.clear()
+        self.learning_thread = Thread(target=learning_loop, name='learning', daemon=True)
+        self.learning_thread.start()
 
-    def stop_learning(self):
-        """إيقاف عملية التعلم"""
+    def stop_learning(self, timeout=None):
+        """إيقاف عملية التعلم؛ مع timeout ينتظر انتهاء الخطوة الجارية (مثلاً قبل الحفظ والخروج)"""
         self.is_learning = False
+        self._stop_event.set()
+        thread = self.learning_thread
+        if timeout is not None and thread is not None and thread.is_alive():
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
 
     def get_knowledge(self, category=None):
         """استرجاع المعرفة المخزنة"""
@@ -166,33 +313,62 @@ class AILearningSystem:
             return self.knowledge_base.get(category, [])
         return self.knowledge_base
 
+    def cache_stats(self):
+        """إحصائيات الذاكرة المؤقتة للجلب والمحتوى المكرر الذي تم تجاهله"""
+        stats = self.fetcher.cache.stats()
+        stats['duplicates_skipped'] = self.duplicates_skipped
+        stats['known_items'] = len(self.content_hashes)
+        return stats
+
+    @timed('knowledge_apply_seconds', 'زمن البحث عن أفضل معرفة لموقف')
     def apply_knowledge(self, situation):
         """تطبيق المعرفة المكتسبة على موقف معين"""
         try:
-            relevant_knowledge = []
-            
-            # البحث عن المعرفة ذات الصلة
-            for category, items in self.knowledge_base.items():
-                for item in items:
-                    if any(word in situation.lower() for word in item['text'].lower().split()):
-                        relevant_knowledge.append(item)
-            
-            if not relevant_knowledge:
-                return None
-            
-            # ترتيب المعرفة حسب الثقة
-            relevant_knowledge.sort(key=lambda x: x['confidence'], reverse=True)
-            
-            return relevant_knowledge[0]
-            
+            # العنصر الأعلى ثقة الذي تظهر إحدى كلماته في الموقف
+            return self.knowledge_index.best_match(situation)
         except Exception as e:
             print(f"خطأ في تطبيق المعرفة: {e}")
+            record_error('apply_knowledge')
             return None
 
+    def search_knowledge(self, query, limit=1):
+        """البحث في قاعدة المعرفة عن النصوص التي تحتوي الاستعلام"""
+        try:
+            return self.knowledge_index.search(query, limit)
+        except Exception as e:
+            print(f"خطأ في البحث في المعرفة: {e}")
+            record_error('search_knowledge')
+            return []
+
+    def semantic_match(self, situation, k=5, min_relative=None):
+        """أقرب عناصر المعرفة دلالياً للموقف: [(العنصر، التشابه)] مرتبة تنازلياً
+
+        مع min_relative يُستبعد كل عنصر لا يتجاوز تشابهه متوسط تشابه الموقف مع كل المعرفة
+        بنسبة min_relative من المسافة الباقية إلى 1.
+        """
+        index = self.embeddings()
+        if index is None or not len(index):
+            return []
+        try:
+            query = self.embedder([situation])
+            hits = index.search(query, k)[0]
+            if min_relative is not None:
+                base = float(index.mean_similarity(query)[0])
+                floor = base + min_relative * (1.0 - base)
+                hits = [(key, score) for key, score in hits if score >= floor]
+        except Exception as e:
+            print(f"خطأ في البحث الدلالي: {e}")
+            record_error('semantic_search')
+            return []
+        return [(self.items_by_hash[key], score) for key, score in hits if key in self.items_by_hash]
+
+    @timed('strategy_seconds', 'زمن توليد استراتيجية')
     def generate_strategy(self, situation):
         """توليد استراتيجية بناءً على المعرفة المكتسبة"""
         try:
-            knowledge = self.apply_knowledge(situation)
+            # الأقرب في المعنى أولاً، ومطابقة الكلمات إذا لم يكن الفهرس جاهزاً
+            matches = self.semantic_match(situation, min_relative=self.MIN_RELATIVE_SIMILARITY)
+            knowledge = matches[0][0] if matches else self.apply_knowledge(situation)
             if not knowledge:
                 return "لم أجد معرفة كافية لهذا الموقف"
             
@@ -203,4 +379,5 @@ class AILearningSystem:
             
         except Exception as e:
             print(f"خطأ في توليد الاستراتيجية: {e}")
+            record_error('strategy')
             return "حدث خطأ في توليد الاستراتيجية"
@@ -0,0 +1,433 @@
+import atexit
+import itertools
+import multiprocessing
+import threading
+import time
+import weakref
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# المصفوفات الأكبر من هذا تُنقل عبر ذاكرة مشتركة بدل نسخها في الأنبوب
+SHARED_ARRAY_BYTES = 64 * 1024
+# رسائل التحكم (أرقام الطلبات العادية تبدأ من 1)
+READY = 0
+SHUTDOWN = '__shutdown__'
+RELEASE = '__release__'
+
+SharedArray = namedtuple('SharedArray', 'name shape dtype')
+
+
+def share_array(array):
+    """نسخ المصفوفة مرة واحدة إلى ذاكرة مشتركة: (واصف صغير يُرسل بدلها، الكتلة)
+
+    الكتلة تبقى مفتوحة عند المرسل حتى يؤكد المستقبل ربطها (release_array)،
+    لأن ويندوز يحذف الربط المسمى عند إغلاق آخر مقبض له.
+    """
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    view = np.ndarray(array.shape, array.dtype, buffer=block.buf)
+    view[...] = array
+    del view
+    return SharedArray(block.name, array.shape, array.dtype.str), block
+
+
+def release_array(block):
+    """إغلاق كتلة المرسل وحذف اسمها بعد أن ربطها المستقبل (أو تخلى عنها)"""
+    block.close()
+    block.unlink()
+
+
+# كتل مربوطة تحررت مصفوفاتها؛ المصفوفة تمسك الذاكرة حتى نهاية تحريرها فيُؤجل الإغلاق
+_released_blocks = []
+_released_lock = threading.Lock()
+
+
+def close_released_blocks():
+    """إغلاق كتل المصفوفات المربوطة التي لم تعد مستخدمة؛ ترجع عدد الكتل المغلقة"""
+    with _released_lock:
+        blocks = _released_blocks[:]
+        _released_blocks.clear()
+    closed = 0
+    for block in blocks:
+        try:
+            block.close()
+            closed += 1
+        except BufferError:
+            # ما زالت هناك مصفوفة تستخدم الذاكرة
+            with _released_lock:
+                _released_blocks.append(block)
+    return closed
+
+
+def attach_array(descriptor):
+    """ربط المصفوفة المشتركة دون نسخ؛ كائن SharedMemory يبقى حياً ما دامت المصفوفة موجودة"""
+    close_released_blocks()
+    block = shared_memory.SharedMemory(name=descriptor.name)
+    dtype = np.dtype(descriptor.dtype)
+    count = int(np.prod(descriptor.shape))
+    # كل المناظير المشتقة تشير إلى flat، فتحريره يعني أن الذاكرة لم تعد مستخدمة
+    flat = np.frombuffer(block.buf, dtype=dtype, count=count)
+    weakref.finalize(flat, _released_blocks.append, block)
+    return flat.reshape(descriptor.shape)
+
+
+def encode_result(value, blocks):
+    """المصفوفات الكبيرة تُستبدل بواصف، وتُحفظ كتلها في blocks حتى تأكيد الربط"""
+    if isinstance(value, np.ndarray) and value.nbytes >= SHARED_ARRAY_BYTES:
+        descriptor, block = share_array(value)
+        blocks[descriptor.name] = block
+        return descriptor
+    return value
+
+
+class SharedStatus:
+    """حالة عملية الذكاء الاصطناعي في ذاكرة مشتركة يقرؤها خيط الرسم دون RPC
+
+    الخانة الأولى عداد تسلسل: فردي أثناء الكتابة، فيعيد القارئ المحاولة.
+    """
+
+    FIELDS = ('heartbeat', 'ready', 'learning', 'known_items', 'duplicates_skipped',
+              'in_flight', 'completed', 'aggressive', 'cooperative', 'resourceful', 'curiosity')
+
+    def __init__(self, name=None):
+        size = 8 * (len(self.FIELDS) + 1)
+        if name is None:
+            self.block = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.block = shared_memory.SharedMemory(name=name)
+        self.values = np.ndarray(len(self.FIELDS) + 1, dtype=np.float64, buffer=self.block.buf)
+        if name is None:
+            self.values[:] = 0
+
+    @property
+    def name(self):
+        return self.block.name
+
+    def write(self, **values):
+        self.values[0] += 1
+        for key, value in values.items():
+            self.values[1 + self.FIELDS.index(key)] = value
+        self.values[0] += 1
+
+    def read(self):
+        for _ in range(100):
+            before = self.values[0]
+            if before % 2 == 0:
+                snapshot = self.values[1:].copy()
+                if self.values[0] == before:
+                    return dict(zip(self.FIELDS, snapshot.tolist()))
+            time.sleep(0)
+        return dict(zip(self.FIELDS, self.values[1:].tolist()))
+
+    def close(self, unlink=False):
+        del self.values
+        self.block.close()
+        if unlink:
+            self.block.unlink()
+
+
+def build_chat_system():
+    """نظام المحادثة والتعلم الكامل مع تحميل النموذج (يعمل داخل العملية المنفصلة)"""
+    from ai_chat import AIChatSystem
+    chat_system = AIChatSystem()
+    chat_system.nlp.model
+    return chat_system
+
+
+class AIService:
+    """الكائن الذي يعيش في العملية المنفصلة؛ دواله العامة متاحة عبر RPC"""
+
+    def __init__(self, chat_system):
+        self.chat_system = chat_system
+        self.learning_system = chat_system.learning_system
+
+    def get_response(self, text):
+        return self.chat_system.get_response(text)
+
+    def reply(self, text):
+        return self.chat_system.reply(text)
+
+    def generate_strategy(self, situation):
+        return self.learning_system.generate_strategy(situation)
+
+    def search_knowledge(self, query, limit=1):
+        return self.learning_system.search_knowledge(query, limit)
+
+    def embed(self, texts):
+        return self.learning_system.embed(texts)
+
+    def start_learning(self):
+        if not self.learning_system.is_learning:
+            self.learning_system.start_continuous_learning()
+
+    def stop_learning(self, timeout=None):
+        return self.learning_system.stop_learning(timeout)
+
+    def stats(self):
+        return self.learning_system.cache_stats()
+
+    def shutdown(self, timeout=10.0):
+        """إيقاف التعلم وانتظار الخطوة الجارية ثم حفظ قاعدة المعرفة"""
+        self.learning_system.stop_learning(timeout)
+        self.learning_system.save_knowledge_base()
+
+
+def serve(conn, status_name, factory, workers):
+    """الحلقة الرئيسية للعملية المنفصلة: استقبال الطلبات وتنفيذها على مجموعة خيوط"""
+    status = SharedStatus(status_name)
+    try:
+        service = AIService(factory())
+    except Exception as e:
+        print(f"خطأ في تشغيل عملية الذكاء الاصطناعي: {e}")
+        conn.send((READY, False, repr(e)))
+        return
+    conn.send((READY, True, None))
+
+    send_lock = threading.Lock()
+    # العدادات والكتل المشتركة تُعدَّل من خيوط التنفيذ وحلقة الاستقبال معاً
+    lock = threading.Lock()
+    counters = {'in_flight': 0, 'completed': 0}
+    blocks = {}
+    stopped = threading.Event()
+
+    def run(call_id, method, args, kwargs):
+        try:
+            if method.startswith('_'):
+                raise AttributeError(method)
+            value = getattr(service, method)(*args, **kwargs)
+            with lock:
+                value = encode_result(value, blocks)
+            message = (call_id, True, value)
+        except Exception as e:
+            message = (call_id, False, f'{type(e).__name__}: {e}')
+        with lock:
+            counters['in_flight'] -= 1
+            counters['completed'] += 1
+        try:
+            with send_lock:
+                conn.send(message)
+        except (OSError, ValueError):
+            # العملية الرئيسية أغلقت الأنبوب
+            pass
+
+    def report():
+        while not stopped.wait(0.25):
+            learning = service.learning_system
+            state = service.chat_system.current_state
+            with lock:
+                in_flight, completed = counters['in_flight'], counters['completed']
+            status.write(heartbeat=time.time(), ready=1, learning=int(learning.is_learning),
+                         known_items=len(learning.content_hashes),
+                         duplicates_skipped=learning.duplicates_skipped,
+                         in_flight=in_flight, completed=completed,
+                         aggressive=state['aggressive'], cooperative=state['cooperative'],
+                         resourceful=state['resourceful'], curiosity=state['learning'])
+
+    threading.Thread(target=report, name='ai-status', daemon=True).start()
+    executor = ThreadPoolExecutor(workers, thread_name_prefix='ai-rpc')
+    save = True
+    while True:
+        try:
+            call_id, method, args, kwargs = conn.recv()
+        except (EOFError, OSError):
+            # العملية الرئيسية انتهت دون إيقاف منظم
+            break
+        if method == SHUTDOWN:
+            save = args[0] if args else True
+            break
+        if method == RELEASE:
+            with lock:
+                block = blocks.pop(args[0], None)
+            if block is not None:
+                release_array(block)
+            continue
+        with lock:
+            counters['in_flight'] += 1
+        executor.submit(run, call_id, method, args, kwargs)
+
+    stopped.set()
+    executor.shutdown(wait=True)
+    # نتائج لم يؤكد ربطها قبل الإيقاف
+    for block in blocks.values():
+        release_array(block)
+    if save:
+        service.shutdown()
+    else:
+        service.stop_learning()
+    status.write(ready=0, learning=0)
+    status.close()
+    conn.close()
+
+
+class AIProcess:
+    """تشغيل نظام التعلم والمصنف في عملية منفصلة حتى لا ينافسا حلقة الرسم على GIL
+
+    الطلبات تُرسل عبر أنبوب وتعود كـ Future، والمصفوفات الكبيرة تُنقل عبر ذاكرة
+    مشتركة دون نسخ. عدد الطلبات المعلقة محدود بـ max_in_flight (ضغط عكسي).
+    """
+
+    def __init__(self, factory=build_chat_system, max_in_flight=8, workers=2, submit_timeout=5.0):
+        self.factory = factory
+        self.workers = workers
+        self.submit_timeout = submit_timeout
+        self.ready = Future()
+
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._disconnected = False
+        self.process = None
+        self.conn = None
+        self.status_block = None
+        self.calls = 0
+        self.rejected = 0
+        self.failed = 0
+
+    def start(self):
+        # spawn بدل fork: العملية الجديدة لا ترث حالة Panda3D أو خيوط اللعبة
+        context = multiprocessing.get_context('spawn')
+        self.conn, child_conn = context.Pipe()
+        self.status_block = SharedStatus()
+        self.process = context.Process(target=serve, name='ai-worker', daemon=True,
+                                       args=(child_conn, self.status_block.name, self.factory, self.workers))
+        self.process.start()
+        child_conn.close()
+        threading.Thread(target=self._read, name='ai-replies', daemon=True).start()
+        atexit.register(self.close)
+        return self
+
+    def wait_ready(self, timeout=None):
+        self.ready.result(timeout)
+        return self
+
+    def _read(self):
+        while True:
+            try:
+                call_id, ok, value = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            if call_id == READY:
+                if ok:
+                    self.ready.set_result(True)
+                else:
+                    self.ready.set_exception(RuntimeError(value))
+                continue
+            with self._lock:
+                future = self._pending.pop(call_id, None)
+            self._slots.release()
+            try:
+                if ok and isinstance(value, SharedArray):
+                    descriptor = value
+                    try:
+                        value = attach_array(descriptor)
+                    finally:
+                        # الكتلة تبقى مفتوحة في العملية المنفصلة حتى هذا التأكيد
+                        self._send((None, RELEASE, (descriptor.name,), {}))
+                if future is None:
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    self.failed += 1
+                    future.set_exception(RuntimeError(value))
+            except Exception as e:
+                # خطأ في رسالة واحدة (مثل كتلة لم تعد موجودة) يفشل طلبها فقط ولا يوقف خيط الاستقبال
+                print(f"خطأ في استلام رد عملية الذكاء الاصطناعي: {e}")
+                self.failed += 1
+                if future is not None and not future.done():
+                    future.set_exception(e)
+
+        # انتهت العملية: فشل كل الطلبات المعلقة وإعادة أماكنها في الطابور
+        error = ConnectionError('توقفت عملية الذكاء الاصطناعي')
+        if not self.ready.done():
+            self.ready.set_exception(error)
+        with self._lock:
+            self._disconnected = True
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            self._slots.release()
+            future.set_exception(error)
+
+    def _send(self, message):
+        try:
+            with self._send_lock:
+                self.conn.send(message)
+        except (OSError, ValueError):
+            pass
+
+    def submit(self, method, *args, **kwargs):
+        """إرسال طلب وإرجاع Future؛ ينتظر submit_timeout ثانية إذا امتلأ الطابور"""
+        if self._disconnected or not self.alive:
+            raise ConnectionError('عملية الذكاء الاصطناعي متوقفة')
+        if not self._slots.acquire(timeout=self.submit_timeout):
+            self.rejected += 1
+            raise TimeoutError('عملية الذكاء الاصطناعي مشغولة')
+        future = Future()
+        call_id = next(self._ids)
+        with self._lock:
+            if self._disconnected:
+                # توقفت العملية أثناء انتظار مكان في الطابور
+                self._slots.release()
+                raise ConnectionError('عملية الذكاء الاصطناعي متوقفة')
+            self._pending[call_id] = future
+        try:
+            with self._send_lock:
+                self.conn.send((call_id, method, args, kwargs))
+        except (OSError, ValueError) as e:
+            with self._lock:
+                self._pending.pop(call_id, None)
+            self._slots.release()
+            raise ConnectionError(f'تعذر الإرسال إلى عملية الذكاء الاصطناعي: {e}')
+        self.calls += 1
+        return future
+
+    def call(self, method, *args, timeout=None, **kwargs):
+        return self.submit(method, *args, **kwargs).result(timeout)
+
+    # نفس واجهة AIChatSystem المستخدمة في اللعبة
+    def get_response(self, text):
+        return self.call('get_response', text)
+
+    def stop_learning(self, timeout=None):
+        return self.call('stop_learning', timeout)
+
+    def status(self):
+        """آخر حالة نشرتها العملية (قراءة من الذاكرة المشتركة، دون انتظار)"""
+        if self.status_block is None:
+            return {}
+        return self.status_block.read()
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def stats(self):
+        stats = self.status()
+        stats.update({
+            'alive': self.alive,
+            'calls': self.calls,
+            'rejected': self.rejected,
+            'failed': self.failed,
+            'pending': len(self._pending)
+        })
+        return stats
+
+    def close(self, timeout=15.0, save=True):
+        """إيقاف منظم: إنهاء الطلبات الجارية وإيقاف التعلم وحفظ المعرفة ثم الخروج"""
+        if self.process is None:
+            return
+        self._send((None, SHUTDOWN, (save,), {}))
+        self.process.join(timeout)
+        if self.process.is_alive():
+            print("خطأ في إيقاف عملية الذكاء الاصطناعي: تجاوزت المهلة")
+            self.process.terminate()
+            self.process.join(1.0)
+        self.conn.close()
+        self.status_block.close(unlink=True)
+        self.process = None
+        atexit.unregister(self.close)
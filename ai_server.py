@@ -0,0 +1,161 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import argparse
+import json
+import time
+import uuid
+
+from chat_session import SessionManager
+from metrics import registry
+
+MAX_BODY = 16 * 1024
+
+
+class ChatRequestHandler(BaseHTTPRequestHandler):
+    """واجهة HTTP للمحادثة: POST /chat و GET /stats"""
+
+    protocol_version = 'HTTP/1.1'
+    # الترويسات والجسم يُكتبان منفصلين، فتأخير Nagle يضيف ~40ms لكل رد مع keep-alive
+    disable_nagle_algorithm = True
+
+    @property
+    def sessions(self):
+        return self.server.sessions
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', self.server.allow_origin)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header('Access-Control-Allow-Origin', self.server.allow_origin)
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, DELETE, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path == '/stats':
+            stats = self.sessions.stats()
+            stats['cpu_seconds'] = time.process_time()
+            stats['router'] = self.sessions.chat_system.router.stats()
+            self.send_json(200, stats)
+        elif self.path == '/metrics':
+            body = registry.prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != '/chat':
+            self.send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            if length < 0:
+                # rfile.read(-1) ينتظر إغلاق الاتصال
+                self.close_connection = True
+                self.send_json(400, {'error': 'طول الطلب غير صالح'})
+                return
+            if length > MAX_BODY:
+                self.close_connection = True
+                self.send_json(413, {'error': 'الرسالة طويلة جداً'})
+                return
+            data = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(data, dict):
+                self.send_json(400, {'error': 'يجب أن يكون الطلب كائن JSON'})
+                return
+            text = str(data.get('text', '')).strip()
+            session_id = data.get('session') or uuid.uuid4().hex
+            if not isinstance(session_id, str):
+                self.send_json(400, {'error': 'معرف الجلسة يجب أن يكون نصاً'})
+                return
+            if not text:
+                self.send_json(400, {'error': 'النص فارغ'})
+                return
+            response, command, confidence = self.sessions.respond(session_id, text)
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            print(f"خطأ في معالجة طلب المحادثة: {e}")
+            registry.counter('errors_total', 'الأخطاء حسب المكان', where='chat_server').inc()
+            self.send_json(500, {'error': 'خطأ داخلي'})
+            return
+        self.send_json(200, {
+            'session': session_id,
+            'reply': response,
+            'command': command,
+            'confidence': confidence
+        })
+
+    def do_DELETE(self):
+        prefix = '/chat/'
+        if not self.path.startswith(prefix):
+            self.send_json(404, {'error': 'not found'})
+            return
+        self.sessions.remove(self.path[len(prefix):])
+        self.send_json(200, {'ok': True})
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class ChatServer(ThreadingHTTPServer):
+    """خادم محادثة متعدد الجلسات؛ كل طلب في خيط والنموذج مشترك بين الجميع"""
+
+    daemon_threads = True
+
+    def __init__(self, address, sessions, allow_origin='*', verbose=False):
+        super().__init__(address, ChatRequestHandler)
+        self.sessions = sessions
+        self.allow_origin = allow_origin
+        self.verbose = verbose
+
+
+def run_server(host='127.0.0.1', port=8001, max_sessions=1000, idle_timeout=1800.0,
+               history_dir=None, allow_origin='*'):
+    # استيراد متأخر لأن نظام المحادثة يحمّل المكتبات الثقيلة
+    from ai_chat import AIChatSystem
+
+    chat_system = AIChatSystem()
+    sessions = SessionManager(chat_system, max_sessions, idle_timeout, history_dir=history_dir)
+    registry.register_collector('sessions', sessions.stats)
+    httpd = ChatServer((host, port), sessions, allow_origin)
+
+    print(f'خادم المحادثة يعمل على http://{host}:{port}/chat ...')
+    print('اضغط Ctrl+C لإيقاف الخادم')
+
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print('\nتم إيقاف الخادم')
+    finally:
+        httpd.server_close()
+        sessions.close()
+        chat_system.learning_system.stop_learning()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='خادم محادثة الذكاء الاصطناعي لعدة لاعبين')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--max-sessions', type=int, default=1000)
+    parser.add_argument('--idle-timeout', type=float, default=1800.0, help='ثواني الخمول قبل طرد الجلسة')
+    parser.add_argument('--history-dir', default=None, help='مجلد أرشفة سجلات المحادثة')
+    parser.add_argument('--allow-origin', default='*')
+    args = parser.parse_args()
+    run_server(args.host, args.port, args.max_sessions, args.idle_timeout, args.history_dir, args.allow_origin)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+import hashlib
+import re
+
+# التشكيل والتطويل
+_DIACRITICS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+
+# توحيد أشكال الألف والياء والتاء المربوطة
+_FOLDING = str.maketrans({
+    'أ': 'ا',
+    'إ': 'ا',
+    'آ': 'ا',
+    'ٱ': 'ا',
+    'ى': 'ي',
+    'ة': 'ه'
+})
+
+# السوابق الشائعة مرتبة من الأطول إلى الأقصر
+PREFIXES = ('وال', 'بال', 'فال', 'كال', 'لل', 'ال', 'و', 'ف', 'ب', 'ل', 'ك')
+
+
+def normalize_arabic(text):
+    """توحيد النص العربي: حذف التشكيل وتوحيد الحروف وتحويل اللاتيني لحروف صغيرة"""
+    return _DIACRITICS.sub('', text).translate(_FOLDING).lower()
+
+
+def tokenize(text):
+    """تقسيم النص الموحد إلى كلمات"""
+    return normalize_arabic(text).split()
+
+
+def strip_prefixes(token):
+    """حذف سابقة واحدة (ال، و، ب...) مع إبقاء جذر من حرفين على الأقل"""
+    for prefix in PREFIXES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+            return token[len(prefix):]
+    return token
+
+
+def content_hash(text):
+    """بصمة للنص بعد التوحيد لاكتشاف المحتوى المكرر"""
+    return hashlib.sha1(' '.join(tokenize(text)).encode('utf-8')).hexdigest()
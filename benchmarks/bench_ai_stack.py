@@ -0,0 +1,165 @@
+"""مقاييس pytest-benchmark للمسارات الساخنة في نظام الذكاء الاصطناعي، بلا نموذج ولا شبكة
+
+التشغيل وحفظ خط الأساس (في benchmarks/baselines/<الجهاز>/):
+    pytest benchmarks --benchmark-save=baseline
+المقارنة بآخر خط أساس والفشل عند تراجع الوسيط أكثر من 25%:
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=median:25%
+"""
+import itertools
+import os
+
+import pytest
+
+from conftest import StubClassifier, StubEmbedder, stub_fetcher, synthetic_texts
+
+ENEMY_COUNTS = (10, 100, 1000)
+
+
+def bench_apply_knowledge(benchmark, learning_system, situations, kb_size):
+    queries = itertools.cycle(situations)
+    benchmark(lambda: learning_system.apply_knowledge(next(queries)))
+
+
+def bench_search_knowledge(benchmark, learning_system, situations, kb_size):
+    queries = itertools.cycle(situations)
+    benchmark(lambda: learning_system.search_knowledge(next(queries)))
+
+
+def bench_chat_search_reply(benchmark, learning_system, situations, kb_size):
+    """مسار 'ابحث' في المحادثة كما يستدعيه get_response (دون تشكيل النص للعرض)"""
+    from ai_chat import AIChatSystem
+
+    chat = AIChatSystem(classifier=learning_system.arabic_classifier, learning_system=learning_system)
+    queries = itertools.cycle(situations)
+    benchmark(lambda: chat.reply('ابحث ' + next(queries)))
+
+
+def bench_chat_get_response(benchmark, learning_system, situations, kb_size):
+    pytest.importorskip('arabic_reshaper')
+    pytest.importorskip('bidi.algorithm')
+    from ai_chat import AIChatSystem
+
+    chat = AIChatSystem(classifier=learning_system.arabic_classifier, learning_system=learning_system)
+    queries = itertools.cycle(situations)
+    benchmark(lambda: chat.get_response('ابحث ' + next(queries)))
+
+
+@pytest.fixture(scope='session')
+def semantic_system(knowledge_base_dir):
+    """نظام تعلم بفهرس دلالي محسوب مسبقاً بمتجهات صناعية"""
+    pytest.importorskip('numpy')
+    from ai_learning import AILearningSystem
+    from knowledge_store import KnowledgeStore
+
+    fetcher = stub_fetcher()
+    system = AILearningSystem(classifier=StubClassifier(),
+                              store=KnowledgeStore(str(knowledge_base_dir / 'knowledge_base')),
+                              fetcher=fetcher, start_learning=False, embedder=StubEmbedder())
+    system.backfill_embeddings(batch_size=1024)
+    yield system
+    system.embedding_index.close()
+    system.store.close()
+    fetcher.shutdown()
+
+
+def bench_generate_strategy_keywords(benchmark, learning_system, situations, kb_size):
+    queries = itertools.cycle(situations)
+    benchmark(lambda: learning_system.generate_strategy(next(queries)))
+
+
+def bench_generate_strategy_semantic(benchmark, semantic_system, situations, kb_size):
+    """الاستراتيجية عبر الفهرس الدلالي (بحث كامل أو IVF حسب الحجم)"""
+    queries = itertools.cycle(situations)
+    benchmark(lambda: semantic_system.generate_strategy(next(queries)))
+
+
+def bench_save_knowledge_base(benchmark, learning_system, kb_size):
+    rounds = 10 if kb_size <= 10000 else 3
+    benchmark.pedantic(learning_system.save_knowledge_base, rounds=rounds, warmup_rounds=1)
+
+
+def bench_load_knowledge_base(benchmark, learning_system, kb_size):
+    """قراءة اللقطة وإعادة بناء الفهرس"""
+    rounds = 10 if kb_size <= 10000 else 3
+    benchmark.pedantic(learning_system.load_knowledge_base, rounds=rounds, warmup_rounds=1)
+    assert len(learning_system.knowledge_index) == kb_size
+
+
+def bench_learn_from_internet(benchmark, tmp_path, monkeypatch):
+    """دورة تعلم كاملة (بحث، جلب، تحليل HTML، تصنيف، حفظ) مع نقل وهمي"""
+    from ai_learning import AILearningSystem
+    from knowledge_store import KnowledgeStore
+
+    fetcher = stub_fetcher()
+    system = AILearningSystem(classifier=StubClassifier(), store=KnowledgeStore(str(tmp_path / 'kb')),
+                              fetcher=fetcher, start_learning=False)
+    pages = itertools.count()
+    monkeypatch.setattr(system, '_fetch_wikipedia', lambda query, lang: {
+        'title': query, 'content': synthetic_texts(1, seed=2, start=next(pages))[0], 'url': ''
+    })
+    topics = itertools.count()
+    benchmark(lambda: system.learn_from_internet(f'موضوع {next(topics)}', 'bench'))
+    fetcher.shutdown()
+    system.store.close()
+
+
+@pytest.fixture(scope='module')
+def ursina_app():
+    pytest.importorskip('ursina')
+    from ursina import Ursina
+    return Ursina(window_type='offscreen')
+
+
+@pytest.mark.parametrize('count', ENEMY_COUNTS)
+def bench_enemy_tick(benchmark, ursina_app, count):
+    """تحديث مجمّع لكل الأعداء في إطار واحد (update_enemies)"""
+    from ursina import Entity
+    from ai_enemy import AIEnemy, update_enemies
+    from q_engine import QLearningEngine
+    from spatial_hash import SpatialHash
+
+    grid = SpatialHash(cell_size=5)
+    engine = QLearningEngine(shared=True, seed=0)
+    enemies = [AIEnemy(engine=engine, grid=grid) for _ in range(count)]
+    player = Entity(position=(0, 1, 0))
+    benchmark(update_enemies, enemies, player, grid)
+
+
+@pytest.mark.parametrize('count', ENEMY_COUNTS)
+def bench_headless_enemy_tick(benchmark, count):
+    """نفس منطق الأعداء في المحاكاة بلا واجهة (يعمل دون Ursina)"""
+    pytest.importorskip('numpy')
+    from headless_sim import EnemySimulation
+
+    simulation = EnemySimulation(n_envs=1, n_enemies=count, seed=0)
+    benchmark(simulation.step)
+
+
+@pytest.mark.parametrize('fps', (60, 144, 240))
+def bench_scheduled_ai_second(benchmark, fps):
+    """ثانية لعب بمعدل fps مع ذكاء اصطناعي بـ 10 نبضات؛ الزمن يجب ألا يكبر مع fps"""
+    pytest.importorskip('numpy')
+    from headless_sim import EnemySimulation
+    from q_engine import QLearningEngine
+    from tick_scheduler import TickScheduler
+
+    # ثماني مجموعات أعداء بمحرك مشترك؛ كل نبضة تخطو كل مجموعة مرة واحدة وتتخلى بينها
+    engine = QLearningEngine(shared=True, seed=0)
+    groups = [EnemySimulation(n_envs=1, n_enemies=125, dt=0.1, engine=engine, seed=i) for i in range(8)]
+
+    def ai_tick(dt):
+        for group in groups:
+            group.step()
+            yield
+
+    def second():
+        scheduler = TickScheduler(budget=0.002)
+        scheduler.add('ai', 10, ai_tick)
+        for _ in range(fps):
+            scheduler.update(1 / fps)
+
+    benchmark.pedantic(second, rounds=5, warmup_rounds=1)
+
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main([os.path.dirname(os.path.abspath(__file__))]))
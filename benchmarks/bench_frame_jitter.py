@@ -0,0 +1,146 @@
+"""تذبذب زمن الإطار أثناء عمل التعلم من الإنترنت: في نفس العملية أو في عملية منفصلة
+
+حلقة إطارات بمعدل 60 تنفذ عمل المحاكاة في كل إطار، بينما يعمل نظام تعلم بمصنف
+ونقل وهميين بأقصى سرعة (تحليل HTML وتصنيف وفهرسة) ويستقبل رسائل محادثة دورية.
+
+    python benchmarks/bench_frame_jitter.py --mode none
+    python benchmarks/bench_frame_jitter.py --mode thread
+    python benchmarks/bench_frame_jitter.py --mode process
+"""
+import argparse
+import itertools
+import os
+import statistics
+import sys
+import tempfile
+import time
+from threading import Thread
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from conftest import ROOT, StubClassifier, stub_fetcher, synthetic_knowledge_base, synthetic_texts  # noqa: E402
+
+MESSAGES = ('ابحث البقاء', 'هجوم', 'ابحث الصيد', 'دفاع', 'ابحث الطوف')
+
+
+def busy_chat_system(kb_size=10000):
+    """نظام محادثة بقاعدة معرفة صناعية وخيط تعلم لا يتوقف (بلا نموذج ولا شبكة)"""
+    from ai_chat import AIChatSystem
+    from ai_learning import AILearningSystem
+    from knowledge_store import KnowledgeStore
+
+    store = KnowledgeStore(os.path.join(tempfile.mkdtemp(prefix='jitter'), 'knowledge_base'))
+    store.compact(synthetic_knowledge_base(kb_size))
+    classifier = StubClassifier()
+    system = AILearningSystem(classifier=classifier, store=store, fetcher=stub_fetcher(), start_learning=False)
+    pages = itertools.count(kb_size)
+    system._fetch_wikipedia = lambda query, lang: {
+        'title': query, 'content': synthetic_texts(1, seed=2, start=next(pages))[0], 'url': ''
+    }
+
+    def hammer():
+        for topic in itertools.count():
+            if not system.is_learning:
+                break
+            system.learn_from_internet(f'موضوع {topic}', 'bench')
+
+    # نفس علم الإيقاف الذي يستخدمه stop_learning
+    system.is_learning = True
+    system.learning_thread = Thread(target=hammer, name='learning', daemon=True)
+    system.learning_thread.start()
+    return AIChatSystem(classifier=classifier, learning_system=system)
+
+
+def run(mode, seconds, fps, enemies):
+    from headless_sim import EnemySimulation
+
+    simulation = EnemySimulation(n_envs=1, n_enemies=enemies, seed=0)
+    worker = ai_process = None
+    if mode == 'thread':
+        from chat_worker import ChatWorker
+        chat_system = busy_chat_system()
+        worker = ChatWorker(chat_system.reply)
+    elif mode == 'process':
+        from ai_process import AIProcess
+        # submit_timeout=0: الطلب يُرفض فوراً بدل إيقاف الإطار إذا امتلأ الطابور
+        ai_process = AIProcess(factory=busy_chat_system, submit_timeout=0).start().wait_ready(60)
+
+    messages = itertools.cycle(MESSAGES)
+    step = 1.0 / fps
+    work, intervals = [], []
+    missed = 0
+    frames = int(seconds * fps)
+    last = deadline = time.perf_counter()
+    for frame in range(frames):
+        started = time.perf_counter()
+        intervals.append(started - last)
+        last = started
+        simulation.step()
+        if frame % fps == 0:
+            if worker is not None:
+                worker.submit(next(messages))
+                worker.poll()
+            elif ai_process is not None:
+                try:
+                    ai_process.submit('reply', next(messages))
+                except TimeoutError:
+                    pass
+        elapsed = time.perf_counter() - started
+        work.append(elapsed)
+        deadline += step
+        remaining = deadline - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+        else:
+            missed += 1
+            deadline = time.perf_counter()
+
+    extra = {}
+    if worker is not None:
+        chat_system.learning_system.stop_learning(5.0)
+        extra['learned'] = len(chat_system.learning_system.content_hashes)
+    if ai_process is not None:
+        extra['learned'] = int(ai_process.status()['known_items'])
+        extra['rejected'] = ai_process.rejected
+        ai_process.close(save=False)
+    return summarize(mode, work, intervals[1:], missed, extra)
+
+
+def summarize(mode, work, intervals, missed, extra):
+    work_ms = sorted(value * 1000 for value in work)
+
+    def percentile(p):
+        return work_ms[min(len(work_ms) - 1, int(p / 100 * len(work_ms)))]
+
+    result = {
+        'mode': mode,
+        'frames': len(work_ms),
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'max_ms': work_ms[-1],
+        'interval_stdev_ms': statistics.pstdev(intervals) * 1000,
+        'missed_frames': missed
+    }
+    result.update(extra)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='تذبذب زمن الإطار مع عامل الذكاء الاصطناعي وبدونه')
+    parser.add_argument('--mode', choices=('none', 'thread', 'process', 'all'), default='all')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--fps', type=int, default=60)
+    parser.add_argument('--enemies', type=int, default=500)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    modes = ('none', 'thread', 'process') if args.mode == 'all' else (args.mode,)
+    for mode in modes:
+        result = run(mode, args.seconds, args.fps, args.enemies)
+        print(' '.join(f'{key}={value:.2f}' if isinstance(value, float) else f'{key}={value}'
+                       for key, value in result.items()))
+
+
+if __name__ == '__main__':
+    main()
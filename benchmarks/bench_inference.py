@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORDS = ('البقاء الطوف البحر الصيد الأسماك الخشب المعدن العاصفة الرياح الموارد الجزيرة القارب '
+         'الماء الطعام النار الليل النهار الخطر العدو الدفاع الهجوم البناء الأدوات الشاطئ').split()
+
+
+def snippets(count, length, seed=0):
+    """نصوص عربية صناعية بطول المقاطع التي يرسلها نظام التعلم (500 أو 1000 حرف)"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        words = []
+        while sum(len(w) + 1 for w in words) < length:
+            words.append(rng.choice(WORDS))
+        texts.append(' '.join(words)[:length])
+    return texts
+
+
+def rss_mb():
+    # ru_maxrss بالكيلوبايت في لينكس
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def materialize(model, out_dir, seed=0):
+    """حفظ النموذج برأس تصنيف ثابت حتى تقيس كل الخلفيات نفس الأوزان
+
+    النموذج بدون رأس مدرب يحصل على رأس عشوائي عند كل تحميل، فيصبح الانحراف بين العمليات بلا معنى.
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    torch.manual_seed(seed)
+    AutoTokenizer.from_pretrained(model).save_pretrained(out_dir)
+    AutoModelForSequenceClassification.from_pretrained(model).save_pretrained(out_dir)
+    return out_dir
+
+
+def run_case(backend, model, count, batch_sizes, lengths):
+    from inference_backends import load_backend
+
+    base_rss = rss_mb()
+    started = time.perf_counter()
+    classifier = load_backend(model, backend)
+    load_s = time.perf_counter() - started
+    classifier(['إحماء'])
+
+    result = {'backend': backend, 'load_s': round(load_s, 2), 'latency': {}, 'predictions': {}}
+    for length in lengths:
+        texts = snippets(count, length)
+        for batch_size in batch_sizes:
+            started = time.perf_counter()
+            outputs = []
+            for i in range(0, len(texts), batch_size):
+                outputs.extend(classifier(texts[i:i + batch_size], truncation=True))
+            per_text_ms = (time.perf_counter() - started) * 1000 / len(texts)
+            result['latency'][f'{length}ch_b{batch_size}'] = round(per_text_ms, 2)
+        result['predictions'][str(length)] = outputs
+    result['model_rss_mb'] = round(rss_mb() - base_rss, 1)
+    return result
+
+
+def drift(baseline, candidate):
+    """نسبة تطابق التسميات وأكبر فرق في الثقة مقارنة بالنموذج الأصلي"""
+    agree, total, max_diff = 0, 0, 0.0
+    for length, expected in baseline['predictions'].items():
+        for a, b in zip(expected, candidate['predictions'].get(length, [])):
+            total += 1
+            if a['label'] == b['label']:
+                agree += 1
+                max_diff = max(max_diff, abs(a['score'] - b['score']))
+    return {'label_agreement': round(agree / total, 4) if total else None, 'max_score_diff': round(max_diff, 4)}
+
+
+def run_backends(backends, model, onnx_dir, args):
+    # كل خلفية في عملية منفصلة حتى تكون قياسات الذاكرة مستقلة
+    results = []
+    for backend in backends:
+        source = onnx_dir if backend == 'onnx' else model
+        process = subprocess.run(
+            [sys.executable, __file__, '--case', f'{backend}:{source}', '--count', str(args.count),
+             '--batch-sizes', args.batch_sizes, '--lengths', args.lengths],
+            capture_output=True, text=True
+        )
+        if process.returncode != 0:
+            error = process.stderr.strip().splitlines()[-1] if process.stderr.strip() else 'فشل'
+            print(f'{backend}: {error}')
+            continue
+        results.append(json.loads(process.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='مقارنة خلفيات الاستدلال: الزمن والذاكرة وانحراف الدقة')
+    parser.add_argument('--model', default=None, help='اسم النموذج أو مجلده')
+    parser.add_argument('--onnx-dir', default=None,
+                        help='مجلد ONNX مصدّر مسبقاً (الافتراضي تصدير النسخة المحفوظة نفسها)')
+    parser.add_argument('--backends', default='pipeline,int8,onnx')
+    parser.add_argument('--count', type=int, default=64)
+    parser.add_argument('--batch-sizes', default='1,16')
+    parser.add_argument('--lengths', default='500,1000')
+    parser.add_argument('--min-agreement', type=float, default=0.98,
+                        help='أقل نسبة تطابق مقبولة لتسمية النتيجة الأولى مع النموذج الأصلي (0..1)')
+    parser.add_argument('--seed', type=int, default=0, help='بذرة رأس التصنيف إذا لم يكن مدرباً')
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    batch_sizes = [int(b) for b in args.batch_sizes.split(',')]
+    lengths = [int(n) for n in args.lengths.split(',')]
+
+    if args.case:
+        backend, model = args.case.split(':', 1)
+        print(json.dumps(run_case(backend, model, args.count, batch_sizes, lengths), ensure_ascii=False))
+        return
+
+    from model_service import default_model_name
+    backends = args.backends.split(',')
+    with tempfile.TemporaryDirectory(prefix='bench_inference') as workdir:
+        model = materialize(args.model or default_model_name(), os.path.join(workdir, 'model'), args.seed)
+        onnx_dir = args.onnx_dir
+        if 'onnx' in backends and onnx_dir is None:
+            from inference_backends import export_onnx
+            onnx_dir = export_onnx(model, os.path.join(workdir, 'onnx'))
+        results = run_backends(backends, model, onnx_dir, args)
+
+    baseline = next((r for r in results if r['backend'] == 'pipeline'), None)
+    failed = False
+    for result in results:
+        report = {key: result[key] for key in ('backend', 'load_s', 'model_rss_mb', 'latency')}
+        if baseline and result is not baseline:
+            report['drift'] = drift(baseline, result)
+            if report['drift']['label_agreement'] is not None and report['drift']['label_agreement'] < args.min_agreement:
+                failed = True
+        print(json.dumps(report, ensure_ascii=False))
+    if failed:
+        print(f'انحراف الدقة أكبر من المسموح (تطابق أقل من {args.min_agreement})')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def run_case(mode, count, frames, window_type):
+    """تشغيل مشهد فيه count مورد وقياس الإطارات في الثانية والذاكرة"""
+    from ursina import Ursina, camera
+    from spatial_hash import SpatialHash
+    from entity_pool import EntityPool
+    from resource_field import ResourceField
+    from main_3d import Resource
+
+    app = Ursina(window_type=window_type)
+    camera.position = (0, 60, -60)
+    camera.look_at((0, 0, 0))
+    grid = SpatialHash(cell_size=5)
+
+    started = time.perf_counter()
+    if mode == 'instanced':
+        field = ResourceField(grid)
+        for i in range(count):
+            field.spawn('wood' if i % 2 == 0 else 'metal')
+    else:
+        pool = EntityPool(lambda: Resource(grid=grid))
+        for i in range(count):
+            pool.acquire().set_type('wood' if i % 2 == 0 else 'metal')
+    setup = time.perf_counter() - started
+
+    # إطارات إحماء ثم القياس
+    for _ in range(10):
+        app.step()
+    started = time.perf_counter()
+    for _ in range(frames):
+        app.step()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'mode': mode,
+        'count': count,
+        'setup_s': round(setup, 3),
+        'fps': round(frames / elapsed, 1),
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='قياس أداء الموارد: كيان لكل مورد مقابل شبكة مدمجة')
+    parser.add_argument('--counts', default='1000,10000')
+    parser.add_argument('--modes', default='entities,instanced')
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--window-type', default='onscreen', choices=['onscreen', 'offscreen'])
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        mode, count = args.case.split(':')
+        print(json.dumps(run_case(mode, int(count), args.frames, args.window_type)))
+        return
+
+    # كل حالة في عملية منفصلة حتى لا تتأثر قياسات الذاكرة ببعضها
+    print(f"{'mode':<12}{'count':>8}{'setup s':>10}{'fps':>10}{'rss MB':>10}")
+    for count in args.counts.split(','):
+        for mode in args.modes.split(','):
+            output = subprocess.run(
+                [sys.executable, __file__, '--case', f'{mode}:{count}',
+                 '--frames', str(args.frames), '--window-type', args.window_type],
+                capture_output=True, text=True, check=True
+            ).stdout.strip().splitlines()[-1]
+            result = json.loads(output)
+            print(f"{result['mode']:<12}{result['count']:>8}{result['setup_s']:>10}"
+                  f"{result['fps']:>10}{result['max_rss_mb']:>10}")
+
+
+if __name__ == '__main__':
+    main()
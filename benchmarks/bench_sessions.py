@@ -0,0 +1,143 @@
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MESSAGES = [
+    'هجوم على العدو',
+    'دفاع عن الطوف',
+    'جمع الخشب',
+    'بناء منزل',
+    'ابحث عن الصيد',
+    'استراتيجية للبقاء',
+    'مرحبا كيف حالك',
+    'ماذا تفعل الآن'
+]
+
+
+def stub_classifier(texts):
+    """بديل سريع للنموذج لقياس كلفة الخادم والجلسات وحدها"""
+    result = {'label': 'LABEL_0', 'score': 0.5}
+    if isinstance(texts, str):
+        return [result]
+    return [result for _ in texts]
+
+
+class StubTransport:
+    def get(self, url, timeout=5, max_bytes=None, headers=None):
+        return {'url': url, 'status': 200, 'headers': {}, 'text': ''}
+
+
+def serve(port, max_sessions, real_model, ready):
+    from ai_chat import AIChatSystem
+    from ai_learning import AILearningSystem
+    from ai_server import ChatServer
+    from chat_session import SessionManager
+    from knowledge_store import KnowledgeStore
+    from web_fetcher import WebFetcher
+
+    os.chdir(tempfile.mkdtemp(prefix='bench_sessions_'))
+    classifier = None if real_model else stub_classifier
+    learning = AILearningSystem(classifier=classifier, store=KnowledgeStore(),
+                                fetcher=WebFetcher(transport=StubTransport()), start_learning=False)
+    for i in range(200):
+        learning.add_knowledge(f'معلومة رقم {i} عن الصيد والبناء والبقاء', 'survival', 0.5 + i / 1000)
+    chat_system = AIChatSystem(classifier=classifier, learning_system=learning)
+    sessions = SessionManager(chat_system, max_sessions=max_sessions)
+    httpd = ChatServer(('127.0.0.1', port), sessions)
+    ready.set()
+    httpd.serve_forever()
+
+
+def client(port, session_ids, requests_per_client, latencies, errors):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    rng = random.Random()
+    for _ in range(requests_per_client):
+        body = json.dumps({'session': rng.choice(session_ids), 'text': rng.choice(MESSAGES)}).encode('utf-8')
+        started = time.perf_counter()
+        try:
+            connection.request('POST', '/chat', body, {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except Exception as e:
+            errors.append(str(e))
+            connection.close()
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+    connection.close()
+
+
+def get_stats(port):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    connection.request('GET', '/stats')
+    stats = json.loads(connection.getresponse().read())
+    connection.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='اختبار حمل لخادم المحادثة متعدد الجلسات')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--sessions', type=int, default=500)
+    parser.add_argument('--clients', type=int, default=16, help='عدد الاتصالات المتزامنة')
+    parser.add_argument('--requests', type=int, default=200, help='طلبات لكل اتصال')
+    parser.add_argument('--message-interval', type=float, default=5.0,
+                        help='متوسط الثواني بين رسائل اللاعب الواحد لحساب الجلسات لكل نواة')
+    parser.add_argument('--real-model', action='store_true', help='استخدام النموذج الحقيقي بدل البديل')
+    args = parser.parse_args()
+
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(args.port, args.sessions * 2, args.real_model, ready),
+                                     daemon=True)
+    server.start()
+    if not ready.wait(600):
+        print('فشل تشغيل الخادم')
+        return
+
+    session_ids = [f'player{i}' for i in range(args.sessions)]
+    cpu_before = get_stats(args.port)['cpu_seconds']
+    latencies, errors = [], []
+    threads = [threading.Thread(target=client, args=(args.port, session_ids, args.requests, latencies, errors))
+               for _ in range(args.clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stats = get_stats(args.port)
+    server.terminate()
+
+    cpu = max(stats['cpu_seconds'] - cpu_before, 1e-9)
+    latencies.sort()
+    served = len(latencies)
+    per_cpu_second = served / cpu
+    print(json.dumps({
+        'requests': served,
+        'errors': len(errors),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(served / elapsed, 1),
+        'server_cpu_s': round(cpu, 3),
+        'requests_per_cpu_second': round(per_cpu_second, 1),
+        'sessions_per_core': int(per_cpu_second * args.message_interval),
+        'p50_ms': round(latencies[served // 2], 2) if served else None,
+        'p99_ms': round(latencies[min(served - 1, int(served * 0.99))], 2) if served else None,
+        'active_sessions': stats['active'],
+        'router': stats['router']
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
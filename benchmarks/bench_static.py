@@ -0,0 +1,113 @@
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ASSETS = ['/', '/game.js', '/characters.js', '/js/three.js', '/public/js/libs/three.module.js']
+
+
+def wait_for_port(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('HEAD', '/')
+            connection.getresponse().read()
+            connection.close()
+            return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def client(port, assets, rounds, revalidate, results):
+    """تحميل الملفات كما يفعل المتصفح: اتصال مستمر مع قبول gzip وإعادة التحقق بـ ETag"""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    etags = {}
+    latencies, transferred, not_modified, errors = [], 0, 0, 0
+    for _ in range(rounds):
+        for asset in assets:
+            headers = {'Accept-Encoding': 'gzip, br'}
+            if revalidate and asset in etags:
+                headers['If-None-Match'] = etags[asset]
+            started = time.perf_counter()
+            try:
+                connection.request('GET', asset, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                connection.close()
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            transferred += len(body)
+            not_modified += response.status == 304
+            if response.getheader('ETag'):
+                etags[asset] = response.getheader('ETag')
+    connection.close()
+    results.append((latencies, transferred, not_modified, errors))
+
+
+def run_case(name, extra_args, port, clients, rounds, revalidate):
+    server = subprocess.Popen(
+        [sys.executable, 'server.py', '--no-browser', '--port', str(port)] + extra_args,
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not wait_for_port(port):
+            return {'server': name, 'error': 'الخادم لم يبدأ'}
+        # جولة إحماء غير محسوبة لكلا الخادمين
+        client(port, ASSETS, 1, False, [])
+        results = []
+        threads = [threading.Thread(target=client, args=(port, ASSETS, rounds, revalidate, results))
+                   for _ in range(clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = sorted(ms for result in results for ms in result[0])
+    count = len(latencies)
+    return {
+        'server': name,
+        'revalidate': revalidate,
+        'requests': count,
+        'errors': sum(result[3] for result in results),
+        'rps': round(count / elapsed, 1),
+        'mb_transferred': round(sum(result[1] for result in results) / 1e6, 2),
+        'not_modified': sum(result[2] for result in results),
+        'p50_ms': round(latencies[count // 2], 2) if count else None,
+        'p99_ms': round(latencies[min(count - 1, int(count * 0.99))], 2) if count else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='مقارنة خادم الملفات الجديد بالخادم القديم')
+    parser.add_argument('--port', type=int, default=8770)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=20, help='مرات تحميل كل الملفات لكل عميل')
+    args = parser.parse_args()
+
+    cases = [
+        ('legacy', ['--legacy'], False),
+        ('cached', ['--quiet'], False),
+        ('cached', ['--quiet'], True)
+    ]
+    for i, (name, extra_args, revalidate) in enumerate(cases):
+        result = run_case(name, extra_args, args.port + i, args.clients, args.rounds, revalidate)
+        print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+import itertools
+import os
+import random
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# خط الأساس يُحفظ بجانب المقاييس بدل ./.benchmarks في مجلد التشغيل
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+DEFAULT_STORAGE = 'file://./.benchmarks'
+
+KB_SIZES = (1000, 10000, 100000)
+CATEGORIES = ('استراتيجيات البقاء على قيد الحياة', 'تقنيات بناء القوارب', 'صيد الأسماك',
+              'جمع الموارد', 'الطقس البحري', 'تكتيكات القتال', 'user_requested')
+WORDS = ('البقاء الطوف البحر الصيد الأسماك الخشب المعدن العاصفة الرياح الموارد الجزيرة القارب '
+         'الماء الطعام النار الليل النهار الخطر العدو الدفاع الهجوم البناء الأدوات الشاطئ '
+         'المطر الحبال الشراع المجداف الصخور الرمل الأمواج الملح الظل الشمس القمر النجوم').split()
+LETTERS = 'ابتثجحخدذرزسشصضطظعغفقكلمنهوي'
+
+
+def pytest_addoption(parser):
+    parser.addoption('--kb-sizes', default=','.join(map(str, KB_SIZES)),
+                     help='أحجام قواعد المعرفة الصناعية (مفصولة بفواصل)')
+
+
+def pytest_configure(config):
+    # يعمل قبل pytest_configure الخاص بـ pytest-benchmark (trylast)
+    if config.getoption('benchmark_storage', None) == DEFAULT_STORAGE:
+        config.option.benchmark_storage = 'file://' + BASELINE_DIR
+
+
+def pytest_generate_tests(metafunc):
+    if 'kb_size' in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption('kb_sizes').split(',')]
+        metafunc.parametrize('kb_size', sizes, ids=[f'kb{size}' for size in sizes], scope='session')
+
+
+def vocabulary(size=5000, seed=0):
+    """كلمات المفردات الحقيقية مع كلمات صناعية حتى يكون للفهرس توزيع قريب من نصوص الويب"""
+    rng = random.Random(seed)
+    words = list(WORDS)
+    seen = set(words)
+    while len(words) < size:
+        word = 'ال' + ''.join(rng.choice(LETTERS) for _ in range(rng.randint(3, 6)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def synthetic_texts(count, seed=0, min_words=20, max_words=80, start=0):
+    """نصوص عربية صناعية؛ الكلمات الشائعة تتكرر أكثر (توزيع زيف تقريبي)"""
+    rng = random.Random(seed)
+    words = vocabulary()
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    texts = []
+    for i in range(start, start + count):
+        chosen = rng.choices(words, weights, k=rng.randint(min_words, max_words))
+        # رقم العنصر يجعل كل نص فريداً فلا يتجاهله فحص المحتوى المكرر
+        texts.append(' '.join(chosen) + f' {i}')
+    return texts
+
+
+def synthetic_knowledge_base(size, seed=0):
+    from arabic_text import content_hash
+
+    rng = random.Random(seed)
+    knowledge_base = {}
+    for text in synthetic_texts(size, seed):
+        category = rng.choice(CATEGORIES)
+        knowledge_base.setdefault(category, []).append({
+            'text': text,
+            'category': category,
+            'confidence': rng.random(),
+            'timestamp': time.time(),
+            'hash': content_hash(text)
+        })
+    return knowledge_base
+
+
+class StubClassifier:
+    """بديل حتمي للنموذج: ثقة ثابتة لكل نص مشتقة من بصمته"""
+
+    def __init__(self):
+        self.calls = 0
+        self.items = 0
+
+    def __call__(self, texts, truncation=True):
+        from arabic_text import content_hash
+
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        self.calls += 1
+        self.items += len(texts)
+        return [{'label': 'LABEL_0', 'score': int(content_hash(text)[:8], 16) / 0xFFFFFFFF}
+                for text in texts]
+
+
+class StubEmbedder:
+    """بديل حتمي لمتجهات BERT: مجموع متجهات عشوائية ثابتة لكل كلمة (نصوص تتشارك كلمات تتقارب)"""
+
+    def __init__(self, dim=768):
+        self.dim = dim
+        self.vectors = {}
+
+    def _vector(self, token):
+        import zlib
+        import numpy as np
+
+        vector = self.vectors.get(token)
+        if vector is None:
+            rng = np.random.default_rng(zlib.crc32(token.encode('utf-8')))
+            vector = self.vectors[token] = rng.standard_normal(self.dim).astype(np.float32)
+        return vector
+
+    def __call__(self, texts):
+        import numpy as np
+        from arabic_text import tokenize
+
+        return np.stack([np.sum([self._vector(token) for token in tokenize(text)] or [np.zeros(self.dim)], axis=0)
+                         for text in texts]).astype(np.float32)
+
+
+class StubTransport:
+    """صفحات HTML صناعية بدل الشبكة؛ كل طلب يرجع نصاً جديداً"""
+
+    def __init__(self, seed=0):
+        self.counter = itertools.count()
+        self.seed = seed
+
+    def get(self, url, timeout=5, max_bytes=None, headers=None):
+        text = synthetic_texts(1, self.seed, start=next(self.counter))[0]
+        return {'url': url, 'status': 200, 'headers': {}, 'text': f'<html><body><p>{text}</p></body></html>'}
+
+
+def stub_fetcher():
+    """WebFetcher حقيقي (تخزين مؤقت وتحليل HTML) مع نقل وبحث بلا شبكة"""
+    from fetch_cache import FetchCache
+    from web_fetcher import WebFetcher
+
+    class OfflineFetcher(WebFetcher):
+        def search(self, query, num_results=5):
+            return [f'https://example.invalid/{query}/{i}' for i in range(num_results)]
+
+    # بدون ذاكرة مؤقتة حتى يقيس كل تكرار مسار الجلب كاملاً
+    return OfflineFetcher(transport=StubTransport(), parser='html.parser', cache=FetchCache(ttl=0))
+
+
+@pytest.fixture
+def classifier():
+    return StubClassifier()
+
+
+@pytest.fixture
+def fetcher():
+    fetcher = stub_fetcher()
+    yield fetcher
+    fetcher.shutdown()
+
+
+@pytest.fixture(scope='session')
+def knowledge_base_dir(kb_size, tmp_path_factory):
+    """مجلد فيه لقطة قاعدة معرفة صناعية بالحجم المطلوب (تُبنى مرة لكل حجم)"""
+    from knowledge_store import KnowledgeStore
+
+    directory = tmp_path_factory.mktemp(f'kb{kb_size}')
+    store = KnowledgeStore(str(directory / 'knowledge_base'))
+    store.compact(synthetic_knowledge_base(kb_size))
+    return directory
+
+
+@pytest.fixture(scope='session')
+def learning_system(knowledge_base_dir):
+    """نظام تعلم محمّل بقاعدة المعرفة الصناعية، بلا نموذج ولا شبكة ولا خيط تعلم"""
+    from ai_learning import AILearningSystem
+    from knowledge_store import KnowledgeStore
+
+    fetcher = stub_fetcher()
+    system = AILearningSystem(classifier=StubClassifier(),
+                              store=KnowledgeStore(str(knowledge_base_dir / 'knowledge_base')),
+                              fetcher=fetcher, start_learning=False)
+    yield system
+    system.store.close()
+    fetcher.shutdown()
+
+
+@pytest.fixture(scope='session')
+def situations():
+    """مواقف واستعلامات من نفس المفردات (بعضها بلا تطابق)"""
+    rng = random.Random(1)
+    words = vocabulary()
+    queries = [' '.join(rng.choices(words[:200], k=rng.randint(1, 4))) for _ in range(200)]
+    queries += ['attack', 'defend', 'gather', 'build', 'fish', 'كلمة_غير_موجودة']
+    return queries
@@ -0,0 +1,71 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)')
+
+
+def import_times(module):
+    """تشغيل python -X importtime على وحدة وإرجاع (الوحدة، الزمن الذاتي، الزمن التراكمي) بالمللي ثانية"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, name = match.groups()
+            entries.append((name, int(self_us) / 1000, int(cumulative_us) / 1000))
+    if result.returncode != 0:
+        print(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'فشل الاستيراد')
+    return entries
+
+
+def report_imports(module, top):
+    entries = import_times(module)
+    if not entries:
+        return
+    total = max(entry[2] for entry in entries)
+    print(f'\n== import {module}: {total:.1f} ms ==')
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for name, self_ms, cumulative_ms in sorted(entries, key=lambda e: e[2], reverse=True)[:top]:
+        print(f'{cumulative_ms:>14.1f}{self_ms:>10.1f}  {name}')
+
+
+def report_startup(wait_chat):
+    """تشغيل اللعبة مع --startup-probe وقياس زمن أول إطار"""
+    command = [sys.executable, 'main_3d.py', '--startup-probe']
+    if wait_chat:
+        command.append('--wait-chat')
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    print('\n== startup ==')
+    for line in process.stdout:
+        if line.startswith('startup '):
+            _, name, in_process = line.split()
+            print(f'{name:<12} wall {time.perf_counter() - started:.3f} s  (in-process {in_process} s)')
+    process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='تقرير زمن الاستيراد وزمن بدء تشغيل اللعبة')
+    parser.add_argument('--modules', default='main_3d,ai_chat,ai_learning')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--no-window', action='store_true', help='تخطي قياس أول إطار')
+    parser.add_argument('--wait-chat', action='store_true', help='انتظار جاهزية نموذج المحادثة أيضاً')
+    args = parser.parse_args()
+
+    for module in args.modules.split(','):
+        report_imports(module, args.top)
+    if not args.no_window:
+        report_startup(args.wait_chat)
+
+
+if __name__ == '__main__':
+    main()
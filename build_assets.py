@@ -0,0 +1,324 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_NAME = 'asset-manifest.json'
+MANIFEST_FORMAT = 1
+
+ASSET_EXTENSIONS = {
+    '.html', '.js', '.mjs', '.css', '.svg', '.ico', '.png', '.jpg', '.jpeg', '.gif', '.webp',
+    '.woff', '.woff2', '.ttf', '.glb', '.gltf', '.mp3', '.ogg', '.wav'
+}
+ENCODING_SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+COMPRESSIBLE_EXTENSIONS = {'.html', '.js', '.mjs', '.css', '.svg', '.ico', '.ttf', '.gltf'}
+# ملفات الصفحات لا تأخذ بصمة في اسمها لأن الروابط إليها ثابتة
+ENTRY_EXTENSIONS = {'.html'}
+EXCLUDE_DIRS = {'.git', 'node_modules', '__pycache__', 'benchmarks', 'build', 'dist'}
+EXCLUDE_FILES = {'server.js', 'multiplayer_server.js', 'webpack.config.js'}
+
+HTML_REFERENCE = re.compile(r'''(\b(?:src|href)\s*=\s*)(["'])([^"']+)\2''')
+JS_REFERENCE = re.compile(r'''(\bfrom\s*|\bimport\s*\(?\s*)(["'])([^"']+)\2''')
+CSS_REFERENCE = re.compile(r'''(url\(\s*)(["']?)([^"')]+)\2''')
+
+
+def stamp_of(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def file_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def fingerprinted(path, digest):
+    base, ext = posixpath.splitext(path)
+    return f'{base}.{digest[:10]}{ext}'
+
+
+def reference_patterns(path):
+    ext = posixpath.splitext(path)[1]
+    if ext == '.html':
+        return (HTML_REFERENCE, JS_REFERENCE)
+    if ext in ('.js', '.mjs'):
+        return (JS_REFERENCE,)
+    if ext == '.css':
+        return (CSS_REFERENCE,)
+    return ()
+
+
+def resolve(source, reference):
+    """المسار النسبي لجذر المشروع الذي يشير إليه الرابط، أو None للروابط الخارجية"""
+    if re.match(r'^([a-z][a-z0-9+.-]*:|//|#)', reference, re.I):
+        return None
+    target = reference.split('#', 1)[0].split('?', 1)[0]
+    if not target:
+        return None
+    if target.startswith('/'):
+        return posixpath.normpath(target.lstrip('/'))
+    if not target.startswith('.') and posixpath.splitext(source)[1] in ('.js', '.mjs'):
+        # اسم حزمة مثل 'three' يُحل عبر importmap
+        return None
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source), target))
+
+
+def relative_reference(source, target, original):
+    """رابط إلى الملف الجديد بنفس أسلوب الرابط الأصلي (مطلق أو نسبي)"""
+    suffix = original[len(original.split('#', 1)[0].split('?', 1)[0]):]
+    if original.startswith('/'):
+        return '/' + target + suffix
+    link = posixpath.relpath(target, posixpath.dirname(source) or '.')
+    if original.startswith('./') and not link.startswith('.'):
+        link = './' + link
+    return link + suffix
+
+
+class AssetBuilder:
+    """بناء نسخة النشر: أسماء ملفات ببصمة المحتوى، نسخ gz/br مضغوطة، وبيان للخادم
+
+    البناء تزايدي: الملف الذي لم يتغير تاريخه وحجمه ولا بصمات الملفات التي
+    يشير إليها لا يُقرأ ولا يُضغط من جديد.
+    """
+
+    def __init__(self, root='.', out_dir='dist', workers=None, compress_level=9):
+        self.root = os.path.abspath(root)
+        self.out_dir = os.path.abspath(out_dir)
+        self.workers = workers or os.cpu_count() or 4
+        self.compress_level = compress_level
+        self.manifest_path = os.path.join(self.out_dir, MANIFEST_NAME)
+        self.previous = self.read_manifest()
+        self.files = {}
+        self.built = 0
+        self.skipped = 0
+
+    def read_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('format') == MANIFEST_FORMAT:
+                return manifest.get('files', {})
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def discover(self):
+        """كل ملفات الواجهة بمسارات نسبية بفواصل /"""
+        assets = []
+        for root, dirs, files in os.walk(self.root):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d not in EXCLUDE_DIRS
+                             and os.path.join(root, d) != self.out_dir)
+            for name in sorted(files):
+                if name in EXCLUDE_FILES or posixpath.splitext(name)[1].lower() not in ASSET_EXTENSIONS:
+                    continue
+                path = os.path.relpath(os.path.join(root, name), self.root)
+                assets.append(path.replace(os.sep, '/'))
+        return assets
+
+    def source_hash(self, path, stamp):
+        """بصمة الملف المصدر، من البيان السابق إذا لم يتغير تاريخه وحجمه"""
+        previous = self.previous.get(path)
+        if previous and previous.get('stamp') == stamp:
+            return previous['source_hash'], None
+        with open(os.path.join(self.root, path), 'rb') as f:
+            data = f.read()
+        return file_hash(data), data
+
+    def scan_references(self, path, data):
+        text = data.decode('utf-8', errors='replace')
+        references = set()
+        for pattern in reference_patterns(path):
+            for match in pattern.finditer(text):
+                target = resolve(path, match.group(3))
+                if target is not None:
+                    references.add(target)
+        return sorted(references)
+
+    def build(self, paths=None):
+        started = time.perf_counter()
+        paths = paths or self.discover()
+        known = set(paths)
+        sources = {}
+        for path in paths:
+            stamp = stamp_of(os.path.join(self.root, path))
+            digest, data = self.source_hash(path, stamp)
+            previous = self.previous.get(path)
+            if data is None and previous:
+                references = previous.get('references', [])
+            else:
+                if data is None:
+                    with open(os.path.join(self.root, path), 'rb') as f:
+                        data = f.read()
+                references = self.scan_references(path, data) if reference_patterns(path) else []
+            sources[path] = {
+                'stamp': stamp,
+                'source_hash': digest,
+                'data': data,
+                'references': [r for r in references if r in known and r != path]
+            }
+
+        with ThreadPoolExecutor(self.workers) as executor:
+            compressions = []
+            visiting = set()
+
+            def visit(path):
+                # ترتيب عمقي: بصمة الملف تُحسب بعد بصمات الملفات التي يستوردها
+                if path in self.files or path in visiting:
+                    return
+                visiting.add(path)
+                for reference in sources[path]['references']:
+                    visit(reference)
+                visiting.discard(path)
+                compressions.extend(self.build_file(path, sources[path], executor))
+
+            for path in paths:
+                visit(path)
+            for future in compressions:
+                future.result()
+
+        self.write_manifest()
+        return {
+            'files': len(self.files),
+            'built': self.built,
+            'skipped': self.skipped,
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+
+    def build_file(self, path, source, executor):
+        # الملفات داخل حلقة استيراد تستخدم الاسم الأصلي للملف الذي لم يُبنَ بعد
+        outputs = {r: self.files[r]['path'] for r in source['references'] if r in self.files}
+        key = file_hash(json.dumps([source['source_hash'], sorted(outputs.items())]).encode('utf-8'))
+        previous = self.previous.get(path)
+        if previous and previous.get('key') == key and self.outputs_exist(previous):
+            self.files[path] = dict(previous, stamp=source['stamp'])
+            self.skipped += 1
+            return []
+
+        data = source['data']
+        if data is None:
+            with open(os.path.join(self.root, path), 'rb') as f:
+                data = f.read()
+        if outputs:
+            data = self.rewrite(path, data, outputs)
+
+        ext = posixpath.splitext(path)[1].lower()
+        digest = file_hash(data)
+        output = path if ext in ENTRY_EXTENSIONS else fingerprinted(path, digest)
+        entry = {
+            'path': output,
+            'outputs': sorted({path, output}),
+            'hash': digest,
+            'source_hash': source['source_hash'],
+            'key': key,
+            'stamp': source['stamp'],
+            'size': len(data),
+            'references': source['references'],
+            'immutable': output != path,
+            'encodings': []
+        }
+        # نسخة بالاسم الأصلي أيضاً لتعمل الروابط غير المعاد كتابتها (حلقات الاستيراد أو الروابط الديناميكية)
+        for name in entry['outputs']:
+            self.write(name, data)
+        futures = []
+        if ext in COMPRESSIBLE_EXTENSIONS and len(data) >= 1024:
+            entry['encodings'].append('gzip')
+            futures.append(executor.submit(self.write_encoded, entry['outputs'], '.gz',
+                                           lambda: gzip.compress(data, self.compress_level, mtime=0)))
+            if brotli is not None:
+                entry['encodings'].append('br')
+                futures.append(executor.submit(self.write_encoded, entry['outputs'], '.br',
+                                               lambda: brotli.compress(data)))
+        self.files[path] = entry
+        self.built += 1
+        return futures
+
+    def rewrite(self, path, data, outputs):
+        text = data.decode('utf-8')
+
+        def replace(match):
+            target = resolve(path, match.group(3))
+            if target not in outputs:
+                return match.group(0)
+            link = relative_reference(path, outputs[target], match.group(3))
+            return f'{match.group(1)}{match.group(2)}{link}{match.group(2)}'
+
+        for pattern in reference_patterns(path):
+            text = pattern.sub(replace, text)
+        return text.encode('utf-8')
+
+    @staticmethod
+    def output_files(entry):
+        for name in entry.get('outputs', [entry['path']]):
+            yield name
+            for encoding in entry['encodings']:
+                yield name + ENCODING_SUFFIXES[encoding]
+
+    def outputs_exist(self, entry):
+        return all(os.path.exists(os.path.join(self.out_dir, name)) for name in self.output_files(entry))
+
+    def write_encoded(self, names, suffix, compress):
+        """ضغط المحتوى مرة واحدة (في خيط الضغط) وكتابته بجانب كل نسخة"""
+        data = compress()
+        for name in names:
+            self.write(name + suffix, data)
+
+    def write(self, relative_path, data):
+        """كتابة ذرية لملف في مجلد النشر"""
+        path = os.path.join(self.out_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def write_manifest(self):
+        manifest = {
+            'format': MANIFEST_FORMAT,
+            'built_at': time.time(),
+            'files': self.files
+        }
+        self.write(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    def prune(self):
+        """حذف الملفات القديمة من البناءات السابقة التي لم تعد في البيان"""
+        current = {MANIFEST_NAME}
+        for entry in self.files.values():
+            current.update(self.output_files(entry))
+        removed = 0
+        for root, dirs, files in os.walk(self.out_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                if os.path.relpath(path, self.out_dir).replace(os.sep, '/') not in current:
+                    os.remove(path)
+                    removed += 1
+        return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='بناء ملفات الواجهة للنشر مع البصمات والضغط المسبق')
+    parser.add_argument('--root', default='.')
+    parser.add_argument('--out', default='dist')
+    parser.add_argument('--prune', action='store_true', help='حذف ملفات البناءات السابقة')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    builder = AssetBuilder(args.root, args.out, args.workers)
+    stats = builder.build()
+    if args.prune:
+        stats['pruned'] = builder.prune()
+    if brotli is None:
+        print('تنبيه: مكتبة brotli غير مثبتة، سيتم إنشاء نسخ gzip فقط')
+    print(json.dumps(stats, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,152 @@
 import sys
 import os
-from cx_Freeze import setup, Executable
+import argparse
+import fnmatch
+import json
+import modulefinder
+import subprocess
+import time
 
-def build_exe():
+# حزم تحمّل وحداتها ديناميكياً فلا يجدها تتبع الاستيرادات وحده
+DYNAMIC_INCLUDES = {
+    'transformers': [
+        'torch',
+        'transformers.models.bert',
+        'transformers.pipelines.text_classification'
+    ],
+    'bidi': ['bidi.algorithm']
+}
+
+# وحدات torch و transformers الاختيارية التي لا تحتاجها اللعبة
+SLIM_EXCLUDES = [
+    'torch.utils.tensorboard',
+    'torch.utils.benchmark',
+    'torch.utils.bottleneck',
+    'torch.testing._internal',
+    'torch._inductor',
+    'torchvision',
+    'torchaudio',
+    'caffe2',
+    'tensorboard',
+    'tensorflow',
+    'flax',
+    'jax',
+    'keras',
+    'gymnasium',
+    'matplotlib',
+    'IPython',
+    'tkinter',
+    'unittest',
+    'pydoc_data'
+]
+
+# مكتبات CUDA في حزمة torch؛ اللعبة تستخدم المعالج فقط
+CUDA_LIBRARIES = [
+    '*cudnn*', '*cublas*', '*cufft*', '*curand*', '*cusparse*', '*cusolver*', '*nvrtc*',
+    '*nccl*', '*cupti*', '*nvToolsExt*', '*nvJitLink*', '*torch_cuda*', '*c10_cuda*', '*caffe2_nvrtc*'
+]
+
+
+class ProjectModuleFinder(modulefinder.ModuleFinder):
+    """تتبع استيرادات ملفات المشروع فقط، مع تسجيل الحزم الخارجية دون الدخول إليها"""
+
+    def __init__(self, project_dir, **kwargs):
+        super().__init__(path=[project_dir] + sys.path, **kwargs)
+        self.project_dir = os.path.abspath(project_dir)
+        self.external = set()
+
+    def load_module(self, fqname, fp, pathname, file_info):
+        if pathname and not os.path.abspath(pathname).startswith(self.project_dir + os.sep):
+            self.external.add(fqname.split('.')[0])
+            module = self.add_module(fqname)
+            module.__file__ = pathname
+            if file_info[2] == modulefinder._PKG_DIRECTORY:
+                module.__path__ = [pathname]
+            return module
+        return super().load_module(fqname, fp, pathname, file_info)
+
+
+def import_graph(script, project_dir):
+    """وحدات المشروع والحزم الخارجية التي يصل إليها الملف (بما فيها الاستيرادات المتأخرة داخل الدوال)"""
+    finder = ProjectModuleFinder(project_dir)
+    finder.run_script(script)
+    project = sorted(name for name, module in finder.modules.items()
+                     if module.__file__ and os.path.abspath(module.__file__).startswith(finder.project_dir + os.sep)
+                     and name != '__main__')
+    # الحزم غير المثبتة في بيئة البناء تظهر في badmodules
+    missing = {name.split('.')[0] for name in finder.badmodules}
+    external = (finder.external | missing) - set(project) - set(sys.builtin_module_names) - {'__main__'}
+    stdlib = set(getattr(sys, 'stdlib_module_names', ()))
+    return {
+        'project': project,
+        'third_party': sorted(name for name in external if name not in stdlib),
+        'stdlib': sorted(name for name in external if name in stdlib)
+    }
+
+
+def directory_size(path):
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def largest_packages(build_dir, top=10):
+    """أكبر المجلدات في lib داخل النسخة المبنية"""
+    lib_dir = os.path.join(build_dir, 'lib')
+    if not os.path.isdir(lib_dir):
+        return []
+    sizes = []
+    for name in os.listdir(lib_dir):
+        path = os.path.join(lib_dir, name)
+        sizes.append((name, directory_size(path) if os.path.isdir(path) else os.path.getsize(path)))
+    return sorted(sizes, key=lambda item: item[1], reverse=True)[:top]
+
+
+def remove_cuda_libraries(build_dir):
+    """حذف مكتبات CUDA من النسخة المبنية وإرجاع الحجم الموفر"""
+    saved = 0
+    for root, dirs, files in os.walk(build_dir):
+        for name in files:
+            if any(fnmatch.fnmatch(name, pattern) for pattern in CUDA_LIBRARIES):
+                path = os.path.join(root, name)
+                saved += os.path.getsize(path)
+                os.remove(path)
+    return saved
+
+
+def find_executable(build_dir, name):
+    for candidate in (name + '.exe', name):
+        path = os.path.join(build_dir, candidate)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def measure_cold_start(executable, runs=3):
+    """زمن أول إطار وجاهزية المحادثة عبر --startup-probe (متوسط عدة تشغيلات)"""
+    results = {}
+    for _ in range(runs):
+        started = time.perf_counter()
+        process = subprocess.Popen([executable, '--startup-probe', '--wait-chat'], cwd=os.path.dirname(executable),
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        for line in process.stdout:
+            if line.startswith('startup '):
+                _, name, _ = line.split()
+                results.setdefault(name, []).append(time.perf_counter() - started)
+        process.wait()
+    return {name: round(sum(values) / len(values), 3) for name, values in results.items()}
+
+
+def build_exe(slim=False, model_dir=None, report_path=None, measure=True):
     # تحديد المسار الحالي
     current_dir = os.path.dirname(os.path.abspath(__file__))
-    
+
     # تحديد مسار الملفات المطلوبة
     main_file = os.path.join(current_dir, 'main_3d.py')
     assets_dir = os.path.join(current_dir, 'assets')
-    
+
     # تعيين المتغيرات
     build_exe_options = {
         "packages": [
@@ -24,22 +161,100 @@ def build_exe():
             "beautifulsoup4",
             "wikipedia"
         ],
-        "include_files": [
-            (assets_dir, "assets")
-        ]
+        "include_files": []
     }
+    if os.path.isdir(assets_dir):
+        build_exe_options["include_files"].append((assets_dir, "assets"))
+
+    graph = None
+    if slim:
+        # بدلاً من تضمين الحزم كاملة: الحزم التي يستوردها main_3d فعلاً فقط
+        graph = import_graph(main_file, current_dir)
+        packages = []
+        for name in graph['third_party']:
+            packages.extend(DYNAMIC_INCLUDES.get(name, []))
+        from inference_backends import onnx_file
+
+        excludes = list(SLIM_EXCLUDES)
+        if model_dir and onnx_file(model_dir):
+            # نموذج ONNX يعمل بـ onnxruntime فلا حاجة لـ torch إطلاقاً
+            packages = [name for name in packages if name != 'torch'] + ['onnxruntime']
+            excludes.append('torch')
+        build_exe_options = {
+            "packages": packages,
+            "includes": graph['project'],
+            "excludes": excludes,
+            "include_files": build_exe_options["include_files"],
+            "build_exe": os.path.join(current_dir, 'build', 'slim'),
+            "optimize": 1
+        }
+
+    if model_dir:
+        # نموذج محلي (مثلاً ONNX أو مكمّم) يُحمّل عند أول استخدام من مجلد model بجانب الملف التنفيذي
+        build_exe_options["include_files"].append((os.path.abspath(model_dir), "model"))
+
+    from cx_Freeze import setup, Executable
 
     # إعداد البناء
-    setup(
+    started = time.perf_counter()
+    distribution = setup(
         name="Survival Game",
         version="1.0",
         description="3D Survival Game with AI",
         options={"build_exe": build_exe_options},
         executables=[Executable(main_file)]
     )
-    
+    build_seconds = time.perf_counter() - started
+
     print("تم إنشاء التطبيق بنجاح!")
-    print(f"يمكنك العثور على الملف التنفيذي في: {os.path.join(current_dir, 'build', 'exe.win-amd64-3.10', 'Survival Game.exe')}")
+    if not slim:
+        print(f"يمكنك العثور على الملف التنفيذي في: {os.path.join(current_dir, 'build', 'exe.win-amd64-3.10', 'Survival Game.exe')}")
+        return distribution
+
+    build_dir = build_exe_options["build_exe"]
+    report = {
+        'built_at': time.time(),
+        'build_seconds': round(build_seconds, 1),
+        'import_graph': graph,
+        'cuda_bytes_removed': remove_cuda_libraries(build_dir),
+        'size_bytes': directory_size(build_dir),
+        'largest_packages': largest_packages(build_dir),
+        'model_dir': model_dir
+    }
+    executable = find_executable(build_dir, 'main_3d')
+    if measure and executable:
+        report['cold_start_seconds'] = measure_cold_start(executable)
+
+    report_path = report_path or os.path.join(current_dir, 'build', 'slim_report.json')
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"حجم النسخة: {report['size_bytes'] / 1e6:.1f} MB (تم حذف {report['cuda_bytes_removed'] / 1e6:.1f} MB من مكتبات CUDA)")
+    for name, size in report['largest_packages']:
+        print(f"  {size / 1e6:>9.1f} MB  {name}")
+    for name, seconds in report.get('cold_start_seconds', {}).items():
+        print(f"زمن البدء ({name}): {seconds:.3f} s")
+    print(f"التقرير: {report_path}")
+    return distribution
+
+
+def main():
+    parser = argparse.ArgumentParser(description='بناء الملف التنفيذي للعبة')
+    parser.add_argument('--slim', action='store_true', help='تضمين الحزم المستخدمة فعلاً فقط وحذف مكتبات CUDA')
+    parser.add_argument('--model-dir', default=None, help='مجلد نموذج محلي يُرفق مع النسخة المبنية')
+    parser.add_argument('--report', default=None, help='مسار تقرير الحجم وزمن البدء')
+    parser.add_argument('--no-measure', action='store_true', help='تخطي قياس زمن البدء')
+    parser.add_argument('--graph', action='store_true', help='طباعة رسم الاستيرادات فقط دون بناء')
+    args, remaining = parser.parse_known_args()
+
+    if args.graph:
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        print(json.dumps(import_graph(os.path.join(current_dir, 'main_3d.py'), current_dir), indent=2))
+        return
+
+    # باقي المعاملات لأوامر cx_Freeze (الافتراضي build)
+    sys.argv = [sys.argv[0]] + (remaining or ['build'])
+    build_exe(args.slim, args.model_dir, args.report, not args.no_measure)
 
 if __name__ == '__main__':
-    build_exe()
+    main()
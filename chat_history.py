@@ -0,0 +1,212 @@
+import glob
+import json
+import os
+import threading
+import time
+from collections import deque
+from queue import Queue
+
+
+class ChatTurn:
+    """رسالة واحدة في المحادثة مع رد الذكاء الاصطناعي"""
+    __slots__ = ('user', 'ai', 'command', 'confidence', 'timestamp')
+
+    def __init__(self, user, ai, command=None, confidence=None, timestamp=None):
+        self.user = user
+        self.ai = ai
+        self.command = command
+        self.confidence = confidence
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+
+class ArchiveWriter:
+    """خيط كتابة خلفي واحد يمكن أن تتشاركه عدة أرشيفات (مثل كل جلسات الخادم)"""
+
+    def __init__(self, name='archive-writer'):
+        self._queue = Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, archive, record):
+        with self._close_lock:
+            if self._closed:
+                return False
+            self._queue.put((archive, record))
+            return True
+
+    def flush(self):
+        """انتظار كتابة كل الرسائل المعلقة"""
+        self._queue.join()
+
+    def close(self, timeout=None):
+        """كتابة الرسائل المعلقة ثم إيقاف خيط الكتابة"""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                break
+            archive, record = item
+            archive._write_now(record)
+            self._queue.task_done()
+
+
+class HistoryArchive:
+    """يحفظ الرسائل القديمة في ملفات JSONL متتالية مع التدوير حسب الحجم
+
+    الكتابة تتم في خيط ArchiveWriter؛ بدون writer مشترك ينشئ الأرشيف خيطه الخاص.
+    """
+
+    def __init__(self, directory, prefix='chat_history', max_file_bytes=1024 * 1024, max_files=None,
+                 writer=None):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        os.makedirs(directory, exist_ok=True)
+
+        files = self.files()
+        self.index = self._file_index(files[-1]) if files else 1
+        self._owns_writer = writer is None
+        self.writer = ArchiveWriter(f'archive-{prefix}') if writer is None else writer
+        self._closed = False
+        self._close_lock = threading.Lock()
+
+    def files(self):
+        """ملفات الأرشيف مرتبة من الأقدم إلى الأحدث"""
+        pattern = os.path.join(glob.escape(self.directory), f'{glob.escape(self.prefix)}-*.jsonl')
+        return sorted(glob.glob(pattern), key=self._file_index)
+
+    @staticmethod
+    def _file_index(path):
+        return int(os.path.basename(path).rsplit('-', 1)[1].split('.')[0])
+
+    def _path(self, index):
+        return os.path.join(self.directory, f'{self.prefix}-{index:06d}.jsonl')
+
+    def write(self, turn):
+        with self._close_lock:
+            closed = self._closed
+        if closed or not self.writer.put(self, turn.to_dict()):
+            print(f"خطأ في أرشفة المحادثة: الأرشيف {self.prefix} مغلق، تم تجاهل الرسالة")
+            return False
+        return True
+
+    def flush(self):
+        """انتظار كتابة كل الرسائل المعلقة"""
+        self.writer.flush()
+
+    def close(self, timeout=None):
+        """كتابة الرسائل المعلقة؛ ويُوقف خيط الكتابة فقط إذا كان خاصاً بهذا الأرشيف"""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._owns_writer:
+            self.writer.close(timeout)
+        else:
+            self.writer.flush()
+
+    def _write_now(self, record):
+        try:
+            self._append(record)
+        except Exception as e:
+            print(f"خطأ في أرشفة المحادثة: {e}")
+
+    def _append(self, record):
+        path = self._path(self.index)
+        rotated = os.path.exists(path) and os.path.getsize(path) >= self.max_file_bytes
+        if rotated:
+            self.index += 1
+            path = self._path(self.index)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        if rotated:
+            # بعد إنشاء الملف الجديد حتى يبقى max_files ملفاً بالضبط
+            self._remove_old_files()
+
+    def _remove_old_files(self):
+        if self.max_files:
+            for path in self.files()[:-self.max_files]:
+                os.remove(path)
+
+    def __iter__(self):
+        """قراءة الرسائل المؤرشفة تدريجياً ملفاً بعد ملف"""
+        for path in self.files():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            yield ChatTurn.from_dict(json.loads(line))
+                        except ValueError:
+                            continue
+            except FileNotFoundError:
+                # حُذف بالتدوير أثناء القراءة
+                continue
+
+
+class ChatHistory:
+    """سجل محادثة بسعة ثابتة في الذاكرة (حلقة دائرية)
+
+    عند امتلاء السجل تُنقل أقدم رسالة إلى الأرشيف على القرص إذا كان مفعلاً،
+    فيبقى استهلاك الذاكرة ثابتاً مهما طالت الجلسة.
+    """
+
+    def __init__(self, capacity=200, archive_dir=None, prefix='chat_history', **archive_options):
+        self.capacity = capacity
+        self.turns = deque()
+        self.archive = HistoryArchive(archive_dir, prefix, **archive_options) if archive_dir else None
+        self._lock = threading.Lock()
+
+    def append(self, user, ai, command=None, confidence=None):
+        turn = ChatTurn(user, ai, command, confidence)
+        with self._lock:
+            if len(self.turns) >= self.capacity:
+                evicted = self.turns.popleft()
+                if self.archive is not None:
+                    self.archive.write(evicted)
+            self.turns.append(turn)
+        return turn
+
+    def __len__(self):
+        return len(self.turns)
+
+    def __getitem__(self, index):
+        return self.turns[index]
+
+    def __iter__(self):
+        """الرسائل الموجودة في الذاكرة فقط"""
+        with self._lock:
+            return iter(list(self.turns))
+
+    def recent(self, count=10):
+        with self._lock:
+            return list(self.turns)[-count:]
+
+    def iter_all(self):
+        """كل الرسائل من الأرشيف ثم الذاكرة بالترتيب، مع قراءة تدريجية"""
+        if self.archive is not None:
+            self.archive.flush()
+            yield from self.archive
+        yield from self
+
+    def close(self):
+        """كتابة الرسائل المؤرشفة المعلقة وإيقاف خيط الأرشيف"""
+        if self.archive is not None:
+            self.archive.close()
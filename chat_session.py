@@ -0,0 +1,124 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from chat_history import ArchiveWriter, ChatHistory
+
+SESSION_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def default_state():
+    return {
+        'aggressive': 0.5,
+        'cooperative': 0.5,
+        'resourceful': 0.5,
+        'learning': 0.5
+    }
+
+
+class ChatSession:
+    """حالة لاعب واحد: حالة الذكاء الاصطناعي وسجل المحادثة فقط، بدون نماذج"""
+
+    def __init__(self, session_id, history_capacity=200, history_dir=None, archive_writer=None):
+        self.session_id = session_id
+        self.current_state = default_state()
+        self.chat_history = ChatHistory(history_capacity, history_dir, prefix=f'chat_{session_id}',
+                                        writer=archive_writer)
+        self.lock = threading.Lock()
+        self.created_at = self.last_seen = time.monotonic()
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    def close(self):
+        self.chat_history.close()
+
+
+class SessionManager:
+    """جلسات خفيفة لعدة لاعبين فوق نظام محادثة واحد (نموذج وقاعدة معرفة مشتركة)
+
+    الجلسات مرتبة حسب آخر استخدام، فتُطرد الأقدم عند تجاوز max_sessions
+    أو عند الخمول أكثر من idle_timeout ثانية. كل الجلسات تؤرشف عبر خيط كتابة واحد.
+    """
+
+    def __init__(self, chat_system, max_sessions=1000, idle_timeout=1800.0,
+                 history_capacity=50, history_dir=None):
+        self.chat_system = chat_system
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.history_capacity = history_capacity
+        self.history_dir = history_dir
+        self.archive_writer = ArchiveWriter('chat-archive') if history_dir else None
+        self.sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+
+    def get(self, session_id):
+        """الجلسة المطلوبة، وتُنشأ إذا لم تكن موجودة"""
+        if not isinstance(session_id, str) or not SESSION_ID.match(session_id):
+            raise ValueError(f"معرف جلسة غير صالح: {session_id!r}")
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = ChatSession(session_id, self.history_capacity, self.history_dir,
+                                      self.archive_writer)
+                self.sessions[session_id] = session
+                self.created += 1
+            else:
+                self.sessions.move_to_end(session_id)
+            session.touch()
+            evicted = self._evict()
+        for old in evicted:
+            old.close()
+        return session
+
+    def _evict(self):
+        # الأقدم استخداماً في البداية، فالتوقف عند أول جلسة نشطة يكفي
+        evicted = []
+        deadline = time.monotonic() - self.idle_timeout
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if len(self.sessions) <= self.max_sessions and session.last_seen >= deadline:
+                break
+            del self.sessions[session_id]
+            evicted.append(session)
+        self.evicted += len(evicted)
+        return evicted
+
+    def evict_idle(self):
+        with self._lock:
+            evicted = self._evict()
+        for session in evicted:
+            session.close()
+        return len(evicted)
+
+    def remove(self, session_id):
+        with self._lock:
+            session = self.sessions.pop(session_id, None)
+        if session is not None:
+            session.close()
+
+    def respond(self, session_id, text):
+        """رد نظام المحادثة على رسالة لاعب: (الرد، الأمر، الثقة)"""
+        session = self.get(session_id)
+        with session.lock:
+            return self.chat_system.reply(text, session)
+
+    def stats(self):
+        return {
+            'active': len(self.sessions),
+            'created': self.created,
+            'evicted': self.evicted,
+            'max_sessions': self.max_sessions
+        }
+
+    def close(self):
+        with self._lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+        for session in sessions:
+            session.close()
+        if self.archive_writer is not None:
+            self.archive_writer.close()
@@ -0,0 +1,152 @@
+import bisect
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from queue import SimpleQueue, Empty
+
+
+class LatencyHistogram:
+    """مدرج تكراري لزمن الاستجابة مع نسب مئوية من آخر العينات"""
+
+    # حدود الفئات بالمللي ثانية
+    BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+    def __init__(self, window=1024):
+        self._lock = threading.Lock()
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, ms):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.BUCKETS, ms)] += 1
+            self.count += 1
+            self.total += ms
+            self.recent.append(ms)
+
+    def percentile(self, p):
+        with self._lock:
+            samples = sorted(self.recent)
+        if not samples:
+            return 0.0
+        index = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def stats(self):
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count if self.count else 0.0,
+            'p50_ms': self.percentile(50),
+            'p90_ms': self.percentile(90),
+            'p99_ms': self.percentile(99),
+            'buckets': dict(zip([str(b) for b in self.BUCKETS] + ['inf'], self.counts))
+        }
+
+
+class ChatRequest:
+    """طلب محادثة واحد يمكن إلغاؤه وله مهلة"""
+
+    def __init__(self, text, callback=None, timeout=None):
+        self.text = text
+        self.callback = callback
+        self.submitted_at = time.monotonic()
+        self.deadline = self.submitted_at + timeout if timeout else None
+        self.future = Future()
+        self.cancelled = False
+        self.delivered = False
+
+    def cancel(self):
+        """إلغاء الطلب؛ إذا كان قيد التنفيذ يُتجاهل رده عند انتهائه"""
+        self.cancelled = True
+        self.future.cancel()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+
+class ChatWorker:
+    """طابور طلبات محادثة غير متزامن يعمل على مجموعة خيوط بعيداً عن خيط الرسم
+
+    الردود تُسلّم عبر ChatRequest.future، أو إلى دالة callback(reply, error)
+    عند استدعاء poll() من حلقة الإطارات حتى تُحدَّث الواجهة من خيطها.
+    """
+
+    def __init__(self, handler, workers=2, timeout=15.0):
+        self.handler = handler
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='chat')
+        self.pending = set()
+        self.completed = SimpleQueue()
+        self.latency = LatencyHistogram()
+        self.timeouts = 0
+        self.cancellations = 0
+
+    def submit(self, text, callback=None, timeout=None):
+        """إضافة طلب إلى الطابور وإرجاعه فوراً"""
+        request = ChatRequest(text, callback, timeout or self.timeout)
+        self.pending.add(request)
+        self.executor.submit(self._run, request)
+        return request
+
+    def _run(self, request):
+        if request.cancelled or not request.future.set_running_or_notify_cancel():
+            self.completed.put(request)
+            return
+        try:
+            reply = self.handler(request.text)
+        except Exception as e:
+            request.future.set_exception(e)
+        else:
+            request.future.set_result(reply)
+        self.latency.observe((time.monotonic() - request.submitted_at) * 1000)
+        self.completed.put(request)
+
+    def poll(self):
+        """تسليم الردود الجاهزة وإنهاء الطلبات التي تجاوزت مهلتها (من خيط الواجهة)"""
+        while True:
+            try:
+                request = self.completed.get_nowait()
+            except Empty:
+                break
+            self._deliver(request)
+
+        now = time.monotonic()
+        for request in list(self.pending):
+            if request.deadline is not None and now > request.deadline:
+                self.timeouts += 1
+                request.cancel()
+                self._deliver(request, TimeoutError('انتهت مهلة طلب المحادثة'))
+
+    def _deliver(self, request, error=None):
+        if request.delivered:
+            return
+        request.delivered = True
+        self.pending.discard(request)
+        if request.cancelled and error is None:
+            self.cancellations += 1
+            return
+        if request.callback is None:
+            return
+        if error is None:
+            error = request.future.exception()
+        reply = None if error else request.future.result()
+        request.callback(reply, error)
+
+    def cancel_all(self):
+        for request in list(self.pending):
+            request.cancel()
+
+    def stats(self):
+        stats = self.latency.stats()
+        stats.update({
+            'pending': len(self.pending),
+            'timeouts': self.timeouts,
+            'cancelled': self.cancellations
+        })
+        return stats
+
+    def shutdown(self):
+        self.cancel_all()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,176 @@
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from arabic_text import content_hash
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    namespace TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    label TEXT,
+    score REAL,
+    embedding BLOB,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (namespace, hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+"""
+
+# حد متغيرات SQLite في الاستعلام الواحد
+CHUNK = 500
+
+
+class ClassificationCache:
+    """ذاكرة دائمة لنتائج التصنيف (والتضمينات اختيارياً) مفتاحها بصمة النص بعد التوحيد
+
+    ملف SQLite بوضع WAL تتشاركه كل العمليات على الجهاز، فالنص المكرر يكلف
+    استعلاماً واحداً بدل تمرير النموذج. الحجم محدود بـ max_entries ويُحذف الأقدم استخداماً.
+    """
+
+    def __init__(self, path='classifier_cache.sqlite', max_entries=100000, touch_interval=60.0):
+        self.path = path
+        self.max_entries = max_entries
+        # تحديث وقت الاستخدام لا يُكتب أكثر من مرة كل touch_interval لتقليل الكتابة
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes_since_trim = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._connect()
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def key(text):
+        return content_hash(text)
+
+    def get_many(self, namespace, keys):
+        """النتائج المخزنة {key: {label, score}} للمفاتيح الموجودة فقط"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        stale = []
+        now = time.time()
+        connection = self._connect()
+        for start in range(0, len(keys), CHUNK):
+            chunk = keys[start:start + CHUNK]
+            marks = ','.join('?' * len(chunk))
+            rows = connection.execute(
+                f'SELECT hash, label, score, accessed FROM results '
+                f'WHERE namespace = ? AND hash IN ({marks}) AND label IS NOT NULL',
+                [namespace] + chunk
+            ).fetchall()
+            for key, label, score, accessed in rows:
+                found[key] = {'label': label, 'score': score}
+                if now - accessed > self.touch_interval:
+                    stale.append(key)
+        if stale:
+            self._touch(connection, namespace, stale, now)
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def _touch(self, connection, namespace, keys, now):
+        try:
+            connection.executemany('UPDATE results SET accessed = ? WHERE namespace = ? AND hash = ?',
+                                   [(now, namespace, key) for key in keys])
+        except sqlite3.OperationalError as e:
+            # قاعدة مشغولة بعملية أخرى؛ تحديث وقت الاستخدام ليس ضرورياً
+            print(f"خطأ في تحديث ذاكرة التصنيف: {e}")
+
+    def put_many(self, namespace, results):
+        """حفظ {key: {label, score}}"""
+        if not results:
+            return
+        now = time.time()
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                'INSERT INTO results (namespace, hash, label, score, accessed) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (namespace, hash) DO UPDATE SET label = excluded.label, '
+                'score = excluded.score, accessed = excluded.accessed',
+                [(namespace, key, r['label'], float(r['score']), now) for key, r in results.items()]
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        self._after_write(len(results))
+
+    def get_embedding(self, namespace, key):
+        row = self._connect().execute(
+            'SELECT embedding FROM results WHERE namespace = ? AND hash = ? AND embedding IS NOT NULL',
+            (namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def put_embedding(self, namespace, key, vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        self._connect().execute(
+            'INSERT INTO results (namespace, hash, embedding, accessed) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (namespace, hash) DO UPDATE SET embedding = excluded.embedding, '
+            'accessed = excluded.accessed',
+            (namespace, key, vector.tobytes(), time.time())
+        )
+        self._after_write(1)
+
+    def _after_write(self, count):
+        with self._lock:
+            self._writes_since_trim += count
+            # عد الصفوف مكلف فلا يتم بعد كل كتابة
+            if self._writes_since_trim < max(1, self.max_entries // 100):
+                return
+            self._writes_since_trim = 0
+        self.trim()
+
+    def trim(self):
+        """حذف الأقدم استخداماً حتى يعود الحجم إلى 90% من الحد"""
+        connection = self._connect()
+        count = connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        if count <= self.max_entries:
+            return 0
+        excess = count - int(self.max_entries * 0.9)
+        connection.execute(
+            'DELETE FROM results WHERE (namespace, hash) IN '
+            '(SELECT namespace, hash FROM results ORDER BY accessed LIMIT ?)',
+            (excess,)
+        )
+        with self._lock:
+            self.evicted += excess
+        return excess
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evicted': self.evicted,
+            'hit_rate': self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0
+        }
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
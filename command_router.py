@@ -0,0 +1,106 @@
+import threading
+from collections import OrderedDict
+
+from arabic_text import normalize_arabic, tokenize, PREFIXES
+
+
+class CommandRouter:
+    """توجيه الأوامر على مراحل: مطابقة الكلمات المفتاحية أولاً ثم النموذج عند الحاجة فقط
+
+    الكلمات المفتاحية (وعبارات من عدة كلمات) محفوظة في شجرة بادئات على مستوى
+    الكلمات الموحدة، والكلمة الأولى من العبارة تُجرب أيضاً بعد حذف سابقة
+    (و، ب، ال...). فتُحل معظم الأوامر بعمليات بحث في قاموس دون تشغيل النموذج،
+    ونتائج النموذج تُحفظ في ذاكرة LRU للعبارات المتكررة.
+    """
+
+    # مفتاح نهاية العبارة في عقد الشجرة (لا يتعارض مع أي كلمة)
+    END = None
+
+    def __init__(self, commands, classifier, cache_size=512):
+        self.classifier = classifier
+        self.cache_size = cache_size
+        self.trie = {}
+        for phrase, command in commands.items():
+            node = self.trie
+            for word in tokenize(phrase):
+                node = node.setdefault(word, {})
+            node[self.END] = command
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.keyword_hits = 0
+        self.model_calls = 0
+        self.cache_hits = 0
+
+    def match(self, text):
+        """الأمر المقابل لأول عبارة مفتاحية في النص، أو None"""
+        return self.split(text)[0]
+
+    def split(self, text):
+        """(الأمر، باقي النص الأصلي دون عبارة الأمر وسابقتها)؛ الباقي هو النص كاملاً إذا لم تتطابق"""
+        words = text.split()
+        tokens = [normalize_arabic(word) for word in words]
+        for start, token in enumerate(tokens):
+            for first in self._variants(token):
+                found = self._walk(first, tokens, start)
+                if found is not None:
+                    command, end = found
+                    return command, ' '.join(words[:start] + words[end:])
+        return None, text.strip()
+
+    @staticmethod
+    def _variants(token):
+        yield token
+        for prefix in PREFIXES:
+            if token.startswith(prefix) and len(token) > len(prefix):
+                yield token[len(prefix):]
+
+    def _walk(self, first, tokens, start):
+        """أطول عبارة في الشجرة تبدأ عند الكلمة start: (الأمر، موضع نهايتها) أو None"""
+        node = self.trie.get(first)
+        found = None
+        end = start + 1
+        while node is not None:
+            if self.END in node:
+                found = (node[self.END], end)
+            if end >= len(tokens):
+                break
+            node = node.get(tokens[end])
+            end += 1
+        return found
+
+    def classify(self, text):
+        """نتيجة النموذج للنص مع ذاكرة LRU للعبارات المتكررة"""
+        key = normalize_arabic(text).strip()
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return result
+        self.model_calls += 1
+        result = self.classifier(text)[0]
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def route(self, text, need_confidence=False):
+        """إرجاع (الأمر، الثقة، باقي النص)
+
+        الثقة 1.0 للمطابقة المباشرة، و None لنص بلا أمر؛ النموذج يعمل فقط إذا طُلبت ثقته.
+        """
+        command, rest = self.split(text)
+        if command is not None:
+            self.keyword_hits += 1
+        if need_confidence:
+            return command, self.classify(text)['score'], rest
+        return command, 1.0 if command is not None else None, rest
+
+    def stats(self):
+        return {
+            'keyword_hits': self.keyword_hits,
+            'model_calls': self.model_calls,
+            'cache_hits': self.cache_hits,
+            'cache_size': len(self._cache)
+        }
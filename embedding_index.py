@@ -0,0 +1,268 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+FORMAT_VERSION = 1
+# صفوف المصفوفة التي تُحوّل إلى float32 معاً أثناء البحث الكامل
+SCAN_CHUNK = 8192
+
+
+def normalize_rows(vectors):
+    """متجهات بطول 1 حتى يكون الضرب النقطي تشابه جيب التمام"""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def top_k(scores, k):
+    """أرقام أعلى k قيم مرتبة تنازلياً دون ترتيب كل القيم"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best], kind='stable')]
+
+
+class EmbeddingIndex:
+    """فهرس متجهات دلالية لقاعدة المعرفة في مصفوفة float16 مربوطة بالذاكرة
+
+    الملفات:
+    - <path>.f16: المصفوفة (السعة × البعد) تكبر بالمضاعفة
+    - <path>.keys: بصمة نص كل صف، سطر لكل صف يُكتب بعد المتجه
+    - <path>.json: البعد والنموذج؛ تغيير أي منهما يعيد بناء الفهرس
+
+    البحث ضرب نقطي مجمّع على كل الصفوف، أو على أقرب القوائم فقط (IVF)
+    عندما يتجاوز الحجم ivf_threshold، لأن تحويل float16 إلى float32 هو الكلفة الأكبر.
+    """
+
+    def __init__(self, path, model=None, ivf_threshold=5000, nprobe=16, initial_capacity=1024):
+        self.path = path
+        self.model = model
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.initial_capacity = initial_capacity
+
+        self._lock = threading.RLock()
+        self.dim = None
+        self.keys = []
+        self.rows = {}
+        self.matrix = None
+        self._keys_file = None
+        # مجموع كل الصفوف لحساب متوسط التشابه؛ يُحسب عند أول حاجة ثم يُحدّث مع الإضافة
+        self._sum = None
+
+        # IVF: مراكز القوائم وأرقام الصفوف في كل قائمة
+        self.centroids = None
+        self.lists = None
+        self._trained_size = 0
+        self.exact_searches = 0
+        self.ivf_searches = 0
+        self._load()
+
+    @property
+    def matrix_path(self):
+        return self.path + '.f16'
+
+    @property
+    def keys_path(self):
+        return self.path + '.keys'
+
+    @property
+    def meta_path(self):
+        return self.path + '.json'
+
+    def _load(self):
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return
+        if meta.get('format') != FORMAT_VERSION or (self.model and meta.get('model') != self.model):
+            # نموذج مختلف يعني متجهات غير قابلة للمقارنة
+            self.reset()
+            return
+        self.dim = meta['dim']
+        if os.path.exists(self.keys_path):
+            with open(self.keys_path, 'r', encoding='utf-8') as f:
+                self.keys = [line.strip() for line in f if line.strip()]
+        capacity = os.path.getsize(self.matrix_path) // (2 * self.dim) if os.path.exists(self.matrix_path) else 0
+        if len(self.keys) > capacity:
+            # مفاتيح بلا متجهات (توقف أثناء تكبير الملف) لا تُعتمد
+            del self.keys[capacity:]
+            with open(self.keys_path, 'w', encoding='utf-8') as f:
+                f.writelines(key + '\n' for key in self.keys)
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        if capacity:
+            self.matrix = np.memmap(self.matrix_path, dtype=np.float16, mode='r+', shape=(capacity, self.dim))
+
+    def reset(self):
+        """حذف الفهرس بالكامل"""
+        with self._lock:
+            self.close()
+            for path in (self.matrix_path, self.keys_path, self.meta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.dim = None
+            self.keys = []
+            self.rows = {}
+            self.centroids = None
+            self.lists = None
+            self._trained_size = 0
+            self._sum = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def _ensure_capacity(self, count):
+        capacity = 0 if self.matrix is None else self.matrix.shape[0]
+        if count <= capacity:
+            return
+        new_capacity = max(self.initial_capacity, capacity)
+        while new_capacity < count:
+            new_capacity *= 2
+        if self.matrix is not None:
+            self.matrix.flush()
+            self.matrix = None
+        with open(self.matrix_path, 'ab') as f:
+            f.truncate(new_capacity * self.dim * 2)
+        self.matrix = np.memmap(self.matrix_path, dtype=np.float16, mode='r+', shape=(new_capacity, self.dim))
+
+    def add_many(self, keys, vectors):
+        """إضافة متجهات جديدة (المفاتيح الموجودة تُتجاهل)؛ ترجع عدد الصفوف المضافة"""
+        vectors = normalize_rows(vectors)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.meta_path, 'w', encoding='utf-8') as f:
+                    json.dump({'format': FORMAT_VERSION, 'dim': self.dim, 'model': self.model}, f)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"بعد المتجه {vectors.shape[1]} لا يطابق الفهرس ({self.dim})")
+
+            new = [(key, vector) for key, vector in zip(keys, vectors) if key not in self.rows]
+            if not new:
+                return 0
+            start = len(self.keys)
+            self._ensure_capacity(start + len(new))
+            self.matrix[start:start + len(new)] = np.stack([vector for _, vector in new])
+            self.matrix.flush()
+            if self._sum is not None:
+                self._sum += np.asarray(self.matrix[start:start + len(new)], dtype=np.float64).sum(axis=0)
+
+            if self._keys_file is None:
+                self._keys_file = open(self.keys_path, 'a', encoding='utf-8')
+            for offset, (key, vector) in enumerate(new):
+                self._keys_file.write(key + '\n')
+                self.rows[key] = start + offset
+                self.keys.append(key)
+                if self.lists is not None:
+                    self.lists[int(np.argmax(self.centroids @ vector))].append(start + offset)
+            self._keys_file.flush()
+            return len(new)
+
+    def _scan(self, queries, rows=None):
+        """تشابه الاستعلامات مع كل الصفوف (أو الصفوف المحددة) على دفعات float32"""
+        if rows is not None:
+            return np.asarray(self.matrix[rows], dtype=np.float32) @ queries.T
+        count = len(self.keys)
+        scores = np.empty((count, len(queries)), dtype=np.float32)
+        for start in range(0, count, SCAN_CHUNK):
+            end = min(start + SCAN_CHUNK, count)
+            scores[start:end] = np.asarray(self.matrix[start:end], dtype=np.float32) @ queries.T
+        return scores
+
+    def search(self, vectors, k=5, exact=None):
+        """أعلى k صفوف لكل متجه استعلام: [[(key, score), ...], ...]"""
+        queries = normalize_rows(vectors)
+        with self._lock:
+            if not self.keys:
+                return [[] for _ in queries]
+            if exact is None:
+                exact = len(self.keys) < self.ivf_threshold
+            if not exact and (self.lists is None or len(self.keys) >= 2 * self._trained_size):
+                self.build_ivf()
+
+            results = []
+            if exact:
+                self.exact_searches += len(queries)
+                scores = self._scan(queries)
+                for column in range(len(queries)):
+                    best = top_k(scores[:, column], k)
+                    results.append([(self.keys[row], float(scores[row, column])) for row in best])
+                return results
+
+            self.ivf_searches += len(queries)
+            probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :self.nprobe]
+            for query, lists in zip(queries, probes):
+                rows = np.concatenate([np.asarray(self.lists[i], dtype=np.intp) for i in lists])
+                scores = self._scan(query[np.newaxis, :], rows)[:, 0]
+                best = top_k(scores, k)
+                results.append([(self.keys[rows[i]], float(scores[i])) for i in best])
+            return results
+
+    def mean_similarity(self, vectors):
+        """متوسط تشابه كل استعلام مع كل الصفوف، خط أساس لمعايرة درجات search
+
+        متجهات النموذج كلها متقاربة الاتجاه، فالتشابه المطلق لا يعني الكثير وحده.
+        """
+        queries = normalize_rows(vectors)
+        with self._lock:
+            count = len(self.keys)
+            if not count:
+                return np.zeros(len(queries), dtype=np.float32)
+            if self._sum is None:
+                self._sum = np.zeros(self.dim, dtype=np.float64)
+                for start in range(0, count, SCAN_CHUNK):
+                    end = min(start + SCAN_CHUNK, count)
+                    self._sum += np.asarray(self.matrix[start:end], dtype=np.float64).sum(axis=0)
+            return (queries @ (self._sum / count)).astype(np.float32)
+
+    def build_ivf(self, n_lists=None, iterations=8, sample_size=20000, seed=0):
+        """تقسيم الصفوف إلى قوائم بـ k-means على عينة؛ البحث يمر على nprobe قائمة فقط"""
+        with self._lock:
+            count = len(self.keys)
+            n_lists = min(count, n_lists or max(1, int(np.sqrt(count))))
+            rng = np.random.default_rng(seed)
+            sample_rows = np.sort(rng.choice(count, min(count, max(sample_size, n_lists)), replace=False))
+            sample = np.asarray(self.matrix[sample_rows], dtype=np.float32)
+            centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+            for _ in range(iterations):
+                assign = np.argmax(sample @ centroids.T, axis=1)
+                for i in range(n_lists):
+                    members = sample[assign == i]
+                    if len(members):
+                        centroids[i] = members.mean(axis=0)
+                centroids = normalize_rows(centroids)
+
+            lists = [[] for _ in range(n_lists)]
+            for start in range(0, count, SCAN_CHUNK):
+                end = min(start + SCAN_CHUNK, count)
+                block = np.asarray(self.matrix[start:end], dtype=np.float32)
+                for row, i in enumerate(np.argmax(block @ centroids.T, axis=1), start):
+                    lists[i].append(row)
+            self.centroids = centroids
+            self.lists = lists
+            self._trained_size = count
+
+    def stats(self):
+        return {
+            'items': len(self.keys),
+            'dim': self.dim or 0,
+            'ivf_lists': len(self.lists) if self.lists is not None else 0,
+            'exact_searches': self.exact_searches,
+            'ivf_searches': self.ivf_searches
+        }
+
+    def close(self):
+        with self._lock:
+            if self._keys_file is not None:
+                self._keys_file.close()
+                self._keys_file = None
+            if self.matrix is not None:
+                self.matrix.flush()
+                self.matrix = None
@@ -0,0 +1,39 @@
+class EntityPool:
+    """مجمع كيانات يعيد استخدام الكيانات المخفية بدل إنشاء كيانات Ursina جديدة"""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.free = []
+        self.created = 0
+        self.reused = 0
+
+    def prewarm(self, count):
+        """إنشاء كيانات مسبقاً قبل الحاجة إليها"""
+        for _ in range(count):
+            self.release(self._create())
+
+    def _create(self):
+        self.created += 1
+        return self.factory()
+
+    def acquire(self):
+        """أخذ كيان من المجمع أو إنشاء كيان جديد إذا كان فارغاً"""
+        if self.free:
+            entity = self.free.pop()
+            self.reused += 1
+        else:
+            entity = self._create()
+        entity.enabled = True
+        return entity
+
+    def release(self, entity):
+        """إخفاء الكيان وإرجاعه إلى المجمع"""
+        entity.enabled = False
+        self.free.append(entity)
+
+    def stats(self):
+        return {
+            'created': self.created,
+            'reused': self.reused,
+            'free': len(self.free)
+        }
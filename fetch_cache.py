@@ -0,0 +1,96 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class FetchCache:
+    """ذاكرة مؤقتة لنتائج الجلب مفهرسة ببصمة الاستعلام أو الرابط مع مدة صلاحية
+
+    العناصر المنتهية تبقى محفوظة مع ETag و Last-Modified لإعادة التحقق منها
+    بطلب شرطي بدل تنزيلها من جديد.
+    """
+
+    def __init__(self, ttl=3600, max_entries=2048, clock=time.time):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    @staticmethod
+    def key(*parts):
+        return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+    def lookup(self, key):
+        """العنصر المخزن حتى لو انتهت صلاحيته"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def is_fresh(self, entry):
+        return entry is not None and entry['expires'] > self.clock()
+
+    def get(self, key):
+        """القيمة إذا كانت صالحة مع تحديث عدادات الإصابة"""
+        entry = self.lookup(key)
+        fresh = self.is_fresh(entry)
+        with self._lock:
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry['value'] if fresh else None
+
+    def put(self, key, value, headers=None):
+        headers = headers or {}
+        with self._lock:
+            self._entries[key] = {
+                'value': value,
+                'etag': headers.get('ETag') or headers.get('etag'),
+                'last_modified': headers.get('Last-Modified') or headers.get('last-modified'),
+                'expires': self.clock() + self.ttl
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def validation_headers(self, entry):
+        """ترويسات الطلب الشرطي لعنصر منتهي الصلاحية"""
+        headers = {}
+        if entry is not None:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def mark_revalidated(self, key):
+        """الخادم أكد أن المحتوى لم يتغير (304)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['expires'] = self.clock() + self.ttl
+            self.revalidated += 1
+
+    def get_or_compute(self, key, compute):
+        """إرجاع القيمة المخزنة أو حسابها وتخزينها"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidated': self.revalidated
+        }
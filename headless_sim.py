@@ -0,0 +1,227 @@
+import argparse
+import multiprocessing
+import time
+
+import numpy as np
+
+try:
+    import gymnasium as gym
+    from gymnasium import spaces
+except ImportError:
+    gym = None
+
+from q_checkpoint import QCheckpoint
+from q_engine import (QLearningEngine, STATES, ACTIONS, STATE_IDS, ACTION_IDS,
+                      ATTACK_RANGE, CHASE_RANGE, FLEE_RANGE, AI_TICK_RATE)
+
+PATROL = STATE_IDS['patrol']
+CHASE = STATE_IDS['chase']
+ATTACK = STATE_IDS['attack']
+FLEE = STATE_IDS['flee']
+
+MOVE_FORWARD = ACTION_IDS['move_forward']
+MOVE_BACK = ACTION_IDS['move_back']
+TURN_LEFT = ACTION_IDS['turn_left']
+TURN_RIGHT = ACTION_IDS['turn_right']
+ATTACK_ACTION = ACTION_IDS['attack']
+
+
+def states_from_distance(dist, health):
+    """نفس قواعد AIEnemy.get_state لمصفوفة من المسافات"""
+    states = np.full(dist.shape, PATROL, dtype=np.intp)
+    states[(dist < FLEE_RANGE) & (health < 50)] = FLEE
+    states[dist < CHASE_RANGE] = CHASE
+    states[dist < ATTACK_RANGE] = ATTACK
+    return states
+
+
+class EnemySimulation:
+    """محاكاة بدون واجهة لمنطق AIEnemy بخطوة زمنية ثابتة dt
+
+    عدة بيئات مستقلة، في كل منها لاعب وعدد من الأعداء، تتقدم معاً بمصفوفات
+    NumPy دون الحاجة إلى Ursina أو نافذة عرض.
+    """
+
+    def __init__(self, n_envs=1, n_enemies=5, dt=1 / AI_TICK_RATE, engine=None, speed=2,
+                 turn_speed=100, player_speed=5, world_size=40, seed=None):
+        self.n_envs = n_envs
+        self.n_enemies = n_enemies
+        self.dt = dt
+        self.speed = speed
+        self.turn_speed = turn_speed
+        self.player_speed = player_speed
+        self.world_size = world_size
+        self.rng = np.random.default_rng(seed)
+
+        self.engine = engine or QLearningEngine(shared=True, seed=seed)
+        self.agents = np.array([self.engine.register() for _ in range(n_envs * n_enemies)])
+        self.learn = True
+        self.reset()
+
+    def reset(self):
+        """إعادة الأعداء إلى مواقع عشوائية كما في AIEnemy.respawn"""
+        shape = (self.n_envs, self.n_enemies)
+        self.position = np.zeros(shape + (3,))
+        self.position[..., 0] = self.rng.uniform(-self.world_size, self.world_size, shape)
+        self.position[..., 1] = 1
+        self.position[..., 2] = self.rng.uniform(-self.world_size, self.world_size, shape)
+        self.rotation_y = np.zeros(shape)
+        self.health = np.full(shape, 100.0)
+
+        self.player = np.zeros((self.n_envs, 3))
+        self.player[:, 1] = 1
+        self.player_heading = self.rng.uniform(0, 2 * np.pi, self.n_envs)
+        self.steps = 0
+
+    def distances(self):
+        return np.linalg.norm(self.position - self.player[:, np.newaxis, :], axis=-1)
+
+    def observe(self):
+        """الحالة الحالية لكل عدو"""
+        return states_from_distance(self.distances(), self.health)
+
+    def apply_actions(self, actions, dist):
+        """نفس تأثير AIEnemy.execute_action مع إرجاع المكافآت"""
+        heading = np.radians(self.rotation_y)
+        forward = np.stack([np.sin(heading), np.zeros_like(heading), np.cos(heading)], axis=-1)
+        direction = (actions == MOVE_FORWARD).astype(float) - (actions == MOVE_BACK)
+        self.position += forward * (direction * self.dt * self.speed)[..., np.newaxis]
+
+        turn = (actions == TURN_RIGHT).astype(float) - (actions == TURN_LEFT)
+        self.rotation_y += turn * self.dt * self.turn_speed
+
+        hit = (actions == ATTACK_ACTION) & (dist < ATTACK_RANGE)
+        return np.where(hit, np.where(self.health < 50, -10.0, 10.0), 0.0)
+
+    def look_at_player(self, mask):
+        """توجيه الأعداء المطاردين نحو اللاعب مثل look_at"""
+        delta = self.player[:, np.newaxis, :] - self.position
+        target = np.degrees(np.arctan2(delta[..., 0], delta[..., 2]))
+        self.rotation_y = np.where(mask, target, self.rotation_y)
+
+    def move_player(self):
+        """حركة عشوائية للاعب داخل حدود العالم"""
+        self.player_heading += self.rng.normal(0, 0.2, self.n_envs)
+        step = self.player_speed * self.dt
+        self.player[:, 0] += np.sin(self.player_heading) * step
+        self.player[:, 2] += np.cos(self.player_heading) * step
+        limit = self.world_size
+        ground = self.player[:, [0, 2]]
+        self.player_heading[np.abs(ground).max(axis=1) > limit] += np.pi
+        self.player[:, [0, 2]] = np.clip(ground, -limit, limit)
+
+    def step(self, actions=None):
+        """خطوة زمنية واحدة لكل البيئات: اختيار الإجراء ثم تنفيذه ثم التعلم"""
+        dead = self.health <= 0
+        if dead.any():
+            self.position[dead, 0] = self.rng.uniform(-self.world_size, self.world_size, dead.sum())
+            self.position[dead, 2] = self.rng.uniform(-self.world_size, self.world_size, dead.sum())
+            self.health[dead] = 100
+
+        dist = self.distances()
+        states = states_from_distance(dist, self.health)
+        if actions is None:
+            actions = self.engine.choose_actions(self.agents, states.ravel())
+        actions = np.asarray(actions, dtype=np.intp).reshape(states.shape)
+
+        rewards = self.apply_actions(actions, dist)
+        next_states = self.observe()
+        if self.learn:
+            self.engine.update(self.agents, states.ravel(), actions.ravel(),
+                               rewards.ravel(), next_states.ravel())
+
+        self.look_at_player((states == CHASE) | (states == ATTACK))
+        self.move_player()
+        self.steps += 1
+        return states, actions, rewards, next_states
+
+    def run_episodes(self, steps_per_episode=300):
+        """حلقة واحدة من الحلقات المتوازية (حلقة لكل بيئة) وإرجاع مجموع المكافآت"""
+        self.reset()
+        total = np.zeros(self.n_envs)
+        for _ in range(steps_per_episode):
+            _, _, rewards, _ = self.step()
+            total += rewards.sum(axis=1)
+        return total
+
+
+def _train_worker(args):
+    episodes, n_envs, n_enemies, steps, seed = args
+    sim = EnemySimulation(n_envs=n_envs, n_enemies=n_enemies, seed=seed)
+    rewards = []
+    for _ in range(max(1, episodes // n_envs)):
+        rewards.extend(sim.run_episodes(steps))
+    return sim.engine.table(), rewards
+
+
+def train(episodes=10000, workers=None, n_envs=256, n_enemies=5, steps=300, seed=0):
+    """تدريب متوازٍ على عدة عمليات ثم دمج الجداول بأخذ المتوسط"""
+    workers = workers or multiprocessing.cpu_count()
+    per_worker = max(1, episodes // workers)
+    jobs = [(per_worker, min(n_envs, per_worker), n_enemies, steps, seed + i) for i in range(workers)]
+    if workers == 1:
+        results = [_train_worker(jobs[0])]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(_train_worker, jobs)
+    table = np.mean([result[0] for result in results], axis=0)
+    rewards = [reward for result in results for reward in result[1]]
+    return table, rewards
+
+
+def export_q_table(table, path):
+    """حفظ جدول Q المدرب كنقطة حفظ بإصدار جديد تحملها اللعبة (حتى أثناء تشغيلها)"""
+    checkpoint = QCheckpoint(path)
+    checkpoint.save(table)
+    return checkpoint.version
+
+
+if gym is not None:
+    class EnemyEnv(gym.Env):
+        """بيئة Gymnasium لعدو واحد: الملاحظة هي الحالة والإجراء أحد إجراءات AIEnemy"""
+
+        metadata = {'render_modes': []}
+
+        def __init__(self, max_steps=300, dt=1 / AI_TICK_RATE):
+            self.max_steps = max_steps
+            self.dt = dt
+            self.observation_space = spaces.Discrete(len(STATES))
+            self.action_space = spaces.Discrete(len(ACTIONS))
+            self.sim = None
+
+        def reset(self, seed=None, options=None):
+            super().reset(seed=seed)
+            self.sim = EnemySimulation(n_envs=1, n_enemies=1, dt=self.dt,
+                                       seed=int(self.np_random.integers(2 ** 31)))
+            self.sim.learn = False
+            return int(self.sim.observe()[0, 0]), {}
+
+        def step(self, action):
+            _, _, rewards, next_states = self.sim.step(np.array([[action]]))
+            truncated = self.sim.steps >= self.max_steps
+            return int(next_states[0, 0]), float(rewards[0, 0]), False, truncated, {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='تدريب الأعداء بدون واجهة وتصدير جدول Q للعبة')
+    parser.add_argument('--episodes', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--envs', type=int, default=256, help='عدد البيئات المتوازية في كل عملية')
+    parser.add_argument('--enemies', type=int, default=5)
+    parser.add_argument('--steps', type=int, default=300, help='عدد الخطوات في كل حلقة')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='enemy_q.npy')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    table, rewards = train(args.episodes, args.workers, args.envs, args.enemies, args.steps, args.seed)
+    elapsed = time.perf_counter() - started
+    version = export_q_table(table, args.out)
+
+    print(f'تم تدريب {len(rewards)} حلقة في {elapsed:.1f} ثانية ({len(rewards) / elapsed:.0f} حلقة/ثانية)')
+    print(f'متوسط المكافأة: {np.mean(rewards):.2f}')
+    print(f'تم حفظ جدول Q (الإصدار {version}) في: {args.out}')
+
+
+if __name__ == '__main__':
+    main()
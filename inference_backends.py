@@ -0,0 +1,218 @@
+import os
+
+import numpy as np
+
+from model_service import BACKEND_ENV
+
+# مقاطع التعلم لا تتجاوز 1000 حرف (~180 كلمة عربية ≈ 250 قطعة BERT)، فلا داعي لـ 512
+MAX_LENGTH = 256
+ONNX_FILES = ('model.int8.onnx', 'model.onnx')
+
+
+def softmax(logits):
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def top_labels(logits, id2label):
+    """تحويل مخرجات النموذج إلى [{label, score}] كما يفعل pipeline"""
+    probs = softmax(np.asarray(logits, dtype=np.float32))
+    best = probs.argmax(axis=-1)
+    return [{'label': id2label[int(i)], 'score': float(probs[row, i])} for row, i in enumerate(best)]
+
+
+def mean_pool(hidden, mask):
+    """متوسط متجهات آخر طبقة للقطع الحقيقية فقط (بدون الحشو)"""
+    mask = np.asarray(mask, dtype=np.float32)[..., np.newaxis]
+    return (np.asarray(hidden, dtype=np.float32) * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1.0)
+
+
+def onnx_file(model_dir):
+    """ملف ONNX داخل المجلد (المكمّم أولاً)، أو None"""
+    if not os.path.isdir(model_dir):
+        return None
+    for name in ONNX_FILES:
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+class PipelineBackend:
+    """النموذج الأصلي fp32 عبر transformers.pipeline"""
+
+    name = 'pipeline'
+    supports_embeddings = True
+
+    def __init__(self, model_name, max_length=MAX_LENGTH):
+        from transformers import pipeline
+        self.max_length = max_length
+        self.pipeline = pipeline('text-classification', model=model_name)
+
+    def __call__(self, texts, truncation=True):
+        return self.pipeline(texts, truncation=truncation, max_length=self.max_length)
+
+    def embed(self, texts):
+        """متجه لكل نص من نفس النموذج المحمّل (متوسط آخر طبقة في BERT)"""
+        import torch
+        inputs = self.pipeline.tokenizer(list(texts), padding=True, truncation=True,
+                                         max_length=self.max_length, return_tensors='pt')
+        with torch.inference_mode():
+            hidden = self.pipeline.model.base_model(**inputs).last_hidden_state
+        return mean_pool(hidden.numpy(), inputs['attention_mask'].numpy())
+
+
+class QuantizedBackend:
+    """تكميم ديناميكي INT8 لطبقات Linear في PyTorch (بدون إعادة تدريب)"""
+
+    name = 'int8'
+    supports_embeddings = True
+
+    def __init__(self, model_name, max_length=MAX_LENGTH, threads=None):
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.torch = torch
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+        self.model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.id2label = model.config.id2label
+
+    def __call__(self, texts, truncation=True):
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        inputs = self.tokenizer(texts, padding=True, truncation=truncation,
+                                max_length=self.max_length, return_tensors='pt')
+        with self.torch.inference_mode():
+            logits = self.model(**inputs).logits
+        return top_labels(logits.numpy(), self.id2label)
+
+    def embed(self, texts):
+        inputs = self.tokenizer(list(texts), padding=True, truncation=True,
+                                max_length=self.max_length, return_tensors='pt')
+        with self.torch.inference_mode():
+            hidden = self.model.base_model(**inputs).last_hidden_state
+        return mean_pool(hidden.numpy(), inputs['attention_mask'].numpy())
+
+
+class OnnxBackend:
+    """تشغيل النموذج المصدّر بـ ONNX Runtime على المعالج؛ لا يحتاج torch"""
+
+    name = 'onnx'
+
+    def __init__(self, model_dir, max_length=MAX_LENGTH, threads=None):
+        import onnxruntime
+        from transformers import AutoConfig, AutoTokenizer
+
+        path = onnx_file(model_dir)
+        if path is None:
+            raise FileNotFoundError(f"لا يوجد ملف ONNX في {model_dir}، استخدم export_onnx أولاً")
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.output_names = [o.name for o in self.session.get_outputs()]
+        # ملفات ONNX المصدّرة قبل إضافة مخرج embedding تصنف فقط
+        self.supports_embeddings = 'embedding' in self.output_names
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.id2label = AutoConfig.from_pretrained(model_dir).id2label
+
+    def _feed(self, texts, truncation=True):
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        inputs = self.tokenizer(texts, padding=True, truncation=truncation,
+                                max_length=self.max_length, return_tensors='np')
+        return {name: value.astype(np.int64) for name, value in inputs.items() if name in self.input_names}
+
+    def __call__(self, texts, truncation=True):
+        logits = self.session.run(self.output_names[:1], self._feed(texts, truncation))[0]
+        return top_labels(logits, self.id2label)
+
+    def embed(self, texts):
+        if not self.supports_embeddings:
+            raise RuntimeError("ملف ONNX بدون مخرج embedding، أعد التصدير بـ export_onnx")
+        return self.session.run(['embedding'], self._feed(texts))[0]
+
+
+def export_onnx(model_name, out_dir, quantize=True, opset=14):
+    """تصدير النموذج مرة واحدة إلى ONNX مع المحلل والإعدادات، واختيارياً نسخة INT8"""
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    sample = tokenizer(['نص للتصدير'], return_tensors='pt')
+    names = list(sample.keys())
+    axes = {name: {0: 'batch', 1: 'sequence'} for name in names}
+    axes['logits'] = {0: 'batch'}
+    axes['embedding'] = {0: 'batch'}
+
+    class WithEmbedding(torch.nn.Module):
+        # مخرج ثانٍ بمتوسط آخر طبقة لفهرس المعرفة الدلالي دون نموذج منفصل
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            kwargs = dict(zip(names, inputs))
+            outputs = self.model(**kwargs, output_hidden_states=True)
+            mask = kwargs['attention_mask'].unsqueeze(-1).to(outputs.hidden_states[-1].dtype)
+            embedding = (outputs.hidden_states[-1] * mask).sum(1) / mask.sum(1).clamp(min=1.0)
+            return outputs.logits, embedding
+
+    path = os.path.join(out_dir, 'model.onnx')
+    with torch.inference_mode():
+        torch.onnx.export(WithEmbedding().eval(), tuple(sample[name] for name in names), path,
+                          input_names=names, output_names=['logits', 'embedding'],
+                          dynamic_axes=axes, opset_version=opset)
+    tokenizer.save_pretrained(out_dir)
+    model.config.save_pretrained(out_dir)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(path, os.path.join(out_dir, 'model.int8.onnx'), weight_type=QuantType.QInt8)
+    return out_dir
+
+
+BACKENDS = {
+    'pipeline': PipelineBackend,
+    'int8': QuantizedBackend,
+    'onnx': OnnxBackend
+}
+
+
+def resolve_backend(model_name, backend=None):
+    """اسم الخلفية الفعلي: من المعامل أو متغير البيئة، وتلقائياً ONNX إذا وُجد ملفه في مجلد النموذج"""
+    backend = backend or os.environ.get(BACKEND_ENV, 'auto')
+    if backend == 'auto':
+        backend = 'onnx' if onnx_file(model_name) else 'pipeline'
+    if backend not in BACKENDS:
+        raise ValueError(f"خلفية استدلال غير معروفة: {backend}")
+    return backend
+
+
+def load_backend(model_name, backend=None, **options):
+    """تحميل خلفية الاستدلال المختارة (انظر resolve_backend)"""
+    return BACKENDS[resolve_backend(model_name, backend)](model_name, **options)
+
+
+def main():
+    import argparse
+    from model_service import default_model_name
+
+    parser = argparse.ArgumentParser(description='تصدير نموذج التصنيف إلى ONNX')
+    parser.add_argument('--model', default=None)
+    parser.add_argument('--out', default='model')
+    parser.add_argument('--no-quantize', action='store_true')
+    args = parser.parse_args()
+    print(export_onnx(args.model or default_model_name(), args.out, quantize=not args.no_quantize))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+import heapq
+import threading
+
+from arabic_text import normalize_arabic, tokenize
+
+GRAM_SIZE = 3
+
+
+class KnowledgeIndex:
+    """فهرس مقلوب تزايدي لقاعدة المعرفة مبني على كلمات عربية موحدة"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.items = []
+            # ترتيب كل عنصر كما يظهر عند المرور على قاعدة المعرفة (الفئة ثم الموضع)
+            self.order = []
+            self.category_rank = {}
+            self.category_size = {}
+            # كلمة -> أرقام العناصر التي تحتويها
+            self.postings = {}
+            # كلمة -> رقم العنصر الأعلى ثقة الذي يحتويها
+            self.best = {}
+            # مقطع ثلاثي -> الكلمات المفهرسة التي تحتويه (للبحث بجزء من كلمة)
+            self.grams = {}
+            self.max_term_length = 0
+
+    def build(self, knowledge_base):
+        """إعادة بناء الفهرس من قاعدة معرفة كاملة"""
+        with self._lock:
+            self.clear()
+            for category, items in knowledge_base.items():
+                for item in items:
+                    self.add(item, category)
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, item, category=None):
+        """إضافة عنصر جديد إلى الفهرس"""
+        if category is None:
+            category = item.get('category')
+        with self._lock:
+            seq = len(self.items)
+            self.items.append(item)
+            if category not in self.category_rank:
+                self.category_rank[category] = len(self.category_rank)
+                self.category_size[category] = 0
+            self.order.append((self.category_rank[category], self.category_size[category]))
+            self.category_size[category] += 1
+
+            for term in set(tokenize(item['text'])):
+                postings = self.postings.get(term)
+                if postings is None:
+                    postings = self.postings[term] = []
+                    for gram in self._grams(term):
+                        self.grams.setdefault(gram, set()).add(term)
+                    self.max_term_length = max(self.max_term_length, len(term))
+                postings.append(seq)
+                best = self.best.get(term)
+                if best is None or self._rank(seq) < self._rank(best):
+                    self.best[term] = seq
+            return seq
+
+    def _rank(self, seq):
+        # الأعلى ثقة أولاً، وعند التساوي الأسبق في قاعدة المعرفة
+        return (-self.items[seq]['confidence'], self.order[seq])
+
+    def terms_in(self, text):
+        """الكلمات المفهرسة التي تظهر كنص جزئي داخل النص المعطى"""
+        text = normalize_arabic(text)
+        found = set()
+        with self._lock:
+            longest = self.max_term_length
+            for start in range(len(text)):
+                if text[start].isspace():
+                    continue
+                for end in range(start + 1, min(len(text), start + longest) + 1):
+                    if text[end - 1].isspace():
+                        break
+                    if text[start:end] in self.postings:
+                        found.add(text[start:end])
+        return found
+
+    def best_match(self, situation):
+        """العنصر الأعلى ثقة الذي تظهر إحدى كلماته في الموقف (نفس نتيجة apply_knowledge)"""
+        with self._lock:
+            candidates = [self.best[term] for term in self.terms_in(situation)]
+            if not candidates:
+                return None
+            return self.items[min(candidates, key=self._rank)]
+
+    def lookup(self, terms, limit=10):
+        """البحث بكلمة أو أكثر مع ترتيب النتائج حسب الثقة"""
+        if isinstance(terms, str):
+            terms = tokenize(terms)
+        with self._lock:
+            matches = set()
+            for term in terms:
+                matches.update(self.postings.get(normalize_arabic(term), ()))
+            ranked = sorted(matches, key=self._rank)
+            return [self.items[seq] for seq in ranked[:limit]]
+
+    @staticmethod
+    def _grams(term):
+        return {term[i:i + GRAM_SIZE] for i in range(len(term) - GRAM_SIZE + 1)}
+
+    def _expand(self, query_term):
+        """الكلمات المفهرسة التي تحتوي كلمة البحث (مثل السمك وبالسمك لكلمة سمك)"""
+        if len(query_term) < GRAM_SIZE:
+            # كلمة قصيرة جداً: المرور على المفردات بدل كل النصوص
+            return [term for term in self.postings if query_term in term]
+        candidates = min((self.grams.get(gram, ()) for gram in self._grams(query_term)), key=len)
+        return [term for term in candidates if query_term in term]
+
+    def search(self, query, limit=1):
+        """العناصر التي تحتوي نص البحث مرتبة حسب ظهورها في قاعدة المعرفة"""
+        query = normalize_arabic(query).strip()
+        with self._lock:
+            if not query:
+                candidates = range(len(self.items))
+            else:
+                candidates = None
+                for query_term in query.split():
+                    matches = set()
+                    for term in self._expand(query_term):
+                        matches.update(self.postings[term])
+                    candidates = matches if candidates is None else candidates & matches
+                    if not candidates:
+                        return []
+
+            # كومة بدل الترتيب الكامل لأن أغلب عمليات البحث تحتاج النتيجة الأولى فقط
+            heap = [(self.order[seq], seq) for seq in candidates]
+            heapq.heapify(heap)
+            results = []
+            while heap:
+                item = self.items[heapq.heappop(heap)[1]]
+                if query in normalize_arabic(item['text']):
+                    results.append(item)
+                    if limit and len(results) >= limit:
+                        break
+            return results
@@ -0,0 +1,150 @@
+import glob
+import json
+import os
+import threading
+
+
+class KnowledgeStore:
+    """تخزين قاعدة المعرفة كسجل إلحاقي (JSONL) مع لقطات ذرية وضغط دوري
+
+    الملفات:
+    - <name>.snapshot.jsonl: لقطة كاملة، السطر الأول رأس يحمل رقم الجيل
+    - <name>.log.<gen>.jsonl: العناصر المضافة بعد لقطة الجيل نفسه
+    - <name>.json: الصيغة القديمة، تُرحّل مرة واحدة ثم تُعاد تسميتها
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, name='knowledge_base', compact_every=500, fsync=False):
+        self.name = name
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.snapshot_path = f'{name}.snapshot.jsonl'
+        self.legacy_path = f'{name}.json'
+
+        self._lock = threading.Lock()
+        self._log = None
+        self.generation = 0
+        self.snapshot_count = 0
+        self.log_count = 0
+
+    def log_path(self, generation=None):
+        if generation is None:
+            generation = self.generation
+        return f'{self.name}.log.{generation}.jsonl'
+
+    def load(self):
+        """قراءة العناصر من اللقطة ثم السجل
+
+        القراءة تتم تحت القفل إلى قائمة، ثم تُسلَّم العناصر خارجه حتى لا يوقف
+        مستهلك بطيء (أو متوقف) الإلحاق والضغط.
+        """
+        with self._lock:
+            items = self._read_items()
+        yield from items
+
+    def _read_items(self):
+        self._close_log()
+        if not os.path.exists(self.snapshot_path) and os.path.exists(self.legacy_path):
+            self._migrate_legacy()
+
+        items = []
+        self.generation = 0
+        self.snapshot_count = 0
+        self.log_count = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                header = self._parse(f.readline())
+                if header:
+                    self.generation = header.get('generation', 0)
+                for line in f:
+                    item = self._parse(line)
+                    if item is not None:
+                        items.append(item)
+            self.snapshot_count = len(items)
+
+        self._remove_stale_logs()
+        if os.path.exists(self.log_path()):
+            with open(self.log_path(), 'r', encoding='utf-8') as f:
+                for line in f:
+                    item = self._parse(line)
+                    if item is not None:
+                        items.append(item)
+        self.log_count = len(items) - self.snapshot_count
+        return items
+
+    @staticmethod
+    def _parse(line):
+        # السطر الأخير قد يكون ناقصاً إذا توقف البرنامج أثناء الكتابة
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    def append(self, item):
+        """إلحاق عنصر واحد بالسجل بتكلفة ثابتة"""
+        with self._lock:
+            if self._log is None:
+                self._log = open(self.log_path(), 'a', encoding='utf-8')
+            self._log.write(json.dumps(item, ensure_ascii=False) + '\n')
+            self._log.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+            self.log_count += 1
+
+    @property
+    def needs_compaction(self):
+        # الضغط عندما يقارب السجل حجم اللقطة يجعل تكلفته ثابتة في المتوسط
+        return self.log_count >= max(self.compact_every, self.snapshot_count)
+
+    def compact(self, knowledge_base):
+        """كتابة لقطة كاملة بشكل ذري ثم بدء سجل جديد"""
+        with self._lock:
+            # نسخة تحت القفل: خيوط التعلم تلحق بالقوائم أثناء الكتابة، وما يُضاف
+            # بعد النسخ ينتظر القفل ثم يُكتب في سجل الجيل الجديد
+            knowledge_base = {category: list(items) for category, items in list(knowledge_base.items())}
+            generation = self.generation + 1
+            self._write_snapshot(knowledge_base, generation)
+            self._close_log()
+            old_log = self.log_path()
+            self.generation = generation
+            self.snapshot_count = sum(len(items) for items in knowledge_base.values())
+            self.log_count = 0
+            if os.path.exists(old_log):
+                os.remove(old_log)
+
+    def close(self):
+        with self._lock:
+            self._close_log()
+
+    def _close_log(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _write_snapshot(self, knowledge_base, generation):
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            header = {'format': self.FORMAT_VERSION, 'generation': generation}
+            f.write(json.dumps(header) + '\n')
+            for category, items in knowledge_base.items():
+                for item in items:
+                    if 'category' not in item:
+                        item = dict(item, category=category)
+                    f.write(json.dumps(item, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _remove_stale_logs(self):
+        # سجلات أجيال سابقة بقيت بعد انقطاع أثناء الضغط ومحتواها موجود في اللقطة
+        for path in glob.glob(f'{glob.escape(self.name)}.log.*.jsonl'):
+            if path != self.log_path():
+                os.remove(path)
+
+    def _migrate_legacy(self):
+        """ترحيل ملف JSON القديم إلى صيغة اللقطة مرة واحدة"""
+        with open(self.legacy_path, 'r', encoding='utf-8') as f:
+            knowledge_base = json.load(f)
+        self._write_snapshot(knowledge_base, 0)
+        os.replace(self.legacy_path, self.legacy_path + '.migrated')
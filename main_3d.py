@@ -1,13 +1,45 @@
+from time import perf_counter
+STARTED_AT = perf_counter()
+
 from ursina import *
 from ursina.prefabs.first_person_controller import FirstPersonController
+import argparse
 import random
 import math
-from ai_enemy import AIEnemy
-from ai_chat import AIChatSystem
+from concurrent.futures import Future
+from threading import Thread
+from ai_enemy import AIEnemy, update_enemies, begin_tick, end_tick, interpolate_enemies
+# قرارات الأعداء والتعلم بمعدل ثابت مهما كان معدل الإطارات (AI_TICK_RATE)
+from q_engine import QLearningEngine, AI_TICK_RATE
+from q_checkpoint import QCheckpoint
+from spatial_hash import SpatialHash
+from entity_pool import EntityPool
+from resource_field import ResourceField
+from chat_worker import ChatWorker
+from metrics import registry, timer, serve_metrics, SnapshotWriter
+from tick_scheduler import TickScheduler
+
+def load_chat_system(isolated=False):
+    """استيراد وبناء نظام المحادثة وتحميل النموذج (يعمل في خيط خلفي)
+
+    مع isolated يعمل النموذج والتعلم من الإنترنت في عملية منفصلة (--isolated-ai)
+    فلا ينافسان حلقة الرسم على GIL، ويُرجع وكيلاً بنفس الواجهة.
+    """
+    if isolated:
+        from ai_process import AIProcess
+        ai_process = AIProcess().start().wait_ready()
+        registry.register_collector('ai_process', ai_process.stats)
+        return ai_process
+    # الاستيراد هنا وليس في أعلى الملف حتى لا تؤخر المكتبات الثقيلة ظهور النافذة
+    from ai_chat import AIChatSystem
+    chat_system = AIChatSystem()
+    # تحميل أوزان النموذج مسبقاً حتى لا تتأخر أول رسالة
+    chat_system.nlp.model
+    return chat_system
 
 # تعريف واجهة المحادثة
 class ChatInterface(Entity):
-    def __init__(self):
+    def __init__(self, isolated=False):
         super().__init__(
             parent=camera.ui,
             model='quad',
@@ -15,25 +47,105 @@ class ChatInterface(Entity):
             position=(0, -0.4),
             color=color.black66
         )
-        self.chat_system = AIChatSystem()
+        self.chat_system = None
+        self.worker = None
+        self.isolated = isolated
+        self.load_error = None
         self.text = Text(
             parent=self,
-            text='اضغط T للمحادثة',
+            text='جاري تحميل الذكاء الاصطناعي...',
             origin=(0, 0),
             scale=2
         )
         self.visible = False
+        
+        # تحميل نظام المحادثة في الخلفية حتى تظهر النافذة فوراً
+        self.start_loading()
+
+    def start_loading(self):
+        self.load_error = None
+        self.loading = Future()
+        Thread(target=self._load, daemon=True).start()
+
+    def _load(self):
+        try:
+            self.loading.set_result(load_chat_system(self.isolated))
+        except Exception as e:
+            print(f"خطأ في تحميل نظام المحادثة: {e}")
+            self.loading.set_exception(e)
+
+    @property
+    def ready(self):
+        return self.chat_system is not None
+
+    def update(self):
+        # استلام نظام المحادثة على خيط الواجهة بعد انتهاء التحميل
+        if self.chat_system is None and self.load_error is None and self.loading.done():
+            if self.loading.exception() is not None:
+                # رسالة الخطأ مرة واحدة؛ الرسالة التالية تعيد محاولة التحميل
+                self.load_error = self.loading.exception()
+                self.text.text = 'تعذر تحميل الذكاء الاصطناعي، أرسل رسالة لإعادة المحاولة'
+            else:
+                self.chat_system = self.loading.result()
+                self.worker = ChatWorker(self.chat_system.get_response)
+                registry.register_collector('chat_worker', self.worker.stats)
+                self.text.text = 'اضغط T للمحادثة'
+        
+        # تسليم الردود الجاهزة دون إيقاف حلقة الإطارات
+        if self.worker is not None:
+            self.worker.poll()
 
     def toggle(self):
         self.visible = not self.visible
+        # إلغاء الطلبات المعلقة عند إغلاق المحادثة
+        if not self.visible and self.worker is not None:
+            self.worker.cancel_all()
 
     def send_message(self, message):
-        response = self.chat_system.get_response(message)
-        self.text.text = response
+        if self.load_error is not None:
+            self.start_loading()
+        if not self.ready:
+            self.text.text = 'جاري تحميل الذكاء الاصطناعي...'
+            return
+        self.text.text = '...'
+        return self.worker.submit(message, callback=self.show_response)
+
+    def show_response(self, response, error):
+        if error is not None:
+            self.text.text = 'عذراً، استغرق الرد وقتاً طويلاً' if isinstance(error, TimeoutError) else 'حدث خطأ في المحادثة'
+        else:
+            self.text.text = response
+
+class StartupProbe(Entity):
+    """قياس زمن أول إطار وزمن جاهزية المحادثة ثم الخروج (--startup-probe)"""
+    def __init__(self, chat_interface, wait_for_chat=False):
+        super().__init__()
+        self.chat_interface = chat_interface
+        self.wait_for_chat = wait_for_chat
+        self.first_frame = None
+
+    def update(self):
+        if self.first_frame is None:
+            self.first_frame = perf_counter() - STARTED_AT
+            print(f'startup first_frame {self.first_frame:.3f}', flush=True)
+        if not self.wait_for_chat or self.chat_interface.loading.done():
+            if self.wait_for_chat:
+                print(f'startup chat_ready {perf_counter() - STARTED_AT:.3f}', flush=True)
+            application.quit()
+
+# جدول Q المدرب (من headless_sim.py أو من جلسات لعب سابقة)
+TRAINED_Q_TABLE = 'enemy_q.npy'
+
+# فوق هذا العدد تُرسم الموارد كشبكة مدمجة واحدة بدل كيان لكل مورد
+INSTANCING_THRESHOLD = 500
 
-app = Ursina()
-window.fullscreen = True
-window.exit_button.visible = False
+# مسافة التقاط الموارد
+PICKUP_RANGE = 3
+
+# الأعداء المعالجون قبل فحص الميزانية (الباقي قد يُؤجل للإطار التالي)
+AI_TICK_CHUNK = 128
+# أقصى زمن لمنطق اللعبة في الإطار الواحد بالثواني
+FRAME_BUDGET = 0.004
 
 class Player(FirstPersonController):
     def __init__(self, **kwargs):
@@ -65,7 +177,7 @@ class Raft(Entity):
         self.scale = (5 * self.size, 0.5, 5 * self.size)
 
 class Resource(Entity):
-    def __init__(self, type='wood'):
+    def __init__(self, type='wood', grid=None):
         super().__init__(
             model='cube',
             scale=0.5,
@@ -73,15 +185,25 @@ class Resource(Entity):
             collider='box'
         )
         self.type = type
+        self.grid = grid
         self.respawn()
 
+    def set_type(self, type):
+        """تغيير نوع المورد عند إعادة استخدامه من المجمع"""
+        self.type = type
+        self.color = color.brown if type == 'wood' else color.gray
+
     def respawn(self):
         x = random.uniform(-20, 20)
         z = random.uniform(-20, 20)
         self.position = (x, 0.5, z)
+        if self.grid is not None:
+            self.grid.move(self, x, z)
 
 class Game(Entity):
-    def __init__(self):
+    def __init__(self, resource_count=40, enemy_count=5, instanced=None,
+                 ai_tick_rate=AI_TICK_RATE, frame_budget=FRAME_BUDGET, isolated_ai=False,
+                 shared_q_table=False):
         super().__init__()
         self.player = Player(position=(0,2,0))
         self.raft = Raft()
@@ -89,17 +211,46 @@ class Game(Entity):
         self.enemies = []
         self.weather = 'sunny'
         
+        # مقاييس حلقة الإطارات
+        self.frame_time = registry.histogram('frame_seconds', 'زمن الإطار الكامل')
+        self.update_time = timer('game_update_seconds', 'زمن منطق اللعبة في الإطار')
+        
+        # الأنظمة الدورية: الذكاء الاصطناعي بمعدل ثابت، وملف جدول Q مرة كل ثانية
+        self.scheduler = TickScheduler(budget=frame_budget)
+        self.ai_system = self.scheduler.add('ai', ai_tick_rate, self.ai_tick)
+        self.scheduler.add('checkpoint', 1, self.checkpoint_tick)
+        registry.register_collector('scheduler', self.scheduler.stats)
+        
+        # شبكات مكانية لاستعلامات القرب بدل المرور على كل الكيانات
+        self.resource_grid = SpatialHash(cell_size=5)
+        self.enemy_grid = SpatialHash(cell_size=5)
+        
+        # الموارد: كيان لكل مورد مع مجمع لإعادة الاستخدام، أو شبكة مدمجة للأعداد الكبيرة
+        if instanced is None:
+            instanced = resource_count > INSTANCING_THRESHOLD
+        self.resource_field = ResourceField(self.resource_grid) if instanced else None
+        self.resource_pool = EntityPool(lambda: Resource(grid=self.resource_grid))
+        
         # إضافة الموارد
-        for _ in range(20):
-            self.resources.append(Resource('wood'))
-            self.resources.append(Resource('metal'))
+        for i in range(resource_count):
+            self.spawn_resource('wood' if i % 2 == 0 else 'metal')
         
-        # إضافة الأعداء
-        for _ in range(5):
-            self.enemies.append(AIEnemy())
+        # إضافة الأعداء (جدول Q لكل عدو، أو جدول مشترك يتعلم منه الجميع مع --shared-q)
+        # البدء من السياسة المدربة بدل قيم عشوائية، مع حفظ دوري في الخلفية
+        self.enemy_engine = QLearningEngine(shared=shared_q_table)
+        self.q_checkpoint = QCheckpoint(TRAINED_Q_TABLE)
+        try:
+            tables = self.q_checkpoint.load()
+            if tables is not None:
+                self.enemy_engine.load_tables(tables)
+        except Exception as e:
+            print(f"خطأ في تحميل جدول Q: {e}")
+        self.enemy_pool = EntityPool(lambda: AIEnemy(engine=self.enemy_engine, grid=self.enemy_grid))
+        for _ in range(enemy_count):
+            self.spawn_enemy()
         
         # إضافة واجهة المحادثة
-        self.chat_interface = ChatInterface()
+        self.chat_interface = ChatInterface(isolated=isolated_ai)
         
         # التعليمات
         self.instructions = Text(
@@ -115,12 +266,82 @@ class Game(Entity):
         )
 
     def update(self):
-        # تحديث حالة اللعبة
-        pass
+        # زمن الإطار كاملاً (من Ursina) وزمن منطق اللعبة وحده
+        self.frame_time.observe(time.dt)
+        with self.update_time:
+            self.scheduler.update(time.dt)
+            interpolate_enemies(self.enemies, self.ai_system.alpha)
+
+    def ai_tick(self, dt):
+        """نبضة ذكاء اصطناعي على دفعات؛ كل yield نقطة يمكن عندها التأجيل للإطار التالي"""
+        enemies = list(self.enemies)
+        for start in range(0, len(enemies), AI_TICK_CHUNK):
+            # عدو أُزيل أثناء تأجيل النبضة يكون قد عاد إلى المجمع
+            chunk = [enemy for enemy in enemies[start:start + AI_TICK_CHUNK] if enemy.enabled]
+            begin_tick(chunk)
+            update_enemies(chunk, self.player, self.enemy_grid, dt)
+            end_tick(chunk)
+            yield
+
+    def checkpoint_tick(self, dt):
+        # تحميل جدول أحدث إذا تغير الملف (مثلاً بعد تدريب جديد) ثم الحفظ الدوري
+        tables = self.q_checkpoint.poll()
+        if tables is not None:
+            self.enemy_engine.load_tables(tables)
+        self.q_checkpoint.maybe_save(self.enemy_engine.tables)
+
+    def spawn_resource(self, type):
+        """إضافة مورد جديد (من المجمع أو من الشبكة المدمجة)"""
+        if self.resource_field is not None:
+            resource = self.resource_field.spawn(type)
+        else:
+            resource = self.resource_pool.acquire()
+            resource.set_type(type)
+            resource.respawn()
+        self.resources.append(resource)
+        return resource
+
+    def collect_resource(self, resource):
+        """التقاط مورد وإعادة ظهوره في مكان آخر"""
+        self.player.inventory[resource.type] += 1
+        if self.resource_field is not None:
+            self.resource_field.respawn(resource)
+        else:
+            self.resources.remove(resource)
+            self.resource_grid.remove(resource)
+            self.resource_pool.release(resource)
+            self.spawn_resource(resource.type)
+
+    def spawn_enemy(self):
+        """إضافة عدو من المجمع"""
+        enemy = self.enemy_pool.acquire()
+        enemy.respawn()
+        self.enemies.append(enemy)
+        return enemy
+
+    def despawn_enemy(self, enemy):
+        """إزالة عدو وإرجاعه إلى المجمع"""
+        self.enemies.remove(enemy)
+        self.enemy_grid.remove(enemy)
+        self.enemy_pool.release(enemy)
+
+    def nearby_resources(self, radius=5):
+        """الموارد القريبة من اللاعب مرتبة حسب المسافة"""
+        found = self.resource_grid.query_radius(self.player.x, self.player.z, radius)
+        return [resource for resource, _ in sorted(found, key=lambda item: item[1])]
+
+    def nearest_enemies(self, k=3, max_radius=None):
+        """أقرب k أعداء إلى اللاعب"""
+        found = self.enemy_grid.nearest(self.player.x, self.player.z, k, max_radius)
+        return [enemy for enemy, _ in found]
 
     def input(self, key):
         if key == 't':
             self.chat_interface.toggle()
+        elif key == 'right mouse down':
+            nearby = self.nearby_resources(PICKUP_RANGE)
+            if nearby:
+                self.collect_resource(nearby[0])
         elif key == 'e':
             self.raft.expand()
         elif key in ['1', '2', '3']:
@@ -142,9 +363,38 @@ class Game(Entity):
             self.weather = 'sunny'
             scene.fog_density = 0
 
-# إعداد البيئة
-game = Game()
-Sky()
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='لعبة البقاء ثلاثية الأبعاد')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='نقطة مقاييس Prometheus محلية مع لقطة metrics.json دورية (مثلاً 9100)')
+    parser.add_argument('--startup-probe', action='store_true', help='قياس زمن أول إطار ثم الخروج')
+    parser.add_argument('--wait-chat', action='store_true', help='مع --startup-probe: انتظار جاهزية المحادثة')
+    parser.add_argument('--isolated-ai', action='store_true', help='تشغيل النموذج والتعلم في عملية منفصلة')
+    parser.add_argument('--shared-q', action='store_true', help='جدول Q واحد مشترك بين كل الأعداء')
+    # الخيارات الأخرى تبقى لـ Ursina/Panda3D
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+def main():
+    args = parse_args()
+    if args.metrics_port is not None:
+        serve_metrics(args.metrics_port)
+        SnapshotWriter('metrics.json').start()
+    app = Ursina()
+    window.fullscreen = not args.startup_probe
+    window.exit_button.visible = False
+    
+    # إعداد البيئة
+    game = Game(isolated_ai=args.isolated_ai, shared_q_table=args.shared_q)
+    Sky()
+    if args.startup_probe:
+        StartupProbe(game.chat_interface, wait_for_chat=args.wait_chat)
+    
+    # تشغيل اللعبة
+    app.run()
 
-# تشغيل اللعبة
-app.run()
+if __name__ == '__main__':
+    # مطلوب لعملية الذكاء الاصطناعي المنفصلة في النسخة المجمعة على ويندوز
+    import multiprocessing
+    multiprocessing.freeze_support()
+    main()
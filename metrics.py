@@ -0,0 +1,362 @@
+import bisect
+import functools
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+# حدود فئات الزمن بالثواني
+TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# أقصى مدة لطلب /profile واحد بالثواني
+MAX_PROFILE_SECONDS = 60.0
+
+
+def escape_label(value):
+    """تهريب قيمة تسمية حسب صيغة Prometheus النصية"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels, extra=None):
+    items = list(labels) + (list(extra.items()) if extra else [])
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label(value)}"' for key, value in items) + '}'
+
+
+class Counter:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """مدرج تكراري بفئات ثابتة (تراكمي عند التصدير بصيغة Prometheus)"""
+    __slots__ = ('buckets', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, buckets=TIME_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return Timer(self)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class Timer:
+    """مؤقت كمدير سياق يسجل المدة في مدرج تكراري"""
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class Registry:
+    """سجل المقاييس: عدادات ومدرجات تكرارية بعناوين اختيارية، ومجمّعات تقرأ stats() الموجودة"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.families = {}
+        self.collectors = {}
+
+    def _metric(self, kind, name, help, factory, labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self.families.get(name)
+            if family is None:
+                family = self.families[name] = {'type': kind, 'help': help, 'metrics': {}}
+            elif family['type'] != kind:
+                raise ValueError(f"المقياس {name} مسجل بنوع {family['type']}")
+            metric = family['metrics'].get(key)
+            if metric is None:
+                metric = family['metrics'][key] = factory()
+            return metric
+
+    def counter(self, name, help='', **labels):
+        return self._metric('counter', name, help, Counter, labels)
+
+    def histogram(self, name, help='', buckets=TIME_BUCKETS, **labels):
+        return self._metric('histogram', name, help, lambda: Histogram(buckets), labels)
+
+    def register_collector(self, name, collect):
+        """دالة ترجع قاموس أرقام (مثل stats()) تُصدّر كمقاييس gauge باسم name_<المفتاح>"""
+        with self._lock:
+            self.collectors[name] = collect
+
+    def collect_gauges(self):
+        gauges = {}
+        for prefix, collect in list(self.collectors.items()):
+            try:
+                flatten(prefix, collect(), gauges)
+            except Exception as e:
+                self.counter('errors_total', 'الأخطاء حسب المكان', where=f'collector_{prefix}').inc()
+                print(f"خطأ في جمع المقاييس {prefix}: {e}")
+        return gauges
+
+    def prometheus(self):
+        """كل المقاييس بصيغة Prometheus النصية"""
+        lines = []
+        with self._lock:
+            families = [(name, dict(family, metrics=dict(family['metrics'])))
+                        for name, family in sorted(self.families.items())]
+        for name, family in families:
+            if family['help']:
+                lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            for labels, metric in family['metrics'].items():
+                if family['type'] == 'counter':
+                    lines.append(f'{name}{format_labels(labels)} {metric.value}')
+                    continue
+                counts, total, count = metric.snapshot()
+                cumulative = 0
+                for bound, bucket_count in zip(list(metric.buckets) + ['+Inf'], counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{format_labels(labels, {"le": bound})} {cumulative}')
+                lines.append(f'{name}_sum{format_labels(labels)} {total}')
+                lines.append(f'{name}_count{format_labels(labels)} {count}')
+        for name, value in sorted(self.collect_gauges().items()):
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """كل المقاييس كقاموس قابل للتحويل إلى JSON"""
+        result = {'time': time.time(), 'counters': {}, 'histograms': {}, 'gauges': self.collect_gauges()}
+        with self._lock:
+            families = [(name, family['type'], dict(family['metrics'])) for name, family in self.families.items()]
+        for name, kind, metrics in families:
+            for labels, metric in metrics.items():
+                key = name + format_labels(labels)
+                if kind == 'counter':
+                    result['counters'][key] = metric.value
+                else:
+                    counts, total, count = metric.snapshot()
+                    result['histograms'][key] = {
+                        'count': count,
+                        'sum': total,
+                        'mean': total / count if count else 0.0,
+                        'buckets': dict(zip([str(b) for b in metric.buckets] + ['+Inf'], counts))
+                    }
+        return result
+
+
+def flatten(prefix, stats, out):
+    """تحويل القواميس المتداخلة إلى مقاييس مسطحة بالقيم الرقمية فقط"""
+    if not isinstance(stats, dict):
+        return
+    for key, value in stats.items():
+        name = f'{prefix}_{key}'.replace('.', '_').replace('-', '_')
+        if isinstance(value, bool):
+            out[name] = int(value)
+        elif isinstance(value, (int, float)):
+            out[name] = value
+        elif isinstance(value, dict):
+            flatten(name, value, out)
+
+
+registry = Registry()
+
+
+def timed(name, help='', **labels):
+    """مزخرف يقيس زمن الدالة في مدرج تكراري (يُنشأ المدرج مرة واحدة عند التعريف)"""
+    histogram = registry.histogram(name, help, **labels)
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def timer(name, help='', **labels):
+    return Timer(registry.histogram(name, help, **labels))
+
+
+def record_error(where):
+    """عدّ خطأ بجانب طباعته"""
+    registry.counter('errors_total', 'الأخطاء حسب المكان', where=where).inc()
+
+
+class SamplingProfiler:
+    """محلل أداء بالعينات يمكن تشغيله وإيقافه أثناء اللعب
+
+    يأخذ مكدس كل الخيوط كل interval ثانية ويجمعها بصيغة collapsed stacks
+    (مناسبة لأدوات flame graph)، دون أي كلفة عندما يكون متوقفاً.
+    """
+
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = StackCounter()
+        self.samples = 0
+        self._running = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._running.is_set()
+
+    def start(self):
+        if self.running:
+            return
+        self.stacks.clear()
+        self.samples = 0
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self.collapsed()
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while self._running.is_set():
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+
+    def collapsed(self, top=None):
+        """سطر لكل مكدس: 'خيط;ملف:دالة;... عدد'"""
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common(top)) + '\n'
+
+    def profile(self, seconds):
+        self.start()
+        time.sleep(seconds)
+        return self.stop()
+
+
+profiler = SamplingProfiler()
+
+
+class SnapshotWriter:
+    """كتابة لقطة JSON للمقاييس دورياً في خيط خلفي (كتابة ذرية)"""
+
+    def __init__(self, path='metrics.json', interval=30.0, registry=registry):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='metrics-snapshot', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def write(self):
+        try:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.registry.snapshot(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"خطأ في حفظ لقطة المقاييس: {e}")
+
+    def stop(self):
+        self._stop.set()
+        self.write()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """GET /metrics بصيغة Prometheus، و /metrics.json، و /profile?seconds=N للمحلل بالعينات"""
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/metrics':
+            self.send_text(registry.prometheus(), 'text/plain; version=0.0.4; charset=utf-8')
+        elif url.path == '/metrics.json':
+            self.send_text(json.dumps(registry.snapshot(), ensure_ascii=False), 'application/json; charset=utf-8')
+        elif url.path == '/profile':
+            query = parse_qs(url.query)
+            action = query.get('action', ['run'])[0]
+            if action == 'start':
+                profiler.start()
+                self.send_text('started\n')
+            elif action == 'stop':
+                self.send_text(profiler.stop())
+            else:
+                try:
+                    seconds = float(query.get('seconds', ['5'])[0])
+                except ValueError:
+                    seconds = math.nan
+                # float تقبل nan و inf، والمقارنة ترفضهما
+                if not 0 < seconds < math.inf:
+                    self.send_text(f'seconds يجب أن يكون عدداً موجباً (حتى {MAX_PROFILE_SECONDS:g})\n', status=400)
+                    return
+                self.send_text(profiler.profile(min(seconds, MAX_PROFILE_SECONDS)))
+        else:
+            self.send_error(404)
+
+    def send_text(self, text, content_type='text/plain; charset=utf-8', status=200):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port=9100, host='127.0.0.1'):
+    """تشغيل نقطة المقاييس المحلية في خيط خلفي"""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
@@ -0,0 +1,319 @@
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import registry
+
+DEFAULT_MODEL = "CAMeL-Lab/bert-base-arabic-camelbert-mix"
+# مسار نموذج محلي بديل (مثلاً نسخة مكممة أو ONNX)
+MODEL_ENV = 'SURVIVAL_MODEL'
+# خلفية الاستدلال: auto أو pipeline أو int8 أو onnx
+BACKEND_ENV = 'SURVIVAL_BACKEND'
+# ملف ذاكرة نتائج التصنيف المشتركة بين العمليات (قيمة فارغة تعطلها)
+CACHE_ENV = 'SURVIVAL_CLASSIFIER_CACHE'
+DEFAULT_CACHE_PATH = 'classifier_cache.sqlite'
+
+
+def default_model_name():
+    """النموذج من متغير البيئة، أو مجلد model المرفق بالنسخة المبنية، أو نموذج Hugging Face"""
+    if os.environ.get(MODEL_ENV):
+        return os.environ[MODEL_ENV]
+    base = sys.executable if getattr(sys, 'frozen', False) else __file__
+    bundled = os.path.join(os.path.dirname(os.path.abspath(base)), 'model')
+    if os.path.isdir(bundled):
+        return bundled
+    return DEFAULT_MODEL
+
+
+def load_pipeline(model_name):
+    """تحميل نموذج التصنيف من مكتبة transformers"""
+    from transformers import pipeline
+    return pipeline("text-classification", model=model_name)
+
+
+def load_model(model_name):
+    """تحميل خلفية الاستدلال المختارة (pipeline أو int8 أو onnx، انظر inference_backends)"""
+    from inference_backends import load_backend
+    return load_backend(model_name)
+
+
+def backend_name(model_name, loader):
+    """اسم الخلفية التي سيحمّلها loader دون تحميل النموذج (auto تُحل إلى الخلفية الفعلية)"""
+    if loader is load_model:
+        from inference_backends import resolve_backend
+        return resolve_backend(model_name)
+    return getattr(loader, '__name__', type(loader).__name__)
+
+
+class ClassifierService:
+    """خدمة تصنيف مشتركة تحمّل النموذج مرة واحدة وتجمع الطلبات المتزامنة في دفعات صغيرة"""
+
+    def __init__(self, model_name=None, loader=load_model,
+                 max_batch_size=16, max_wait=0.005, cache=None):
+        self.model_name = model_name or default_model_name()
+        self.loader = loader
+        # النتائج المخزنة تُستخدم دون تحميل النموذج أو تمرير النص فيه، ومفتاحها الخلفية الفعلية
+        # حتى لا تختلط نتائج onnx و pipeline عند تغير ملفات مجلد النموذج مع SURVIVAL_BACKEND=auto
+        self.cache = cache
+        self.backend = backend_name(self.model_name, loader)
+        self.cache_namespace = f"{self.model_name}|{self.backend}"
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+        # مقاييس حجم الدفعات وزمن الانتظار في الطابور
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_batch = 0
+        self._queue_latency_total = 0.0
+        self._queue_latency_max = 0.0
+        self._inference_time = registry.histogram('classifier_batch_seconds', 'زمن تمرير دفعة في النموذج')
+        self._embed_time = registry.histogram('classifier_embed_seconds', 'زمن حساب متجهات دفعة نصوص')
+
+    @property
+    def model(self):
+        """تحميل النموذج عند أول استخدام فقط"""
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    self._model = self.loader(self.model_name)
+        return self._model
+
+    @property
+    def is_loaded(self):
+        return self._model is not None
+
+    def __call__(self, text):
+        """واجهة متوافقة مع pipeline: ترجع قائمة من {label, score}"""
+        if isinstance(text, str):
+            return [self.classify(text)]
+        return self.classify_many(text)
+
+    def submit(self, text, kind='classify'):
+        """إضافة نص إلى طابور النموذج (تصنيف أو متجه embed) وإرجاع Future بالنتيجة"""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, future, time.perf_counter(), kind))
+        return future
+
+    def classify(self, text, timeout=None):
+        """تصنيف نص واحد"""
+        return self.submit(text).result(timeout)
+
+    def classify_many(self, texts, timeout=None):
+        """تصنيف عدة نصوص معاً في دفعة واحدة"""
+        futures = [self.submit(text) for text in texts]
+        return [future.result(timeout) for future in futures]
+
+    @property
+    def supports_embeddings(self):
+        """هل تعطي خلفية النموذج متجهات دلالية (يحمّل النموذج عند أول سؤال)"""
+        model = self.model
+        return getattr(model, 'supports_embeddings', callable(getattr(model, 'embed', None)))
+
+    def embed(self, texts, timeout=None):
+        """متجهات دلالية للنصوص عبر نفس طابور النموذج وذاكرته الدائمة
+
+        RuntimeError إذا كانت الخلفية لا تدعم المتجهات.
+        """
+        import numpy as np
+        futures = [self.submit(text, 'embed') for text in texts]
+        vectors = [future.result(timeout) for future in futures]
+        return np.stack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+
+    def _cached_embedding(self, key):
+        try:
+            return self.cache.get_embedding(self.cache_namespace, key)
+        except Exception as e:
+            print(f"خطأ في قراءة ذاكرة التصنيف: {e}")
+            return None
+
+    def _store_embedding(self, key, vector):
+        try:
+            self.cache.put_embedding(self.cache_namespace, key, vector)
+        except Exception as e:
+            print(f"خطأ في حفظ ذاكرة التصنيف: {e}")
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+
+    def _collect_batch(self):
+        """جمع الطلبات حتى امتلاء الدفعة أو انتهاء مهلة الانتظار"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            started = time.perf_counter()
+            pending = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not pending:
+                continue
+            self._record_batch(len(pending), [started - item[2] for item in pending])
+            embeds = [item for item in pending if item[3] == 'embed']
+            if embeds:
+                self._embed_batch(embeds)
+            if len(embeds) < len(pending):
+                self._classify_batch([item for item in pending if item[3] != 'embed'])
+
+    def _classify_batch(self, pending):
+        cached, keys = self._cached(pending)
+        # النصوص المكررة داخل الدفعة (بعد التوحيد) تمر في النموذج مرة واحدة
+        misses = {}
+        for item, key in zip(pending, keys):
+            if key in cached:
+                item[1].set_result(dict(cached[key]))
+            else:
+                misses.setdefault(key if key is not None else id(item), []).append(item)
+        if not misses:
+            return
+        groups = list(misses.items())
+        try:
+            with self._inference_time.time():
+                results = self.model([items[0][0] for _, items in groups], truncation=True)
+        except Exception as e:
+            print(f"خطأ في تصنيف الدفعة: {e}")
+            registry.counter('errors_total', 'الأخطاء حسب المكان', where='classifier').inc()
+            for _, items in groups:
+                for item in items:
+                    item[1].set_exception(e)
+            return
+        computed = {}
+        for (key, items), result in zip(groups, results):
+            # بعض نسخ pipeline ترجع قائمة لكل نص
+            if isinstance(result, list):
+                result = result[0]
+            computed[key] = result
+        # الحفظ قبل تسليم النتائج حتى لا تضيع إذا انتهت العملية مباشرة بعدها
+        self._store(computed)
+        for key, items in groups:
+            result = computed[key]
+            for index, item in enumerate(items):
+                item[1].set_result(result if index == 0 else dict(result))
+
+    def _embed_batch(self, pending):
+        import numpy as np
+        misses = {}
+        for item in pending:
+            key = self.cache.key(item[0]) if self.cache is not None else None
+            vector = self._cached_embedding(key) if key is not None else None
+            if vector is not None:
+                item[1].set_result(vector)
+            else:
+                misses.setdefault(key if key is not None else id(item), []).append(item)
+        if not misses:
+            return
+        groups = list(misses.items())
+        try:
+            if not self.supports_embeddings:
+                raise RuntimeError(f"خلفية الاستدلال {self.backend} لا تدعم المتجهات الدلالية")
+            with self._embed_time.time():
+                vectors = self.model.embed([items[0][0] for _, items in groups])
+        except Exception as e:
+            print(f"خطأ في حساب المتجهات: {e}")
+            registry.counter('errors_total', 'الأخطاء حسب المكان', where='embedding').inc()
+            for _, items in groups:
+                for item in items:
+                    item[1].set_exception(e)
+            return
+        for (key, items), vector in zip(groups, vectors):
+            vector = np.asarray(vector, dtype=np.float32)
+            if self.cache is not None:
+                self._store_embedding(key, vector)
+            for item in items:
+                item[1].set_result(vector)
+
+    def _cached(self, pending):
+        """النتائج الموجودة في الذاكرة الدائمة ومفاتيح كل النصوص"""
+        if self.cache is None:
+            return {}, [None] * len(pending)
+        keys = [self.cache.key(item[0]) for item in pending]
+        try:
+            return self.cache.get_many(self.cache_namespace, keys), keys
+        except Exception as e:
+            print(f"خطأ في قراءة ذاكرة التصنيف: {e}")
+            return {}, keys
+
+    def _store(self, computed):
+        if self.cache is None:
+            return
+        try:
+            self.cache.put_many(self.cache_namespace, computed)
+        except Exception as e:
+            print(f"خطأ في حفظ ذاكرة التصنيف: {e}")
+
+    def _record_batch(self, size, latencies):
+        with self._stats_lock:
+            self._batches += 1
+            self._items += size
+            self._max_batch = max(self._max_batch, size)
+            self._queue_latency_total += sum(latencies)
+            self._queue_latency_max = max(self._queue_latency_max, max(latencies))
+
+    def stats(self):
+        """إحصائيات حجم الدفعات وزمن الانتظار بالمللي ثانية"""
+        with self._stats_lock:
+            batches = self._batches
+            items = self._items
+            return {
+                'loaded': self.is_loaded,
+                'batches': batches,
+                'items': items,
+                'avg_batch_size': items / batches if batches else 0.0,
+                'max_batch_size': self._max_batch,
+                'avg_queue_latency_ms': 1000 * self._queue_latency_total / items if items else 0.0,
+                'max_queue_latency_ms': 1000 * self._queue_latency_max,
+                'queue_depth': self._queue.qsize(),
+                'cache': self.cache.stats() if self.cache is not None else None
+            }
+
+
+_shared_classifier = None
+_shared_lock = threading.Lock()
+
+
+def get_classifier():
+    """إرجاع خدمة التصنيف المشتركة على مستوى العملية"""
+    global _shared_classifier
+    if _shared_classifier is None:
+        with _shared_lock:
+            if _shared_classifier is None:
+                _shared_classifier = ClassifierService(cache=open_cache())
+                registry.register_collector('classifier', _shared_classifier.stats)
+    return _shared_classifier
+
+
+def open_cache():
+    """ذاكرة نتائج التصنيف الدائمة، أو None إذا عُطلت أو تعذر فتحها"""
+    path = os.environ.get(CACHE_ENV, DEFAULT_CACHE_PATH)
+    if not path:
+        return None
+    try:
+        from classification_cache import ClassificationCache
+        return ClassificationCache(path)
+    except Exception as e:
+        print(f"خطأ في فتح ذاكرة التصنيف: {e}")
+        return None
@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from q_engine import STATES, ACTIONS
+
+
+class QCheckpoint:
+    """نقطة حفظ لجداول Q بصيغة .npy مع ملف وصف JSON يحمل رقم الإصدار
+
+    الكتابة ذرية (ملف مؤقت ثم os.replace)، والحفظ الدوري يتم في خيط خلفي
+    حتى لا يتوقف إطار اللعبة، ويمكن اكتشاف ملف أحدث وتحميله أثناء اللعب.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, path='enemy_q.npy', save_interval=60.0, reload_interval=1.0):
+        self.path = path
+        self.meta_path = os.path.splitext(path)[0] + '.json'
+        self.save_interval = save_interval
+        self.reload_interval = reload_interval
+
+        self.version = 0
+        self._stamp = None
+        self._lock = threading.Lock()
+        self._saving = False
+        self._last_save = time.monotonic()
+        self._last_poll = 0.0
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def read_meta(self):
+        if not os.path.exists(self.meta_path):
+            return {}
+        with open(self.meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self, mmap=False):
+        """تحميل الجداول بعد التحقق من توافق الصيغة، أو None إذا لم يوجد ملف"""
+        with self._lock:
+            if not os.path.exists(self.path):
+                return None
+            meta = self.read_meta()
+            if meta.get('format', self.FORMAT_VERSION) > self.FORMAT_VERSION:
+                raise ValueError(f"صيغة نقطة الحفظ أحدث من المدعومة: {meta['format']}")
+            if meta and (meta.get('states') != STATES or meta.get('actions') != ACTIONS):
+                raise ValueError("حالات أو إجراءات نقطة الحفظ لا تطابق اللعبة الحالية")
+            tables = np.load(self.path, mmap_mode='r' if mmap else None)
+            self.version = meta.get('version', 0)
+            self._stamp = self._file_stamp()
+            return tables
+
+    def save(self, tables, blocking=True):
+        """حفظ نسخة من الجداول؛ مع blocking=False يتم الحفظ في خيط خلفي"""
+        snapshot = np.array(tables, dtype=np.float64, copy=True)
+        self._last_save = time.monotonic()
+        if blocking:
+            self._write(snapshot)
+            return True
+        with self._lock:
+            if self._saving:
+                return False
+            self._saving = True
+        threading.Thread(target=self._write_in_background, args=(snapshot,), daemon=True).start()
+        return True
+
+    def _write_in_background(self, snapshot):
+        try:
+            self._write(snapshot)
+        except Exception as e:
+            print(f"خطأ في حفظ جدول Q: {e}")
+        finally:
+            with self._lock:
+                self._saving = False
+
+    def _write(self, snapshot):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, snapshot)
+            f.flush()
+            os.fsync(f.fileno())
+
+        with self._lock:
+            version = max(self.version, self.read_meta().get('version', 0)) + 1
+            meta = {
+                'format': self.FORMAT_VERSION,
+                'version': version,
+                'shape': list(snapshot.shape),
+                'states': STATES,
+                'actions': ACTIONS,
+                'saved_at': time.time()
+            }
+            meta_tmp = self.meta_path + '.tmp'
+            with open(meta_tmp, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+            os.replace(meta_tmp, self.meta_path)
+            self.version = version
+            # حفظنا الملف بأنفسنا فلا داعي لإعادة تحميله
+            self._stamp = self._file_stamp()
+
+    def maybe_save(self, tables):
+        """حفظ خلفي دوري كل save_interval ثانية"""
+        if time.monotonic() - self._last_save >= self.save_interval:
+            return self.save(tables, blocking=False)
+        return False
+
+    def poll(self):
+        """إرجاع الجداول إذا تغير الملف على القرص منذ آخر تحميل، وإلا None"""
+        now = time.monotonic()
+        if now - self._last_poll < self.reload_interval:
+            return None
+        self._last_poll = now
+        with self._lock:
+            if self._saving or self._file_stamp() == self._stamp:
+                return None
+        try:
+            return self.load()
+        except Exception as e:
+            print(f"خطأ في تحميل جدول Q: {e}")
+            # عدم إعادة محاولة نفس الملف التالف في كل مرة
+            self._stamp = self._file_stamp()
+            return None
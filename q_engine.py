@@ -0,0 +1,97 @@
+import numpy as np
+
+# الحالات والإجراءات المشتركة بين اللعبة والمحاكاة
+STATES = ['patrol', 'chase', 'attack', 'flee']
+ACTIONS = ['move_forward', 'move_back', 'turn_left', 'turn_right', 'attack']
+STATE_IDS = {state: i for i, state in enumerate(STATES)}
+ACTION_IDS = {action: i for i, action in enumerate(ACTIONS)}
+
+# مسافات تحديد الحالة
+ATTACK_RANGE = 2
+CHASE_RANGE = 5
+FLEE_RANGE = 10
+
+# معدل قرارات الأعداء في الثانية؛ اللعبة والمحاكاة تتقدمان بنفس الخطوة 1 / AI_TICK_RATE
+AI_TICK_RATE = 10
+
+
+class QLearningEngine:
+    """محرك Q-learning مجمّع: جداول كل الأعداء في مصفوفة NumPy متصلة
+
+    افتراضياً يحصل كل عدو على صف خاص (كالجدول المستقل لكل عدو سابقاً)، ومع
+    shared=True يتعلم كل الأعداء في جدول واحد.
+    كل استدعاء لـ choose_actions أو update يعالج كل الأعداء دفعة واحدة.
+    """
+
+    def __init__(self, n_states=len(STATES), n_actions=len(ACTIONS), shared=False,
+                 learning_rate=0.1, discount=0.9, epsilon=0.1, capacity=8, seed=None):
+        self.n_states = n_states
+        self.n_actions = n_actions
+        self.shared = shared
+        self.learning_rate = learning_rate
+        self.discount = discount
+        self.epsilon = epsilon
+        self.rng = np.random.default_rng(seed)
+        self.n_agents = 0
+        self.tables = self.rng.random((1 if shared else capacity, n_states, n_actions))
+
+    def register(self):
+        """تسجيل عدو جديد وإرجاع رقمه"""
+        agent = self.n_agents
+        self.n_agents += 1
+        if not self.shared and self.n_agents > len(self.tables):
+            # مضاعفة السعة مع تهيئة الصفوف الجديدة عشوائياً
+            extra = self.rng.random((len(self.tables), self.n_states, self.n_actions))
+            self.tables = np.concatenate([self.tables, extra])
+        return agent
+
+    def _rows(self, agents):
+        agents = np.asarray(agents, dtype=np.intp)
+        return np.zeros_like(agents) if self.shared else agents
+
+    def table(self, agent=0):
+        """جدول Q لعدو واحد (مصفوفة حالات × إجراءات)"""
+        return self.tables[0 if self.shared else agent]
+
+    def choose_actions(self, agents, states):
+        """اختيار إجراء epsilon-greedy لكل عدو"""
+        states = np.asarray(states, dtype=np.intp)
+        greedy = self.tables[self._rows(agents), states].argmax(axis=1)
+        explore = self.rng.random(len(states)) < self.epsilon
+        random_actions = self.rng.integers(self.n_actions, size=len(states))
+        return np.where(explore, random_actions, greedy)
+
+    def update(self, agents, states, actions, rewards, next_states):
+        """تحديث TD لكل الأعداء في خطوة واحدة"""
+        rows = self._rows(agents)
+        states = np.asarray(states, dtype=np.intp)
+        actions = np.asarray(actions, dtype=np.intp)
+        rewards = np.asarray(rewards, dtype=np.float64)
+
+        next_max = self.tables[rows, np.asarray(next_states, dtype=np.intp)].max(axis=1)
+        old_values = self.tables[rows, states, actions]
+        delta = self.learning_rate * (rewards + self.discount * next_max - old_values)
+
+        # عدة أعداء قد يحدّثون نفس الخانة في الجدول المشترك: نأخذ متوسط التحديثات
+        flat = np.ravel_multi_index((rows, states, actions), self.tables.shape)
+        size = self.tables.size
+        totals = np.bincount(flat, weights=delta, minlength=size)
+        counts = np.bincount(flat, minlength=size)
+        touched = counts > 0
+        values = self.tables.reshape(-1)
+        values[touched] += totals[touched] / counts[touched]
+
+    def load_tables(self, tables):
+        """استبدال الجداول بجداول مدربة مسبقاً"""
+        tables = np.asarray(tables, dtype=np.float64)
+        if tables.ndim == 2:
+            tables = tables[np.newaxis]
+        if tables.shape[1:] != (self.n_states, self.n_actions):
+            raise ValueError(f"شكل جدول Q غير متوافق: {tables.shape}")
+        if self.shared:
+            # عدة جداول في وضع المشاركة: نبدأ من متوسطها
+            self.tables = tables.mean(axis=0, keepdims=True)
+        else:
+            # تكرار الجداول المدربة على كل الأعداء المسجلين
+            rows = max(len(self.tables), self.n_agents)
+            self.tables = np.resize(tables, (rows, self.n_states, self.n_actions))
@@ -0,0 +1,80 @@
+from ursina import *
+import random
+import numpy as np
+
+# رؤوس المكعب (x, y, z) لكل زاوية، ورقم الزاوية = x*4 + y*2 + z
+_CORNERS = np.array([[x, y, z] for x in (-0.5, 0.5) for y in (-0.5, 0.5) for z in (-0.5, 0.5)])
+_FACES = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+CUBE_VERTICES = np.array([_CORNERS[i] for a, b, c, d in _FACES for i in (a, b, c, a, c, d)])
+
+RESOURCE_COLORS = {
+    'wood': color.brown,
+    'metal': color.gray
+}
+
+
+class ResourceInstance:
+    """مورد خفيف بدون كيان Ursina خاص به"""
+    __slots__ = ('type', 'x', 'z')
+
+    def __init__(self, type):
+        self.type = type
+        self.x = 0.0
+        self.z = 0.0
+
+
+class ResourceField(Entity):
+    """كل الموارد المكعبة في شبكة مدمجة واحدة: استدعاء رسم واحد بدل كيان لكل مورد
+
+    الالتقاط يتم عبر الشبكة المكانية بدل مصادم لكل مورد، والشبكة المدمجة
+    يعاد بناؤها مرة واحدة على الأكثر في كل إطار عند تغير الموارد.
+    """
+
+    def __init__(self, grid, size=0.5, height=0.5, area=20):
+        super().__init__(model=Mesh(vertices=[], mode='triangle'), double_sided=True)
+        self.grid = grid
+        self.size = size
+        self.height = height
+        self.area = area
+        self.instances = []
+        self.dirty = True
+
+    def spawn(self, type='wood'):
+        instance = ResourceInstance(type)
+        self.instances.append(instance)
+        self.respawn(instance)
+        return instance
+
+    def respawn(self, instance):
+        instance.x = random.uniform(-self.area, self.area)
+        instance.z = random.uniform(-self.area, self.area)
+        self.grid.move(instance, instance.x, instance.z)
+        self.dirty = True
+
+    def remove(self, instance):
+        self.instances.remove(instance)
+        self.grid.remove(instance)
+        self.dirty = True
+
+    def update(self):
+        if self.dirty:
+            self.rebuild()
+
+    def rebuild(self):
+        """بناء الشبكة المدمجة لكل الموارد دفعة واحدة"""
+        self.dirty = False
+        count = len(self.instances)
+        if not count:
+            self.model.vertices = []
+            self.model.colors = []
+            self.model.generate()
+            return
+        offsets = np.array([(item.x, self.height, item.z) for item in self.instances])
+        vertices = CUBE_VERTICES[np.newaxis] * self.size + offsets[:, np.newaxis, :]
+        per_cube = len(CUBE_VERTICES)
+        colors = []
+        for item in self.instances:
+            colors.extend([RESOURCE_COLORS.get(item.type, color.white)] * per_cube)
+        self.model.vertices = vertices.reshape(-1, 3).tolist()
+        self.model.colors = colors
+        self.model.generate()
@@ -1,26 +1,377 @@
-from http.server import HTTPServer, SimpleHTTPRequestHandler
-import webbrowser
+from http.server import HTTPServer, ThreadingHTTPServer, SimpleHTTPRequestHandler
+from email.utils import formatdate
+import argparse
+import functools
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
 import os
+import threading
+import time
+import webbrowser
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# أنواع الملفات النصية التي تستحق الضغط
+COMPRESSIBLE = ('text/', 'application/javascript', 'application/json', 'image/svg+xml', 'application/xml')
+# النسخ المضغوطة مسبقاً بجانب الملف (من build_assets.py)
+PRECOMPRESSED = {'br': '.br', 'gzip': '.gz'}
+MANIFEST_NAME = 'asset-manifest.json'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def guess_type(path):
+    """نوع المحتوى؛ الملفات المضغوطة مثل x.js.gz تُعامل كبيانات ثنائية"""
+    content_type, encoding = mimetypes.guess_type(path)
+    if encoding is not None:
+        return 'application/octet-stream'
+    return content_type or 'application/octet-stream'
+
+
+def parse_accept_encoding(header):
+    """{الترميز: q} من ترويسة Accept-Encoding؛ الترميز بـ q=0 مرفوض صراحة"""
+    codings = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def etag_matches(header, etag):
+    """مقارنة ضعيفة لـ If-None-Match: قائمة مفصولة بفواصل، W/ و *"""
+    if header is None:
+        return False
+    if header.strip() == '*':
+        return True
+    etag = etag[2:] if etag.startswith('W/') else etag
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class CachedFile:
+    """محتوى ملف في الذاكرة مع نسخه المضغوطة مسبقاً"""
+    __slots__ = ('path', 'stamp', 'size', 'body', 'encodings', 'etag', 'content_type',
+                 'last_modified', 'checked_at', 'immutable')
+
+    def __init__(self, path, stamp, size, body, content_type, last_modified):
+        self.path = path
+        self.stamp = stamp
+        self.size = size
+        self.body = body
+        self.encodings = {}
+        self.content_type = content_type
+        self.last_modified = last_modified
+        self.checked_at = time.monotonic()
+        self.immutable = False
+        if body is None:
+            # ملف كبير يُرسل من القرص بـ sendfile
+            self.etag = f'"{stamp[1]:x}-{stamp[0]:x}"'
+        else:
+            self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+    def variant(self, accept_encoding):
+        """(المحتوى، الترميز) الأعلى q بين ما يقبله المتصفح، والأصغر عند التساوي"""
+        accepted = parse_accept_encoding(accept_encoding)
+        best, best_q = None, 0.0
+        for encoding in ('br', 'gzip'):
+            q = accepted.get(encoding, accepted.get('*', 0.0))
+            if encoding in self.encodings and q > best_q:
+                best, best_q = encoding, q
+        if best is None:
+            return self.body, None
+        return self.encodings[best], best
+
+
+class StaticCache:
+    """ذاكرة مؤقتة لمحتوى الملفات الثابتة مع ضغط مسبق بـ gzip و brotli
+
+    الملف يُقرأ ويُضغط مرة واحدة، ولا يُعاد فحص تاريخه على القرص أكثر من مرة
+    كل check_interval ثانية. الملفات الأكبر من max_file_bytes لا تُخزن وتُرسل بـ sendfile.
+    إذا وُجد بيان build_assets.py في المجلد تُرسل الملفات ذات البصمة مع ترويسة immutable.
+    """
+
+    def __init__(self, directory=None, max_file_bytes=4 * 1024 * 1024, min_compress_bytes=1024,
+                 check_interval=1.0):
+        self.directory = os.path.abspath(directory or os.getcwd())
+        self.max_file_bytes = max_file_bytes
+        self.min_compress_bytes = min_compress_bytes
+        self.check_interval = check_interval
+        self.files = {}
+        self.immutable = set()
+        self.manifest_files = []
+        self._manifest_stamp = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def refresh_manifest(self):
+        """إعادة قراءة بيان الملفات إذا تغير على القرص"""
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.immutable = set()
+            self.manifest_files = []
+            self._manifest_stamp = None
+            return
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self._manifest_stamp:
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                files = json.load(f).get('files', {})
+        except (OSError, ValueError) as e:
+            print(f"خطأ في قراءة بيان الملفات: {e}")
+            return
+        self.manifest_files = [os.path.join(self.directory, *entry['path'].split('/'))
+                               for entry in files.values()]
+        self.immutable = {os.path.join(self.directory, *entry['path'].split('/'))
+                          for entry in files.values() if entry.get('immutable')}
+        self._manifest_stamp = stamp
+
+    def get(self, path):
+        """الملف من الذاكرة أو القرص، أو None إذا لم يكن ملفاً"""
+        entry = self.files.get(path)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked_at < self.check_interval:
+            return entry
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if not os.path.isfile(path):
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if entry is not None and entry.stamp == stamp:
+            entry.checked_at = now
+            return entry
+        # خيط واحد يقرأ ويضغط، والطلبات المتزامنة لنفس الملف تنتظره بدل تكرار الضغط
+        with self._load_lock:
+            entry = self.files.get(path)
+            if entry is None or entry.stamp != stamp:
+                entry = self._load(path, stamp, stat)
+                with self._lock:
+                    self.files[path] = entry
+        return entry
+
+    def prewarm(self, directory=None):
+        """تحميل وضغط الملفات النصية مسبقاً حتى لا يدفع أول زائر ثمن الضغط
+
+        بدون directory تُحمّل ملفات بيان build_assets.py فقط، فلا يُقرأ مجلد تطوير كامل.
+        """
+        if directory is None:
+            self.refresh_manifest()
+            paths = list(self.manifest_files)
+        else:
+            paths = []
+            for root, dirs, files in os.walk(directory):
+                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ('node_modules', '__pycache__')]
+                paths.extend(os.path.join(root, name) for name in files)
+        for path in paths:
+            if guess_type(path).startswith(COMPRESSIBLE):
+                try:
+                    self.get(path)
+                except OSError as e:
+                    print(f"خطأ في تحميل {path}: {e}")
+
+    def _load(self, path, stamp, stat):
+        self.refresh_manifest()
+        content_type = guess_type(path)
+        last_modified = formatdate(stat.st_mtime, usegmt=True)
+        if stat.st_size > self.max_file_bytes:
+            entry = CachedFile(path, stamp, stat.st_size, None, content_type, last_modified)
+        else:
+            with open(path, 'rb') as f:
+                body = f.read()
+            entry = CachedFile(path, stamp, len(body), body, content_type, last_modified)
+            if len(body) >= self.min_compress_bytes and content_type.startswith(COMPRESSIBLE):
+                self._compress(entry, stat)
+        entry.immutable = path in self.immutable
+        return entry
+
+    def _compress(self, entry, stat):
+        for encoding, suffix in PRECOMPRESSED.items():
+            try:
+                sibling = os.stat(entry.path + suffix)
+                if sibling.st_mtime_ns >= stat.st_mtime_ns:
+                    with open(entry.path + suffix, 'rb') as f:
+                        entry.encodings[encoding] = f.read()
+            except OSError:
+                pass
+        if 'gzip' not in entry.encodings:
+            entry.encodings['gzip'] = gzip.compress(entry.body, compresslevel=9, mtime=0)
+        if 'br' not in entry.encodings and brotli is not None:
+            entry.encodings['br'] = brotli.compress(entry.body)
+
+    def stats(self):
+        return {
+            'files': len(self.files),
+            'bytes': sum(len(e.body) + sum(map(len, e.encodings.values()))
+                         for e in self.files.values() if e.body is not None)
+        }
 
-def run_server():
-    # تحديد المنفذ
-    port = 8000
-    
+
+class CachingRequestHandler(SimpleHTTPRequestHandler):
+    """خدمة الملفات الثابتة من الذاكرة مع ETag و 304 وضغط مسبق و keep-alive"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split('?', 1)[0].endswith('/'):
+                # إعادة التوجيه وسرد المجلدات كما في الخادم الأصلي
+                return super().send_head()
+            for index in ('index.html', 'index.htm'):
+                candidate = os.path.join(path, index)
+                if os.path.isfile(candidate):
+                    path = candidate
+                    break
+            else:
+                return super().send_head()
+
+        entry = self.server.cache.get(path)
+        if entry is None:
+            self.send_error(404, 'File not found')
+            return None
+
+        if etag_matches(self.headers.get('If-None-Match'), entry.etag):
+            self.send_response(304)
+            self.send_cache_headers(entry)
+            self.end_headers()
+            return None
+
+        if entry.body is None:
+            self.send_response(200)
+            self.send_header('Content-Type', entry.content_type)
+            self.send_header('Content-Length', str(entry.size))
+            self.send_cache_headers(entry)
+            self.end_headers()
+            return open(path, 'rb')
+
+        body, encoding = entry.variant(self.headers.get('Accept-Encoding', ''))
+        self.send_response(200)
+        self.send_header('Content-Type', entry.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        if entry.encodings:
+            self.send_header('Vary', 'Accept-Encoding')
+        self.send_cache_headers(entry)
+        self.end_headers()
+        return body
+
+    def send_cache_headers(self, entry):
+        self.send_header('ETag', entry.etag)
+        self.send_header('Last-Modified', entry.last_modified)
+        self.send_header('Cache-Control', IMMUTABLE_CACHE_CONTROL if entry.immutable else 'no-cache')
+
+    def do_GET(self):
+        body = self.send_head()
+        if body is None:
+            return
+        if isinstance(body, bytes):
+            self.wfile.write(body)
+            return
+        if isinstance(body, io.BytesIO):
+            # سرد محتويات مجلد
+            self.copyfile(body, self.wfile)
+            return
+        try:
+            # نسخ بدون المرور بذاكرة بايثون للملفات الكبيرة
+            self.connection.sendfile(body)
+        finally:
+            body.close()
+
+    def do_HEAD(self):
+        body = self.send_head()
+        if body is not None and not isinstance(body, bytes):
+            body.close()
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class StaticServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, handler, cache=None, quiet=False):
+        super().__init__(address, handler)
+        self.cache = cache or StaticCache()
+        self.quiet = quiet
+
+
+def make_server(port=8000, bind='', directory=None, legacy=False, quiet=False, prewarm_dir=None):
+    """إنشاء الخادم؛ legacy=True يعيد الخادم القديم أحادي الخيط للمقارنة
+
+    التحميل المسبق يشمل ملفات البيان، أو مجلد prewarm_dir إذا حُدد صراحة.
+    """
+    directory = directory or os.getcwd()
+    if legacy:
+        handler = functools.partial(SimpleHTTPRequestHandler, directory=directory)
+        return HTTPServer((bind, port), handler)
+    handler = functools.partial(CachingRequestHandler, directory=directory)
+    httpd = StaticServer((bind, port), handler, StaticCache(directory), quiet)
+    threading.Thread(target=httpd.cache.prewarm, args=(prewarm_dir,), daemon=True).start()
+    return httpd
+
+
+def run_server(port=8000, bind='', directory=None, open_browser=True, legacy=False, quiet=False,
+               prewarm_dir=None):
     # إنشاء الخادم
-    server_address = ('', port)
-    httpd = HTTPServer(server_address, SimpleHTTPRequestHandler)
-    
+    httpd = make_server(port, bind, directory, legacy, quiet, prewarm_dir)
+
     # فتح المتصفح تلقائياً
-    webbrowser.open(f'http://localhost:{port}')
-    
+    if open_browser:
+        webbrowser.open(f'http://localhost:{port}')
+
     print(f'الخادم يعمل على المنفذ {port}...')
     print('اضغط Ctrl+C لإيقاف الخادم')
-    
+
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
         print('\nتم إيقاف الخادم')
+    finally:
         httpd.server_close()
 
+
+def main():
+    parser = argparse.ArgumentParser(description='خادم ملفات اللعبة')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--bind', default='', help='العنوان المستمع (الافتراضي كل الواجهات)')
+    parser.add_argument('--directory', default=None)
+    parser.add_argument('--no-browser', action='store_true', help='عدم فتح المتصفح (للتشغيل بدون واجهة)')
+    parser.add_argument('--legacy', action='store_true', help='الخادم القديم أحادي الخيط بدون ذاكرة مؤقتة')
+    parser.add_argument('--quiet', action='store_true', help='إيقاف سجل الطلبات')
+    parser.add_argument('--prewarm-dir', default=None,
+                        help='مجلد ملفات ثابتة يُضغط مسبقاً (الافتراضي ملفات بيان build_assets.py فقط)')
+    args = parser.parse_args()
+    run_server(args.port, args.bind, args.directory, not args.no_browser, args.legacy, args.quiet,
+               args.prewarm_dir)
+
+
 if __name__ == '__main__':
-    run_server()
+    main()
@@ -0,0 +1,108 @@
+import heapq
+import math
+
+
+class SpatialHash:
+    """شبكة تجزئة مكانية منتظمة على المستوى xz لاستعلامات القرب
+
+    تُحدّث تدريجياً عند تحرك الكيانات أو إعادة ظهورها، وتكلفة الاستعلام
+    تتناسب مع عدد الكيانات القريبة فقط وليس مع العدد الكلي.
+    """
+
+    def __init__(self, cell_size=5):
+        self.cell_size = cell_size
+        self.cells = {}
+        # رقم الكيان -> (الكيان، x، z، الخلية)
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, obj):
+        return id(obj) in self.entries
+
+    def _cell(self, x, z):
+        return (math.floor(x / self.cell_size), math.floor(z / self.cell_size))
+
+    def move(self, obj, x, z):
+        """إضافة كيان أو تحديث موقعه"""
+        key = id(obj)
+        cell = self._cell(x, z)
+        entry = self.entries.get(key)
+        if entry is not None and entry[3] != cell:
+            self._discard(key, entry[3])
+            entry = None
+        if entry is None:
+            self.cells.setdefault(cell, set()).add(key)
+        self.entries[key] = (obj, x, z, cell)
+
+    insert = move
+
+    def remove(self, obj):
+        entry = self.entries.pop(id(obj), None)
+        if entry is not None:
+            self._discard(id(obj), entry[3])
+
+    def _discard(self, key, cell):
+        bucket = self.cells[cell]
+        bucket.discard(key)
+        if not bucket:
+            del self.cells[cell]
+
+    def query_radius(self, x, z, radius):
+        """الكيانات داخل نصف القطر مع مسافاتها: [(الكيان، المسافة)]"""
+        results = []
+        min_i, min_j = self._cell(x - radius, z - radius)
+        max_i, max_j = self._cell(x + radius, z + radius)
+        radius_sq = radius * radius
+        for i in range(min_i, max_i + 1):
+            for j in range(min_j, max_j + 1):
+                for key in self.cells.get((i, j), ()):
+                    obj, ox, oz, _ = self.entries[key]
+                    dist_sq = (ox - x) ** 2 + (oz - z) ** 2
+                    if dist_sq <= radius_sq:
+                        results.append((obj, math.sqrt(dist_sq)))
+        return results
+
+    def nearest(self, x, z, k=1, max_radius=None):
+        """أقرب k كيانات مرتبة حسب المسافة: [(الكيان، المسافة)]"""
+        if not self.entries:
+            return []
+        center_i, center_j = self._cell(x, z)
+        best = []
+        ring = 0
+        while True:
+            for i, j in self._ring(center_i, center_j, ring):
+                for key in self.cells.get((i, j), ()):
+                    obj, ox, oz, _ = self.entries[key]
+                    dist = math.hypot(ox - x, oz - z)
+                    if max_radius is not None and dist > max_radius:
+                        continue
+                    # كومة عظمى بحجم k عبر قيم سالبة
+                    item = (-dist, key, obj)
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+            # كل الخلايا خارج الحلقة الحالية أبعد من ring * cell_size
+            reach = ring * self.cell_size
+            if len(best) == k and -best[0][0] <= reach:
+                break
+            if max_radius is not None and reach > max_radius:
+                break
+            if len(best) == len(self.entries):
+                break
+            ring += 1
+        return [(obj, -neg_dist) for neg_dist, _, obj in sorted(best, reverse=True)]
+
+    @staticmethod
+    def _ring(ci, cj, ring):
+        if ring == 0:
+            yield (ci, cj)
+            return
+        for i in range(ci - ring, ci + ring + 1):
+            yield (i, cj - ring)
+            yield (i, cj + ring)
+        for j in range(cj - ring + 1, cj + ring):
+            yield (ci - ring, j)
+            yield (ci + ring, j)
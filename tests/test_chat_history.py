@@ -0,0 +1,66 @@
+import threading
+
+from chat_history import ChatHistory, HistoryArchive, ChatTurn
+
+
+def test_ring_buffer_keeps_last_turns_in_memory():
+    history = ChatHistory(capacity=3)
+    for i in range(10):
+        history.append(f'u{i}', f'a{i}')
+    assert len(history) == 3
+    assert [turn.user for turn in history] == ['u7', 'u8', 'u9']
+    assert [turn.user for turn in history.recent(2)] == ['u8', 'u9']
+
+
+def test_evicted_turns_are_archived_in_order(tmp_path):
+    history = ChatHistory(capacity=2, archive_dir=str(tmp_path), max_file_bytes=100)
+    for i in range(20):
+        history.append(f'u{i}', 'رد', command='attack', confidence=0.5)
+    all_turns = list(history.iter_all())
+    assert [turn.user for turn in all_turns] == [f'u{i}' for i in range(20)]
+    assert all_turns[0].command == 'attack' and all_turns[0].confidence == 0.5
+    assert len(history.archive.files()) > 1
+    history.close()
+
+
+def test_rotation_keeps_exactly_max_files(tmp_path):
+    archive = HistoryArchive(str(tmp_path), max_file_bytes=1, max_files=3)
+    for i in range(10):
+        archive.write(ChatTurn(f'u{i}', 'a'))
+    archive.flush()
+    files = archive.files()
+    assert len(files) == 3
+    # كل ملف فيه رسالة واحدة، والباقي هو الأحدث
+    assert [turn.user for turn in archive] == ['u7', 'u8', 'u9']
+    archive.close()
+
+
+def test_archive_resumes_numbering_after_restart(tmp_path):
+    archive = HistoryArchive(str(tmp_path), max_file_bytes=1)
+    for i in range(3):
+        archive.write(ChatTurn(f'u{i}', 'a'))
+    archive.close()
+    reopened = HistoryArchive(str(tmp_path), max_file_bytes=1)
+    reopened.write(ChatTurn('u3', 'a'))
+    reopened.close()
+    assert [turn.user for turn in reopened] == ['u0', 'u1', 'u2', 'u3']
+
+
+def test_close_stops_writer_and_drops_later_writes(tmp_path, capsys):
+    before = threading.active_count()
+    archive = HistoryArchive(str(tmp_path))
+    archive.write(ChatTurn('u0', 'a'))
+    archive.close()
+    assert threading.active_count() == before
+    assert archive.write(ChatTurn('late', 'a')) is False
+    assert 'مغلق' in capsys.readouterr().out
+    assert [turn.user for turn in archive] == ['u0']
+
+
+def test_corrupt_lines_are_skipped(tmp_path):
+    archive = HistoryArchive(str(tmp_path))
+    archive.write(ChatTurn('u0', 'a'))
+    archive.close()
+    with open(archive.files()[-1], 'a', encoding='utf-8') as f:
+        f.write('{"user": "ناقص\n')
+    assert [turn.user for turn in archive] == ['u0']
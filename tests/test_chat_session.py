@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from chat_session import SessionManager
+
+
+def test_sessions_share_one_archive_thread(tmp_path):
+    """كل الجلسات تؤرشف عبر خيط كتابة واحد يتوقف عند إغلاق المدير"""
+    baseline = threading.active_count()
+    sessions = SessionManager(chat_system=None, max_sessions=10, history_capacity=2,
+                              history_dir=str(tmp_path))
+    for i in range(300):
+        session = sessions.get(f'player{i}')
+        for turn in range(3):
+            session.chat_history.append(f'رسالة {turn}', 'رد')
+    assert sessions.stats()['active'] == 10
+    assert threading.active_count() == baseline + 1
+    sessions.archive_writer.flush()
+    assert len(list(tmp_path.glob('chat_player*-*.jsonl'))) == 300
+
+    sessions.close()
+    assert threading.active_count() == baseline
+
+
+def test_archived_turns_survive_eviction(tmp_path):
+    sessions = SessionManager(chat_system=None, max_sessions=1, history_capacity=1,
+                              history_dir=str(tmp_path))
+    history = sessions.get('first').chat_history
+    for turn in range(5):
+        history.append(f'رسالة {turn}', 'رد')
+    sessions.get('second')
+    assert [turn.user for turn in history.iter_all()] == [f'رسالة {turn}' for turn in range(5)]
+    sessions.close()
+
+
+@pytest.mark.parametrize('session_id', [42, ['a'], {'id': 'a'}, '', 'a b', 'x' * 65])
+def test_invalid_session_ids_are_rejected(session_id):
+    sessions = SessionManager(chat_system=None)
+    with pytest.raises(ValueError):
+        sessions.get(session_id)
+
+
+def test_closed_session_does_not_stop_shared_writer(tmp_path):
+    sessions = SessionManager(chat_system=None, history_capacity=1, history_dir=str(tmp_path))
+    sessions.get('first')
+    sessions.remove('first')
+    history = sessions.get('second').chat_history
+    history.append('أولى', 'رد')
+    history.append('ثانية', 'رد')
+    assert [turn.user for turn in history.iter_all()] == ['أولى', 'ثانية']
+    sessions.close()
+
+
+@pytest.mark.parametrize('body', [{'text': 'هجوم', 'session': 5}, {'text': 'هجوم', 'session': ['a']}, ['هجوم']])
+def test_server_rejects_malformed_requests(body):
+    import http.client
+    import json
+
+    from ai_server import ChatServer
+
+    httpd = ChatServer(('127.0.0.1', 0), SessionManager(chat_system=None))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        connection = http.client.HTTPConnection(*httpd.server_address, timeout=5)
+        connection.request('POST', '/chat', json.dumps(body), {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        assert response.status == 400
+        assert 'error' in json.loads(response.read())
+        connection.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_server_rejects_negative_content_length():
+    import http.client
+
+    from ai_server import ChatServer
+
+    httpd = ChatServer(('127.0.0.1', 0), SessionManager(chat_system=None))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        connection = http.client.HTTPConnection(*httpd.server_address, timeout=5)
+        connection.putrequest('POST', '/chat')
+        connection.putheader('Content-Length', '-1')
+        connection.endheaders()
+        assert connection.getresponse().status == 400
+        connection.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
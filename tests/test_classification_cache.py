@@ -0,0 +1,90 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from classification_cache import ClassificationCache  # noqa: E402
+from model_service import BACKEND_ENV, ClassifierService, load_model  # noqa: E402
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ClassificationCache(str(tmp_path / 'cache.sqlite'))
+    yield cache
+    cache.close()
+
+
+class CountingModel:
+    """نموذج وهمي يسجل النصوص التي مرت فيه"""
+
+    def __init__(self):
+        self.seen = []
+
+    def __call__(self, texts, truncation=True):
+        self.seen.extend(texts)
+        return [{'label': f'L{len(text)}', 'score': 0.5} for text in texts]
+
+    def embed(self, texts):
+        self.seen.extend(texts)
+        return [np.full(4, len(text), dtype=np.float32) for text in texts]
+
+
+def test_round_trip_and_namespaces(cache):
+    key = cache.key('البقاء في الجزيرة')
+    cache.put_many('a', {key: {'label': 'x', 'score': 0.9}})
+    assert cache.get_many('a', [key]) == {key: {'label': 'x', 'score': 0.9}}
+    assert cache.get_many('b', [key]) == {}
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_embedding_round_trip(cache):
+    key = cache.key('نص')
+    vector = np.arange(8, dtype=np.float32)
+    cache.put_embedding('a', key, vector)
+    assert np.array_equal(cache.get_embedding('a', key), vector)
+    assert cache.get_embedding('b', key) is None
+    # التضمين وحده ليس نتيجة تصنيف
+    assert cache.get_many('a', [key]) == {}
+
+
+def test_trim_evicts_least_recently_used(tmp_path):
+    cache = ClassificationCache(str(tmp_path / 'cache.sqlite'), max_entries=100)
+    for i in range(150):
+        cache.put_many('a', {f'k{i}': {'label': 'x', 'score': 1.0}})
+    assert len(cache) <= 100
+    assert cache.get_many('a', ['k149'])
+    assert not cache.get_many('a', ['k0'])
+    cache.close()
+
+
+def test_service_serves_repeats_from_cache(cache):
+    model = CountingModel()
+    first = ClassifierService(loader=lambda name: model, cache=cache, model_name='m')
+    assert first.classify('البقاء') == {'label': 'L6', 'score': 0.5}
+
+    # خدمة جديدة (عملية أخرى مثلاً) لا تحمّل النموذج للنص المخزن
+    second = ClassifierService(loader=lambda name: CountingModel(), cache=cache, model_name='m')
+    assert second.classify('البقاء') == {'label': 'L6', 'score': 0.5}
+    assert not second.is_loaded
+    assert model.seen == ['البقاء']
+
+
+def test_service_embeddings_are_cached(cache):
+    model = CountingModel()
+    service = ClassifierService(loader=lambda name: model, cache=cache, model_name='m')
+    vectors = service.embed(['أ', 'بب'])
+    assert vectors.shape == (2, 4)
+    assert np.array_equal(service.embed(['بب'])[0], vectors[1])
+    assert model.seen == ['أ', 'بب']
+
+
+def test_namespace_uses_resolved_backend(tmp_path, monkeypatch):
+    monkeypatch.setenv(BACKEND_ENV, 'auto')
+    model_dir = tmp_path / 'model'
+    model_dir.mkdir()
+    assert ClassifierService(str(model_dir), loader=load_model).cache_namespace == f'{model_dir}|pipeline'
+
+    (model_dir / 'model.onnx').write_bytes(b'')
+    assert ClassifierService(str(model_dir), loader=load_model).cache_namespace == f'{model_dir}|onnx'
+
+    monkeypatch.setenv(BACKEND_ENV, 'int8')
+    assert ClassifierService(str(model_dir), loader=load_model).cache_namespace == f'{model_dir}|int8'
@@ -0,0 +1,84 @@
+import pytest
+
+from command_router import CommandRouter
+
+COMMANDS = {
+    'هجوم': 'attack',
+    'دفاع': 'defend',
+    'تعلم': 'learn',
+    'ابحث': 'search',
+    'استراتيجية': 'strategy',
+    'اصنع طوف': 'build_raft',
+}
+
+
+class CountingClassifier:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        return [{'label': 'LABEL_0', 'score': 0.25}]
+
+
+@pytest.fixture
+def classifier():
+    return CountingClassifier()
+
+
+@pytest.fixture
+def router(classifier):
+    return CommandRouter(COMMANDS, classifier)
+
+
+@pytest.mark.parametrize('text, command, rest', [
+    ('ابحث عن الصيد', 'search', 'عن الصيد'),
+    ('وابحث عن الصيد', 'search', 'عن الصيد'),
+    ('فتعلم البحر', 'learn', 'البحر'),
+    ('بالهجوم الآن', 'attack', 'الآن'),
+    ('أريد الدفاع عن الطوف', 'defend', 'أريد عن الطوف'),
+    # التشكيل وأشكال الهمزة لا تمنع المطابقة
+    ('إستراتيجيّة للعاصفة', 'strategy', 'للعاصفة'),
+    ('هَجوم', 'attack', ''),
+    # عبارة من كلمتين، مع سابقة على الكلمة الأولى
+    ('واصنع طوف كبير', 'build_raft', 'كبير'),
+])
+def test_prefix_aware_match_and_remainder(router, text, command, rest):
+    assert router.split(text) == (command, rest)
+
+
+@pytest.mark.parametrize('text', ['مرحبا', 'اصنع', 'متعلم', 'الهجومي', '', '   '])
+def test_no_match_returns_whole_text(router, text):
+    assert router.split(text) == (None, text.strip())
+
+
+def test_first_phrase_wins(router):
+    assert router.match('دفاع ثم هجوم') == 'defend'
+
+
+def test_keyword_match_skips_model(router, classifier):
+    assert router.route('وابحث عن السمك') == ('search', 1.0, 'عن السمك')
+    assert classifier.calls == 0
+    assert router.stats()['keyword_hits'] == 1
+
+
+def test_unmatched_text_skips_model_unless_confidence_requested(router, classifier):
+    assert router.route('مرحبا') == (None, None, 'مرحبا')
+    assert classifier.calls == 0
+    assert router.route('مرحبا', need_confidence=True) == (None, 0.25, 'مرحبا')
+    assert classifier.calls == 1
+
+
+def test_classifications_are_cached_by_normalized_text(router, classifier):
+    router.classify('مرحباً')
+    router.classify('مرحبا ')
+    assert classifier.calls == 1
+    assert router.stats()['cache_hits'] == 1
+
+
+def test_lru_cache_is_bounded(classifier):
+    router = CommandRouter(COMMANDS, classifier, cache_size=2)
+    for text in ('أ', 'ب', 'ج', 'أ'):
+        router.classify(text)
+    assert classifier.calls == 4
+    assert router.stats()['cache_size'] == 2
@@ -0,0 +1,92 @@
+import pytest
+
+import web_fetcher
+from fetch_cache import FetchCache
+from web_fetcher import WebFetcher
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeTransport:
+    """خادم وهمي يدعم ETag: يرد 304 إذا طابقت If-None-Match النسخة الحالية"""
+
+    def __init__(self):
+        self.version = 1
+        self.requests = []
+
+    def get(self, url, timeout=5, max_bytes=None, headers=None):
+        headers = headers or {}
+        self.requests.append(headers)
+        etag = f'"v{self.version}"'
+        if headers.get('If-None-Match') == etag:
+            return {'url': url, 'status': 304, 'headers': {'ETag': etag}, 'text': ''}
+        return {'url': url, 'status': 200, 'headers': {'ETag': etag, 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'},
+                'text': f'صفحة {self.version}'}
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def fetcher(clock, monkeypatch):
+    # تحليل HTML ليس موضوع الاختبار (ولا يحتاج bs4)
+    monkeypatch.setattr(web_fetcher, 'extract_text', lambda html, max_chars, parser: html[:max_chars])
+    fetcher = WebFetcher(transport=FakeTransport(), parser='html.parser', cache=FetchCache(ttl=60, clock=clock))
+    yield fetcher
+    fetcher.shutdown()
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = FetchCache(ttl=10, clock=clock)
+    cache.put('k', 'v')
+    assert cache.get('k') == 'v'
+    clock.now += 10
+    assert cache.get('k') is None
+    # المنتهي يبقى متاحاً لإعادة التحقق
+    assert cache.lookup('k')['value'] == 'v'
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_lru_eviction(clock):
+    cache = FetchCache(max_entries=2, clock=clock)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.lookup('a')
+    cache.put('c', 3)
+    assert cache.lookup('b') is None and cache.lookup('a') is not None
+
+
+def test_fresh_page_is_served_without_a_request(fetcher):
+    first = fetcher.fetch_page('https://example.invalid/a')
+    assert fetcher.fetch_page('https://example.invalid/a') == first
+    assert len(fetcher.transport.requests) == 1
+
+
+def test_expired_page_is_revalidated_with_etag(fetcher, clock):
+    first = fetcher.fetch_page('https://example.invalid/a')
+    clock.now += 61
+    assert fetcher.fetch_page('https://example.invalid/a') == first
+    conditional = fetcher.transport.requests[-1]
+    assert conditional['If-None-Match'] == '"v1"'
+    assert conditional['If-Modified-Since'] == 'Mon, 01 Jan 2024 00:00:00 GMT'
+    assert fetcher.cache.stats()['revalidated'] == 1
+
+    # 304 يجدد الصلاحية فلا يُرسل طلب آخر
+    fetcher.fetch_page('https://example.invalid/a')
+    assert len(fetcher.transport.requests) == 2
+
+
+def test_changed_page_replaces_cached_copy(fetcher, clock):
+    fetcher.fetch_page('https://example.invalid/a')
+    fetcher.transport.version = 2
+    clock.now += 61
+    assert fetcher.fetch_page('https://example.invalid/a')['content'] == 'صفحة 2'
+    assert fetcher.cache.lookup(fetcher.cache.key('page', 'https://example.invalid/a'))['etag'] == '"v2"'
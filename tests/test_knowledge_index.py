@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from arabic_text import normalize_arabic
+from knowledge_index import KnowledgeIndex
+
+WORDS = ['البقاء', 'الطوف', 'البحر', 'الصيد', 'بالسمك', 'السمك', 'الخشب', 'العاصفة', 'الماء', 'إعصار',
+         'النار', 'fish', 'Raft', 'wood']
+
+
+def knowledge_base(seed=0, size=300):
+    rng = random.Random(seed)
+    knowledge_base = {}
+    for i in range(size):
+        category = rng.choice(['أ', 'ب', 'ج'])
+        knowledge_base.setdefault(category, []).append({
+            'text': ' '.join(rng.choices(WORDS, k=rng.randint(1, 6))) + f' n{i}',
+            'category': category,
+            # ثقة متكررة حتى يُختبر ترتيب التساوي
+            'confidence': rng.choice([0.1, 0.5, 0.5, 0.9])
+        })
+    return knowledge_base
+
+
+def reference_best_match(knowledge_base, situation):
+    """المرور الخطي الأصلي في apply_knowledge (على نص موحد)"""
+    situation = normalize_arabic(situation)
+    relevant = [item for items in knowledge_base.values() for item in items
+                if any(word in situation for word in normalize_arabic(item['text']).split())]
+    relevant.sort(key=lambda item: item['confidence'], reverse=True)
+    return relevant[0] if relevant else None
+
+
+def reference_search(knowledge_base, query, limit):
+    query = normalize_arabic(query).strip()
+    results = [item for items in knowledge_base.values() for item in items
+               if query in normalize_arabic(item['text'])]
+    return results[:limit]
+
+
+@pytest.fixture
+def kb():
+    return knowledge_base()
+
+
+def build(kb):
+    index = KnowledgeIndex()
+    index.build(kb)
+    return index
+
+
+@pytest.mark.parametrize('situation', ['هجوم في البحر', 'اصطياد السمك بالسمك', 'العاصفه', 'اعصار قادم',
+                                       'raft and WOOD', 'لا شيء هنا', 'n17'])
+def test_best_match_matches_linear_scan(kb, situation):
+    assert build(kb).best_match(situation) is reference_best_match(kb, situation)
+
+
+@pytest.mark.parametrize('query', ['سمك', 'البحر الصيد', 'الماء', 'fish', 'n2', 'غير موجود'])
+@pytest.mark.parametrize('limit', [1, 5])
+def test_search_matches_linear_scan(kb, query, limit):
+    assert build(kb).search(query, limit) == reference_search(kb, query, limit)
+
+
+def test_incremental_add_keeps_ranking(kb):
+    index = build(kb)
+    item = {'text': 'البحر الهادئ', 'category': 'ب', 'confidence': 0.99}
+    kb['ب'].append(item)
+    index.add(item, 'ب')
+    assert index.best_match('البحر') is item is reference_best_match(kb, 'البحر')
+    assert index.search('الهادئ', 5) == reference_search(kb, 'الهادئ', 5)
+
+
+def test_lookup_orders_by_confidence(kb):
+    results = build(kb).lookup('الطوف', limit=50)
+    assert results
+    assert [item['confidence'] for item in results] == sorted((item['confidence'] for item in results), reverse=True)
@@ -0,0 +1,89 @@
+import json
+import os
+
+from knowledge_store import KnowledgeStore
+
+
+def item(i, category='أ'):
+    return {'text': f'نص {i}', 'category': category, 'confidence': i / 10}
+
+
+def test_appended_items_are_loaded_after_reopen(tmp_path):
+    name = str(tmp_path / 'kb')
+    store = KnowledgeStore(name)
+    assert list(store.load()) == []
+    for i in range(3):
+        store.append(item(i))
+    store.close()
+
+    reopened = KnowledgeStore(name)
+    assert list(reopened.load()) == [item(i) for i in range(3)]
+    assert (reopened.snapshot_count, reopened.log_count) == (0, 3)
+
+
+def test_compaction_round_trip(tmp_path):
+    name = str(tmp_path / 'kb')
+    store = KnowledgeStore(name)
+    knowledge_base = {'أ': [item(0), item(1)], 'ب': [{'text': 'بدون فئة', 'confidence': 0.3}]}
+    for items in knowledge_base.values():
+        for entry in items:
+            store.append(entry)
+    store.compact(knowledge_base)
+    store.append(item(2))
+    store.close()
+
+    assert not os.path.exists(store.log_path(0))
+    reopened = KnowledgeStore(name)
+    loaded = list(reopened.load())
+    # الفئة تُضاف للعناصر التي لا تحملها، والسجل الجديد يُقرأ بعد اللقطة
+    assert loaded == [item(0), item(1), {'text': 'بدون فئة', 'confidence': 0.3, 'category': 'ب'}, item(2)]
+    assert (reopened.generation, reopened.snapshot_count, reopened.log_count) == (1, 3, 1)
+
+
+def test_compaction_copies_lists_before_writing(tmp_path):
+    store = KnowledgeStore(str(tmp_path / 'kb'))
+    knowledge_base = {'أ': [item(0)]}
+    store.compact(knowledge_base)
+    knowledge_base['أ'].append(item(1))
+    assert store.snapshot_count == 1
+    assert list(store.load()) == [item(0)]
+
+
+def test_truncated_last_line_is_skipped(tmp_path):
+    store = KnowledgeStore(str(tmp_path / 'kb'))
+    store.append(item(0))
+    store.close()
+    with open(store.log_path(), 'a', encoding='utf-8') as f:
+        f.write('{"text": "ناقص')
+    assert list(store.load()) == [item(0)]
+
+
+def test_stale_logs_from_interrupted_compaction_are_removed(tmp_path):
+    store = KnowledgeStore(str(tmp_path / 'kb'))
+    store.append(item(0))
+    store.compact({'أ': [item(0)]})
+    store.close()
+    # سجل الجيل السابق بقي بعد انقطاع: محتواه موجود في اللقطة
+    with open(store.log_path(0), 'w', encoding='utf-8') as f:
+        f.write(json.dumps(item(0), ensure_ascii=False) + '\n')
+    assert list(store.load()) == [item(0)]
+    assert not os.path.exists(store.log_path(0))
+
+
+def test_legacy_json_is_migrated_once(tmp_path):
+    name = str(tmp_path / 'kb')
+    with open(name + '.json', 'w', encoding='utf-8') as f:
+        json.dump({'أ': [item(0)]}, f, ensure_ascii=False)
+    store = KnowledgeStore(name)
+    assert list(store.load()) == [item(0)]
+    assert os.path.exists(name + '.json.migrated') and not os.path.exists(name + '.json')
+    assert list(store.load()) == [item(0)]
+
+
+def test_needs_compaction_tracks_log_size(tmp_path):
+    store = KnowledgeStore(str(tmp_path / 'kb'), compact_every=3)
+    for i in range(3):
+        assert not store.needs_compaction
+        store.append(item(i))
+    assert store.needs_compaction
+    store.close()
@@ -0,0 +1,43 @@
+import http.client
+
+import pytest
+
+from metrics import Registry, format_labels, serve_metrics
+
+
+def test_label_values_are_escaped():
+    assert format_labels([('where', 'a"b\\c\nd')]) == '{where="a\\"b\\\\c\\nd"}'
+
+
+def test_prometheus_output_stays_one_line_per_sample():
+    registry = Registry()
+    registry.counter('errors_total', 'الأخطاء', where='سطر\nجديد').inc()
+    lines = [line for line in registry.prometheus().splitlines() if not line.startswith('#')]
+    assert lines == ['errors_total{where="سطر\\nجديد"} 1']
+
+
+@pytest.fixture(scope='module')
+def metrics_server():
+    server = serve_metrics(port=0)
+    yield server.server_address
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize('seconds', ['abc', '-1', '0', 'nan', 'inf'])
+def test_profile_rejects_bad_seconds(metrics_server, seconds):
+    connection = http.client.HTTPConnection(*metrics_server, timeout=5)
+    connection.request('GET', f'/profile?seconds={seconds}')
+    response = connection.getresponse()
+    assert response.status == 400
+    response.read()
+    connection.close()
+
+
+def test_profile_runs_for_short_duration(metrics_server):
+    connection = http.client.HTTPConnection(*metrics_server, timeout=5)
+    connection.request('GET', '/profile?seconds=0.05')
+    response = connection.getresponse()
+    assert response.status == 200
+    response.read()
+    connection.close()
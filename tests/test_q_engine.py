@@ -0,0 +1,77 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from q_engine import QLearningEngine  # noqa: E402
+
+
+def reference_update(table, state, action, reward, next_state, learning_rate=0.1, discount=0.9):
+    """تحديث Q-learning الأصلي لعدو واحد"""
+    old = table[state, action]
+    table[state, action] = old + learning_rate * (reward + discount * table[next_state].max() - old)
+
+
+def test_per_enemy_tables_are_the_default():
+    engine = QLearningEngine(seed=0)
+    agents = [engine.register() for _ in range(3)]
+    assert not engine.shared
+    before = engine.tables.copy()
+    engine.update([agents[1]], [0], [2], [1.0], [1])
+    changed = np.argwhere(engine.tables != before)
+    assert changed.tolist() == [[1, 0, 2]]
+
+
+def test_batched_update_matches_scalar_update():
+    engine = QLearningEngine(seed=1)
+    agents = [engine.register() for _ in range(20)]
+    expected = engine.tables.copy()
+    rng = np.random.default_rng(2)
+    states, actions, next_states = (rng.integers(4, size=20), rng.integers(5, size=20), rng.integers(4, size=20))
+    rewards = rng.normal(size=20)
+    for agent, s, a, r, n in zip(agents, states, actions, rewards, next_states):
+        reference_update(expected[agent], s, a, r, n)
+    engine.update(agents, states, actions, rewards, next_states)
+    np.testing.assert_allclose(engine.tables, expected)
+
+
+def test_shared_table_averages_colliding_updates():
+    engine = QLearningEngine(shared=True, seed=0)
+    agents = [engine.register() for _ in range(2)]
+    table = engine.table().copy()
+    engine.update(agents, [0, 0], [1, 1], [1.0, -1.0], [2, 2])
+    # متوسط تحديثين متعاكسين على نفس الخانة
+    delta = 0.1 * (0.9 * table[2].max() - table[0, 1])
+    assert engine.table()[0, 1] == pytest.approx(table[0, 1] + delta)
+
+
+def test_greedy_choice_without_exploration():
+    engine = QLearningEngine(epsilon=0.0, seed=0)
+    agents = [engine.register() for _ in range(10)]
+    states = np.arange(10) % 4
+    expected = [engine.table(agent)[state].argmax() for agent, state in zip(agents, states)]
+    assert engine.choose_actions(agents, states).tolist() == expected
+
+
+def test_capacity_grows_and_keeps_existing_rows():
+    engine = QLearningEngine(capacity=2, seed=0)
+    first = [engine.register() for _ in range(2)]
+    kept = engine.tables[:2].copy()
+    engine.register()
+    assert len(engine.tables) >= 3
+    np.testing.assert_array_equal(engine.tables[first], kept)
+
+
+def test_load_tables_shapes():
+    trained = np.arange(20, dtype=np.float64).reshape(4, 5)
+    per_enemy = QLearningEngine(capacity=3)
+    for _ in range(3):
+        per_enemy.register()
+    per_enemy.load_tables(trained)
+    assert all((per_enemy.table(agent) == trained).all() for agent in range(3))
+
+    shared = QLearningEngine(shared=True)
+    shared.load_tables(np.stack([trained, trained + 2]))
+    np.testing.assert_array_equal(shared.table(), trained + 1)
+
+    with pytest.raises(ValueError):
+        shared.load_tables(np.zeros((3, 3)))
@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from ai_learning import AILearningSystem  # noqa: E402
+from arabic_text import content_hash  # noqa: E402
+from embedding_index import EmbeddingIndex  # noqa: E402
+from knowledge_store import KnowledgeStore  # noqa: E402
+from model_service import ClassifierService  # noqa: E402
+
+TEXTS = ('صيد السمك بالشبكة', 'بناء الطوف من الخشب', 'جمع الماء من المطر')
+VOCABULARY = {word: i for i, word in enumerate(
+    'صيد السمك بالشبكة بناء الطوف من الخشب جمع الماء المطر النجوم الليل'.split())}
+
+
+class WordEmbedder:
+    """متجهات متقاربة الاتجاه مثل BERT: مكون مشترك كبير مع اتجاه لكل كلمة"""
+
+    def __call__(self, texts):
+        vectors = np.full((len(texts), len(VOCABULARY)), 0.6, dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.split():
+                if word in VOCABULARY:
+                    vectors[row, VOCABULARY[word]] += 1.0
+        return vectors
+
+
+class Classifier:
+    def __init__(self, supports_embeddings=True):
+        self.supports_embeddings = supports_embeddings
+
+    def __call__(self, texts, truncation=True):
+        return [{'label': 'LABEL_0', 'score': 0.9} for _ in texts]
+
+    def embed(self, texts):
+        return WordEmbedder()(texts)
+
+
+def knowledge_store(tmp_path):
+    store = KnowledgeStore(str(tmp_path / 'knowledge_base'))
+    store.compact({'عام': [{'text': text, 'category': 'عام', 'confidence': 0.9, 'timestamp': 0.0,
+                            'hash': content_hash(text)} for text in TEXTS]})
+    return store
+
+
+def learning_system(tmp_path, classifier=None, embedder=None):
+    system = AILearningSystem(classifier=classifier or Classifier(), store=knowledge_store(tmp_path),
+                              fetcher=object(), start_learning=False, embedder=embedder)
+    system.backfill_embeddings()
+    return system
+
+
+def test_mean_similarity_matches_brute_force(tmp_path):
+    index = EmbeddingIndex(str(tmp_path / 'index'))
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 8)).astype(np.float32)
+    index.add_many([str(i) for i in range(40)], vectors[:40])
+    query = rng.normal(size=(1, 8))
+
+    def expected(count):
+        rows = vectors[:count] / np.linalg.norm(vectors[:count], axis=1, keepdims=True)
+        return float((rows @ (query[0] / np.linalg.norm(query))).mean())
+
+    assert index.mean_similarity(query)[0] == pytest.approx(expected(40), abs=1e-3)
+    # المجموع المحسوب يُحدّث مع الإضافة
+    index.add_many([str(i) for i in range(40, 50)], vectors[40:])
+    assert index.mean_similarity(query)[0] == pytest.approx(expected(50), abs=1e-3)
+    index.close()
+
+
+def test_relative_margin_rejects_unrelated_situations(tmp_path):
+    system = learning_system(tmp_path, embedder=WordEmbedder())
+    related = system.semantic_match('صيد السمك', min_relative=system.MIN_RELATIVE_SIMILARITY)
+    assert related[0][0]['text'] == 'صيد السمك بالشبكة'
+
+    # كل العناصر متشابهة بأكثر من 0.5 بسبب المكون المشترك، لكن لا شيء يتميز عن المتوسط
+    unrelated = system.semantic_match('النجوم الليل')
+    assert unrelated and min(score for _, score in unrelated) > 0.5
+    assert system.semantic_match('النجوم الليل', min_relative=system.MIN_RELATIVE_SIMILARITY) == []
+    system.embedding_index.close()
+
+
+def test_backend_without_embeddings_skips_index(tmp_path):
+    system = learning_system(tmp_path, classifier=Classifier(supports_embeddings=False))
+    assert system.embeddings() is None
+    assert system.semantic_match('صيد السمك') == []
+    with pytest.raises(RuntimeError):
+        system.embed(['صيد'])
+    assert not (tmp_path / 'knowledge_base.embeddings.json').exists()
+
+
+def test_service_embeds_on_its_worker_thread():
+    threads = []
+
+    class Model(Classifier):
+        def embed(self, texts):
+            threads.append(threading.current_thread())
+            return super().embed(texts)
+
+    service = ClassifierService(loader=lambda name: Model(), model_name='m')
+    vectors = service.embed(['صيد السمك', 'بناء الطوف'])
+    assert vectors.shape == (2, len(VOCABULARY))
+    assert threads and threading.current_thread() not in threads
+
+
+def test_service_embed_raises_when_backend_cannot_embed():
+    service = ClassifierService(loader=lambda name: Classifier(supports_embeddings=False), model_name='m')
+    assert not service.supports_embeddings
+    with pytest.raises(RuntimeError):
+        service.embed(['صيد'])
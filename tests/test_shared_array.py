@@ -0,0 +1,34 @@
+import gc
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from ai_process import attach_array, close_released_blocks, release_array, share_array  # noqa: E402
+
+
+def test_attached_array_matches_and_outlives_sender():
+    original = np.arange(20000, dtype=np.float32).reshape(100, 200)
+    descriptor, block = share_array(original)
+    attached = attach_array(descriptor)
+    # المرسل يغلق كتلته بعد تأكيد الربط، والمصفوفة المربوطة تبقى صالحة
+    release_array(block)
+    assert np.array_equal(attached, original)
+    assert attached.shape == (100, 200)
+    del attached
+    gc.collect()
+    assert close_released_blocks() == 1
+
+
+def test_block_stays_open_while_a_view_is_alive():
+    descriptor, block = share_array(np.arange(10000, dtype=np.int64))
+    attached = attach_array(descriptor)
+    release_array(block)
+    view = attached[100:110]
+    del attached
+    gc.collect()
+    assert close_released_blocks() == 0
+    assert view.tolist() == list(range(100, 110))
+    del view
+    gc.collect()
+    assert close_released_blocks() == 1
@@ -0,0 +1,62 @@
+import math
+import random
+
+import pytest
+
+from spatial_hash import SpatialHash
+
+
+class Thing:
+    def __init__(self, x, z):
+        self.x, self.z = x, z
+
+
+@pytest.fixture
+def world():
+    rng = random.Random(0)
+    grid = SpatialHash(cell_size=5)
+    things = [Thing(rng.uniform(-50, 50), rng.uniform(-50, 50)) for _ in range(300)]
+    for thing in things:
+        grid.move(thing, thing.x, thing.z)
+    return grid, things
+
+
+def brute_force(things, x, z):
+    return sorted((math.hypot(t.x - x, t.z - z), id(t)) for t in things)
+
+
+@pytest.mark.parametrize('x, z, radius', [(0, 0, 10), (-49, 49, 7.5), (12.5, -3, 0.5), (0, 0, 200)])
+def test_query_radius_matches_brute_force(world, x, z, radius):
+    grid, things = world
+    found = sorted((dist, id(obj)) for obj, dist in grid.query_radius(x, z, radius))
+    expected = [(dist, key) for dist, key in brute_force(things, x, z) if dist <= radius]
+    assert [key for _, key in found] == [key for _, key in expected]
+
+
+@pytest.mark.parametrize('k', [1, 3, 10])
+@pytest.mark.parametrize('x, z', [(0, 0), (80, 80), (-3.3, 17)])
+def test_nearest_matches_brute_force(world, x, z, k):
+    grid, things = world
+    nearest = grid.nearest(x, z, k)
+    expected = brute_force(things, x, z)[:k]
+    assert [round(dist, 9) for _, dist in nearest] == [round(dist, 9) for dist, _ in expected]
+
+
+def test_nearest_respects_max_radius(world):
+    grid, things = world
+    results = grid.nearest(0, 0, k=1000, max_radius=8)
+    assert len(results) == sum(dist <= 8 for dist, _ in brute_force(things, 0, 0))
+
+
+def test_move_and_remove_update_cells():
+    grid = SpatialHash(cell_size=5)
+    thing = Thing(0, 0)
+    grid.move(thing, 1, 1)
+    grid.move(thing, 21, 21)
+    assert grid.query_radius(1, 1, 2) == []
+    assert [obj for obj, _ in grid.query_radius(21, 21, 1)] == [thing]
+    assert len(grid.cells) == 1
+
+    grid.remove(thing)
+    assert thing not in grid and len(grid) == 0 and not grid.cells
+    assert grid.nearest(0, 0) == []
@@ -0,0 +1,77 @@
+import functools
+import http.client
+import json
+import threading
+
+import pytest
+
+from server import MANIFEST_NAME, CachingRequestHandler, StaticCache, StaticServer
+
+
+def write_site(root):
+    (root / 'app.abc123.js').write_text('let x = 1;\n' * 200)
+    (root / 'notes.txt').write_text('ملاحظات التطوير\n' * 200)
+    manifest = {'format': 1, 'files': {'app.js': {'path': 'app.abc123.js', 'immutable': True}}}
+    (root / MANIFEST_NAME).write_text(json.dumps(manifest))
+
+
+def test_prewarm_loads_manifest_files_only(tmp_path):
+    write_site(tmp_path)
+    cache = StaticCache(str(tmp_path))
+    cache.prewarm()
+    assert set(cache.files) == {str(tmp_path / 'app.abc123.js')}
+    assert cache.files[str(tmp_path / 'app.abc123.js')].immutable
+
+
+def test_prewarm_without_manifest_loads_nothing(tmp_path):
+    (tmp_path / 'index.html').write_text('<html></html>')
+    cache = StaticCache(str(tmp_path))
+    cache.prewarm()
+    assert cache.files == {}
+
+
+def test_prewarm_explicit_directory(tmp_path):
+    write_site(tmp_path)
+    cache = StaticCache(str(tmp_path))
+    cache.prewarm(str(tmp_path))
+    assert str(tmp_path / 'notes.txt') in cache.files
+
+
+@pytest.fixture
+def site(tmp_path):
+    write_site(tmp_path)
+    # check_interval=0: كل طلب يتحقق من تغير الملف على القرص
+    handler = functools.partial(CachingRequestHandler, directory=str(tmp_path))
+    httpd = StaticServer(('127.0.0.1', 0), handler, StaticCache(str(tmp_path), check_interval=0), quiet=True)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield tmp_path, httpd.server_address
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get(address, path, headers=None):
+    connection = http.client.HTTPConnection(*address, timeout=5)
+    connection.request('GET', path, headers=headers or {})
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+
+def test_etag_revalidation(site):
+    root, address = site
+    response, body = get(address, '/notes.txt')
+    assert response.status == 200
+    etag = response.getheader('ETag')
+    assert response.getheader('Cache-Control') == 'no-cache'
+
+    response, body = get(address, '/notes.txt', {'If-None-Match': etag})
+    assert response.status == 304
+    assert body == b''
+
+    (root / 'notes.txt').write_text('نسخة جديدة')
+    response, body = get(address, '/notes.txt', {'If-None-Match': etag})
+    assert response.status == 200
+    assert body.decode('utf-8') == 'نسخة جديدة'
+    assert response.getheader('ETag') != etag
@@ -0,0 +1,91 @@
+import pytest
+
+from tick_scheduler import TickScheduler
+
+
+class Clock:
+    """ساعة وهمية يقدمها العمل نفسه"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize('frames, dt', [(16, 0.0625), (4, 0.25), (2, 0.5)])
+def test_tick_rate_is_independent_of_frame_rate(frames, dt):
+    ticks = []
+    scheduler = TickScheduler(budget=1.0, clock=Clock())
+    scheduler.add('ai', 4, ticks.append, max_backlog=4)
+    for _ in range(frames):
+        scheduler.update(dt)
+    assert ticks == [0.25] * 4
+    assert scheduler.stats()['ai']['skipped'] == 0
+
+
+def test_backlog_is_capped_after_a_long_pause():
+    ticks = []
+    scheduler = TickScheduler(budget=1.0, clock=Clock())
+    scheduler.add('ai', 4, ticks.append, max_backlog=2)
+    scheduler.update(2.0)
+    assert len(ticks) == 2
+    stats = scheduler.stats()['ai']
+    assert stats['skipped'] == 6 and stats['backlog'] == 0
+
+
+def test_alpha_is_fraction_of_current_step():
+    scheduler = TickScheduler(clock=Clock())
+    system = scheduler.add('ai', 4, lambda dt: None)
+    scheduler.update(0.125)
+    assert system.alpha == pytest.approx(0.5)
+    scheduler.update(0.1875)
+    assert system.alpha == pytest.approx(0.25)
+
+
+def test_generator_work_is_carried_over_to_next_frame():
+    clock = Clock()
+    done = []
+
+    def tick(dt):
+        for chunk in range(3):
+            clock.now += 0.6
+            done.append(chunk)
+            yield
+
+    scheduler = TickScheduler(budget=1.0, clock=clock)
+    scheduler.add('ai', 4, tick)
+    scheduler.update(0.25)
+    # الجزء الثاني يبدأ قبل نهاية الميزانية، والثالث يؤجل
+    assert done == [0, 1]
+    assert scheduler['ai'].busy
+    scheduler.update(0.0)
+    assert done == [0, 1, 2]
+    assert not scheduler['ai'].busy
+
+    stats = scheduler.stats()
+    assert stats['ai']['ticks'] == 1
+    assert stats['ai']['carried_over'] == 1
+    assert stats['over_budget'] == 1
+    assert stats['ai']['work_seconds'] == pytest.approx(1.8)
+
+
+def test_every_system_progresses_when_budget_is_exhausted():
+    clock = Clock()
+    runs = {'ai': 0, 'physics': 0}
+
+    def system(name):
+        def tick(dt):
+            clock.now += 1.0
+            runs[name] += 1
+        return tick
+
+    scheduler = TickScheduler(budget=0.0, clock=clock)
+    scheduler.add('ai', 4, system('ai'))
+    scheduler.add('physics', 4, system('physics'))
+    scheduler.update(0.5)
+    # نبضة واحدة لكل نظام رغم انتهاء الميزانية، والمتأخر ينتظر الإطار التالي
+    assert runs == {'ai': 1, 'physics': 1}
+    assert scheduler.stats()['ai']['carried_over'] == 1
+    scheduler.update(0.0)
+    assert runs == {'ai': 2, 'physics': 2}
@@ -0,0 +1,122 @@
+import time
+from collections import deque
+
+
+class FixedStepSystem:
+    """نظام يعمل بمعدل ثابت مستقل عن معدل الإطارات
+
+    tick(dt) تُستدعى مرة لكل نبضة؛ إذا أرجعت مولّداً فكل yield نقطة توقف
+    يمكن عندها تأجيل باقي العمل إلى الإطار التالي عند انتهاء الميزانية.
+    """
+
+    def __init__(self, name, rate, tick, max_backlog=2):
+        self.name = name
+        self.step = 1.0 / rate
+        self.tick = tick
+        # أقصى عدد نبضات متأخرة قبل إسقاط الأقدم (حتى لا تتراكم بعد توقف طويل)
+        self.max_backlog = max_backlog
+        self.accumulator = 0.0
+        self.due = 0
+        self.current = None
+
+        self.ticks = 0
+        self.skipped = 0
+        self.carried_over = 0
+        self.work_time = 0.0
+
+    @property
+    def alpha(self):
+        """نسبة الوقت المنقضي من النبضة الحالية (0..1) لاستيفاء الحركة"""
+        return min(1.0, self.accumulator / self.step)
+
+    @property
+    def busy(self):
+        return self.current is not None or self.due > 0
+
+    def advance(self, dt):
+        self.accumulator += dt
+        while self.accumulator >= self.step:
+            self.accumulator -= self.step
+            self.due += 1
+        if self.due > self.max_backlog:
+            self.skipped += self.due - self.max_backlog
+            self.due = self.max_backlog
+
+    def run_once(self):
+        """تنفيذ جزء واحد من العمل؛ ترجع False إذا لم يبق شيء لهذا الإطار"""
+        if self.current is None:
+            if not self.due:
+                return False
+            self.due -= 1
+            self.ticks += 1
+            work = self.tick(self.step)
+            if work is None:
+                return True
+            self.current = iter(work)
+        try:
+            next(self.current)
+        except StopIteration:
+            self.current = None
+        return True
+
+
+class TickScheduler:
+    """جدولة مركزية لأنظمة اللعبة بخطوات ثابتة وميزانية زمنية لكل إطار
+
+    العمل الذي لا يتسع في الميزانية يُستكمل في الإطار التالي، ويتقدم كل نظام
+    بجزء واحد على الأقل في كل إطار حتى لا يتوقف تماماً.
+    """
+
+    def __init__(self, budget=0.004, clock=time.perf_counter):
+        self.budget = budget
+        self.clock = clock
+        self.systems = {}
+        self.frames = 0
+        self.over_budget = 0
+
+    def add(self, name, rate, tick, max_backlog=2):
+        system = self.systems[name] = FixedStepSystem(name, rate, tick, max_backlog)
+        return system
+
+    def __getitem__(self, name):
+        return self.systems[name]
+
+    def update(self, dt):
+        """تقديم الساعة بزمن الإطار وتنفيذ النبضات المستحقة ضمن الميزانية"""
+        self.frames += 1
+        started = self.clock()
+        deadline = started + self.budget
+        systems = list(self.systems.values())
+        for system in systems:
+            system.advance(dt)
+
+        pending = deque(system for system in systems if system.busy)
+        progressed = set()
+        while pending:
+            system = pending.popleft()
+            if system in progressed and self.clock() >= deadline:
+                continue
+            chunk_started = self.clock()
+            if system.run_once():
+                progressed.add(system)
+                system.work_time += self.clock() - chunk_started
+                if system.busy:
+                    pending.append(system)
+
+        for system in systems:
+            if system.busy:
+                system.carried_over += 1
+        if self.clock() - started > self.budget:
+            self.over_budget += 1
+
+    def stats(self):
+        stats = {'frames': self.frames, 'over_budget': self.over_budget}
+        for name, system in self.systems.items():
+            stats[name] = {
+                'ticks': system.ticks,
+                'skipped': system.skipped,
+                'carried_over': system.carried_over,
+                'backlog': system.due,
+                'work_seconds': system.work_time
+            }
+        return stats
@@ -0,0 +1,135 @@
+import importlib.util
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from fetch_cache import FetchCache
+
+
+def default_parser():
+    """استخدام lxml إذا كان مثبتاً لأنه أسرع بكثير من html.parser"""
+    return 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+
+def extract_text(html, max_chars=1000, parser='html.parser'):
+    """استخراج النص من صفحة HTML (دالة مستقلة لتعمل داخل عمليات منفصلة أيضاً)"""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, parser).get_text()[:max_chars]
+
+
+class RequestsTransport:
+    """طبقة نقل HTTP مبنية على جلسة requests واحدة تعيد استخدام الاتصالات"""
+
+    def __init__(self, pool_size=10, user_agent='baqaa-survival'):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = user_agent
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url, timeout=5, max_bytes=None, headers=None):
+        """جلب صفحة مع قراءة متدفقة تتوقف عند max_bytes"""
+        with self.session.get(url, timeout=timeout, stream=True, headers=headers) as response:
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(chunk_size=8192):
+                chunks.append(chunk)
+                size += len(chunk)
+                if max_bytes and size >= max_bytes:
+                    break
+            body = b''.join(chunks)
+            if max_bytes:
+                body = body[:max_bytes]
+            return {
+                'url': url,
+                'status': response.status_code,
+                'headers': dict(response.headers),
+                'text': body.decode(response.encoding or 'utf-8', errors='replace')
+            }
+
+
+class WebFetcher:
+    """مرحلة جلب متوازية مع حد للطلبات المتزامنة لكل خادم وتحليل HTML في مجموعة عمال"""
+
+    def __init__(self, transport=None, max_workers=8, per_host=2, parse_executor=None,
+                 timeout=5, max_bytes=64 * 1024, max_chars=1000, parser=None, cache=None):
+        self.transport = transport or RequestsTransport(pool_size=max_workers)
+        self.cache = cache or FetchCache()
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.parser = parser or default_parser()
+
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix='fetch')
+        # يمكن تمرير ProcessPoolExecutor لإخراج التحليل من العملية الحالية
+        self._parse_pool = parse_executor or ThreadPoolExecutor(2, thread_name_prefix='parse')
+        self._host_limits = {}
+        self._host_lock = threading.Lock()
+
+    def _host_semaphore(self, url):
+        host = urlsplit(url).netloc
+        with self._host_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_limits[host]
+
+    def submit(self, fn, *args, **kwargs):
+        """تشغيل مهمة على مجموعة عمال الجلب"""
+        return self._pool.submit(fn, *args, **kwargs)
+
+    def search(self, query, num_results=5):
+        """روابط نتائج البحث على الويب"""
+        from googlesearch import search
+        key = self.cache.key('search', query, str(num_results))
+        return self.cache.get_or_compute(key, lambda: list(search(query, num_results=num_results)))
+
+    def fetch(self, url, headers=None):
+        """جلب صفحة واحدة مع احترام حد الطلبات لكل خادم"""
+        with self._host_semaphore(url):
+            return self.transport.get(url, timeout=self.timeout, max_bytes=self.max_bytes,
+                                      headers=headers)
+
+    def parse(self, html):
+        """تحليل الصفحة على مجموعة عمال التحليل"""
+        return self._parse_pool.submit(extract_text, html, self.max_chars, self.parser).result()
+
+    def fetch_page(self, url):
+        """جلب صفحة واستخراج نصها مع التحقق من الذاكرة المؤقتة أولاً"""
+        key = self.cache.key('page', url)
+        page = self.cache.get(key)
+        if page is not None:
+            return page
+
+        # طلب شرطي إذا كانت لدينا نسخة منتهية الصلاحية
+        entry = self.cache.lookup(key)
+        response = self.fetch(url, headers=self.cache.validation_headers(entry))
+        if response['status'] == 304 and entry is not None:
+            self.cache.mark_revalidated(key)
+            return entry['value']
+
+        page = {
+            'url': url,
+            'content': self.parse(response['text'])
+        }
+        if response['status'] == 200:
+            self.cache.put(key, page, response['headers'])
+        return page
+
+    def fetch_pages(self, urls):
+        """جلب عدة صفحات بالتوازي مع تجاهل الصفحات التي فشل جلبها"""
+        futures = [self._pool.submit(self.fetch_page, url) for url in urls]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception:
+                continue
+        return results
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+        self._parse_pool.shutdown(wait=False)